@@ -1,15 +1,28 @@
 import argparse
-import json
+import functools
 import os
 import time
 
-import metrics_utility
-import requests
 import yaml
-from cachetools import TTLCache, cached
 
+import async_engine
+import attribute_cache
 import constants
+import device_collector
+import device_identity
+import discovery
 import exporter_core
+import exposition
+import log
+import metric_index
+import request_counters
+import resolver
+import response_parser
+import scheduler
+import server_discovery
+import state_store
+import transport
+import warm_start
 
 # general configuration, key is 'device type' (i.e. telescope)
 configurations = {}
@@ -24,13 +37,17 @@ metric_metadata_cache = {}
 # structure is {device_type: {device_number: [attributes]}}
 skip_device_attribute = {}
 
-DEBUG = False
+# state of each alpaca server monitored, key is the server's base url.
+# servers not in here (i.e. tests calling getValue directly) use skip_device_attribute and no 'server' label
+servers = {}
 
+# cached attribute values, each with its own TTL (see 'cache_ttl' in config)
+value_cache = attribute_cache.AttributeCache()
 
-def debug(message):
-    # simply so I can easily control debug messages
-    if DEBUG:
-        print(message)
+# state saved across restarts, None if disabled
+state = None
+
+logger = log.get_logger("exporter")
 
 
 def loadConfigurations(path):
@@ -42,13 +59,20 @@ def loadConfigurations(path):
                 configurations[t] = c
 
 
-@cached(cache=TTLCache(maxsize=1024, ttl=60))
-def getValueCached(alpaca_base_url, device_type, device_number, attribute, querystr="", record_metrics=True):
-    debug(f"getValueCached(_, {device_type}, {device_number}, {attribute}, {querystr})")
-    return getValue(alpaca_base_url, device_type, device_number, attribute, querystr, record_metrics)
+def getValueCached(alpaca_base_url, device_type, device_number, attribute, querystr="", record_metrics=True, *, ttl=constants.DEFAULT_CACHE_TTL, request_url=None):
+    logger.log(log.TRACE, "getValueCached(_, %s, %s, %s, %s, ttl=%s)", device_type, device_number, attribute, querystr, ttl)
+    # record_metrics only affects counters, it is not part of the cached value
+    key = (alpaca_base_url, device_type, device_number, attribute, querystr)
+    return value_cache.get(key, ttl, lambda: getValue(alpaca_base_url, device_type, device_number, attribute, querystr, record_metrics, request_url=request_url))
+
+
+def invalidateDevice(alpaca_base_url, device_type, device_number):
+    """Drop all cached values of a device, used when its connection state changes."""
+    logger.debug("invalidateDevice(_, %s, %s)", device_type, device_number)
+    value_cache.invalidate((alpaca_base_url, device_type, device_number))
 
 
-def discoverDevices(alpaca_base_url, verbose=True):
+def discoverDevices(alpaca_base_url, verbose=True, unique_ids=None):
     """
     Discover all configured devices via the Alpaca Management API.
     Returns a dictionary with device_type as key and list of device numbers as value.
@@ -56,8 +80,25 @@ def discoverDevices(alpaca_base_url, verbose=True):
     Args:
         alpaca_base_url: Base URL for Alpaca API
         verbose: If True, print discovery messages for all devices found
+        unique_ids: Dict to record each device's UniqueID in, key is "device_type/device_number" (optional)
+    """
+    discovered = fetchConfiguredDevices(alpaca_base_url, verbose, unique_ids)
+    return {} if discovered is None else discovered
+
+
+def fetchConfiguredDevices(alpaca_base_url, verbose=True, unique_ids=None):
     """
-    debug("discoverDevices(_)")
+    Same as discoverDevices, but a failed discovery returns None instead of no devices.
+
+    Args:
+        alpaca_base_url: Base URL for Alpaca API
+        verbose: If True, print discovery messages for all devices found
+        unique_ids: Dict to record each device's UniqueID in, key is "device_type/device_number" (optional)
+
+    Returns:
+        dict: device_type -> list of device numbers, None if the management API could not be queried
+    """
+    logger.debug("fetchConfiguredDevices(_)")
     discovered = {}
 
     # Extract base URL (without /api/v1) for management API
@@ -67,18 +108,18 @@ def discoverDevices(alpaca_base_url, verbose=True):
     management_url = f"{base}/management/v1/configureddevices"
 
     try:
-        debug(f"management_url = {management_url}")
-        response = requests.get(management_url)
+        logger.debug("management_url = %s", management_url)
+        response = transport.get(management_url)
 
         if response.status_code != 200:
             print(f"WARNING: Failed to discover devices via management API (status {response.status_code})")
-            return discovered
+            return None
 
-        data = json.loads(response.text)
+        data = response_parser.loads(response.content)
 
         if "Value" not in data:
             print("WARNING: Management API response missing 'Value' field")
-            return discovered
+            return None
 
         for device in data["Value"]:
             device_type = device["DeviceType"].lower()
@@ -90,6 +131,8 @@ def discoverDevices(alpaca_base_url, verbose=True):
             if device_type in constants.DEVICE_TYPES:
                 if device_type not in discovered:
                     discovered[device_type] = []
+                if unique_ids is not None and unique_id:
+                    unique_ids[f"{device_type}/{device_number}"] = unique_id
                 if device_number not in discovered[device_type]:
                     discovered[device_type].append(device_number)
                     if verbose:
@@ -99,74 +142,206 @@ def discoverDevices(alpaca_base_url, verbose=True):
 
     except Exception as e:
         print(f"ERROR: Failed to discover devices: {e}")
+        return None
 
     return discovered
 
 
-def getValue(alpaca_base_url, device_type, device_number, attribute, querystr="", record_metrics=True):
-    debug(f"getValue(_, {device_type}, {device_number}, {attribute}, {querystr})")
+def getValue(alpaca_base_url, device_type, device_number, attribute, querystr="", record_metrics=True, *, request_url=None):
+    logger.log(log.TRACE, "getValue(_, %s, %s, %s, %s)", device_type, device_number, attribute, querystr)
 
-    # check if we need to skip
-    if device_type in skip_device_attribute and str(device_number) in skip_device_attribute[device_type] and attribute in skip_device_attribute[device_type][str(device_number)]:
-        # yup, skip it
-        debug(f"skipping attribute={attribute} for {device_type}/{device_number}")
-        return None
+    server = servers.get(alpaca_base_url)
+    # skipped attributes are not asked for, they are pruned from the device's plan
+    skip = skip_device_attribute if server is None else server.skip_device_attribute
 
-    request_url = f"{alpaca_base_url}/{device_type}/{device_number}/{attribute}?{querystr}"
-    debug(f"request_url = {request_url}")
+    # planned attributes come with their url
+    if request_url is None:
+        request_url = exporter_core.attribute_url(alpaca_base_url, device_type, device_number, attribute, querystr)
+    logger.log(log.TRACE, "request_url = %s", request_url)
 
-    labels = {
-        "device_type": device_type,
-        "device_number": device_number,
-        "attribute": attribute,
-    }
+    # counters are tallied and flushed once per cycle
+    server_label = None if server is None else server.label
 
     try:
-        response = requests.get(request_url)
+        response = transport.get(request_url)
+    except transport.CONNECTION_ERRORS as e:
+        # Server unreachable, no point asking this device for anything else this cycle
+        logger.debug("Connection error: %s", e)
+        if record_metrics:
+            request_counters.add(request_counters.ERROR, server_label, device_type, device_number, attribute)
+        msg = f"{device_type}/{device_number}: {e}"
+        raise exporter_core.DeviceNotConnectedError(msg) from e
     except Exception as e:
         # Network error, connection refused, timeout, etc.
-        debug(f"Connection error: {e}")
+        logger.debug("Connection error: %s", e)
         if record_metrics:
-            metrics_utility.inc("alpaca_error_total", labels)
+            request_counters.add(request_counters.ERROR, server_label, device_type, device_number, attribute)
         return None
 
-    if response.status_code != 200 or response.text is None or response.text == "":
+    if response.status_code != 200 or not response.content:
         if record_metrics:
-            metrics_utility.inc("alpaca_error_total", labels)
+            request_counters.add(request_counters.ERROR, server_label, device_type, device_number, attribute)
         return None
-    data = json.loads(response.text)
-    if "ErrorNumber" in data and data["ErrorNumber"] > 0:
-        errNo = data["ErrorNumber"]
-        if errNo == 1024:
+    # parsed from the body bytes, only the fields used here are kept
+    errNo, error_message, value = response_parser.parse_response(response.content)
+    if errNo > 0:
+        if errNo == constants.ASCOM_NOT_IMPLEMENTED:
             # indicates something is not implemented.  return None, do nothing.
             # NOTE do not log any warning, it will just spam output as we don't disable / remove the attribute.
-            if device_type not in skip_device_attribute:
-                skip_device_attribute[device_type] = {}
-            if str(device_number) not in skip_device_attribute[device_type]:
-                skip_device_attribute[device_type][str(device_number)] = []
-            # add this attribute to be skipped
-            skip_device_attribute[device_type][str(device_number)].append(attribute)
+            # add this attribute to be skipped (setdefault so concurrent devices don't clobber each other)
+            skip.setdefault(device_type, {}).setdefault(str(device_number), []).append(attribute)
             return None
+        if errNo == constants.ASCOM_NOT_CONNECTED:
+            if record_metrics:
+                request_counters.add(request_counters.ERROR, server_label, device_type, device_number, attribute)
+            msg = f"{device_type}/{device_number}: {'not connected' if error_message is None else error_message}"
+            raise exporter_core.DeviceNotConnectedError(msg)
         if record_metrics:
-            metrics_utility.inc("alpaca_error_total", labels)
+            request_counters.add(request_counters.ERROR, server_label, device_type, device_number, attribute)
         return None
-    value = data["Value"]
     # convert boolean to int
     if isinstance(value, (bool)):
         value = int(value)
     if record_metrics:
-        metrics_utility.inc("alpaca_success_total", labels)
-    debug(f"==> {value}")
+        request_counters.add(request_counters.SUCCESS, server_label, device_type, device_number, attribute)
+    logger.log(log.TRACE, "==> %s", value)
     return value
 
 
+def getDeviceState(alpaca_base_url, device_type, device_number, record_metrics=True):
+    """
+    Fetch all operational values of a device with a single 'devicestate' call.
+
+    Only used when the driver's 'interfaceversion' is new enough to provide 'devicestate'.
+
+    Args:
+        alpaca_base_url: Base URL for Alpaca API
+        device_type: Type of device
+        device_number: Device number
+        record_metrics: If True, record success/error counters
+
+    Returns:
+        dict: Lowercase attribute name -> value, or None if unsupported or the call failed
+    """
+    logger.log(log.TRACE, "getDeviceState(_, %s, %s)", device_type, device_number)
+
+    min_version = constants.DEVICESTATE_MIN_INTERFACE_VERSION.get(device_type)
+    if min_version is None:
+        return None
+
+    # 'devicestate' is not planned, so it is not pruned once the device reports it not implemented
+    server = servers.get(alpaca_base_url)
+    skip = skip_device_attribute if server is None else server.skip_device_attribute
+    if "devicestate" in skip.get(device_type, {}).get(str(device_number), ()):
+        return None
+
+    interface_version = getValueCached(alpaca_base_url, device_type, device_number, "interfaceversion")
+    if not isinstance(interface_version, int) or interface_version < min_version:
+        return None
+
+    state = getValue(alpaca_base_url, device_type, device_number, "devicestate", "", record_metrics)
+    if not isinstance(state, list):
+        return None
+
+    return exporter_core.parse_device_state(state)
+
+
+def restoreSkips(alpaca_base_url, device_type, device_number):
+    """
+    Get the skip list saved for a device that just connected.
+
+    The device is identified by its UniqueID and 'driverversion', a different
+    device or driver build starts with an empty skip list.
+
+    Args:
+        alpaca_base_url: Base URL for Alpaca API
+        device_type: Type of device
+        device_number: Device number
+
+    Returns:
+        list: Saved skip list, None if state is disabled or nothing was saved for this device
+    """
+    server = servers.get(alpaca_base_url)
+    if state is None or server is None:
+        return None
+    unique_id = server.unique_ids.get(f"{device_type}/{device_number}")
+    if not unique_id:
+        return None
+    try:
+        driver_version = getValueCached(alpaca_base_url, device_type, device_number, "driverversion", "", False)
+    except exporter_core.DeviceNotConnectedError:
+        return None
+    return state.identify(unique_id, driver_version)
+
+
+def serverIdentity(alpaca_base_url):
+    """
+    Identify an Alpaca server by the UniqueIDs of its devices, i.e. to find a server answering on several addresses.
+
+    Args:
+        alpaca_base_url: Base URL for Alpaca API
+
+    Returns:
+        frozenset: UniqueIDs of the server's configured devices, None if it lists none
+    """
+    unique_ids = {}
+    discoverDevices(alpaca_base_url, verbose=False, unique_ids=unique_ids)
+    return frozenset(unique_ids.values()) or None
+
+
+def renumberDevices(server, renumbered, attribute_scheduler=None):
+    """
+    Keep the state of devices the management API now lists under another device number.
+
+    Args:
+        server: ServerState of the Alpaca server
+        renumbered: List of (device_type, previous device_number, device_number)
+        attribute_scheduler: AttributeScheduler whose last polled values move with the devices (optional)
+    """
+    if not renumbered:
+        return
+    for device_type, previous_number, device_number in renumbered:
+        device_id = f"{device_type}/{previous_number}" if server.label is None else f"{server.label}/{device_type}/{previous_number}"
+        print(f"RENUMBERED: {device_id} is now {device_type}/{device_number}")
+    device_identity.move_device_state(server, renumbered)
+    prefixes = {(server.alpaca_base_url, t, p): (server.alpaca_base_url, t, n) for t, p, n in renumbered}
+    value_cache.remap(prefixes)
+    if attribute_scheduler is not None:
+        attribute_scheduler.remap(prefixes)
+
+
 def main():
     """Main entry point for the exporter application."""
+    global state
     parser = argparse.ArgumentParser(description="Export logs as prometheus metrics.")
     parser.add_argument("--port", type=int, help=f"port to expose metrics on, default: {constants.DEFAULT_PORT}")
-    parser.add_argument("--alpaca_base_url", type=str, help=f"base alpaca v1 api, default: {constants.DEFAULT_ALPACA_BASE_URL}")
+    parser.add_argument("--alpaca_base_url", type=str, action="append", help=f"base alpaca v1 api, repeat to monitor several servers, default: {constants.DEFAULT_ALPACA_BASE_URL}")
     parser.add_argument("--refresh_rate", type=int, help=f"seconds between refreshing metrics, default: {constants.DEFAULT_REFRESH_RATE}")
     parser.add_argument("--discover", action="store_true", help="automatically discover all configured devices via Alpaca Management API")
+    parser.add_argument("--discover_servers", action="store_true", help="find alpaca servers on the local network with alpaca UDP discovery, requires --discover")
+    parser.add_argument(
+        "--discovery_interval", type=int, default=constants.DEFAULT_DISCOVERY_INTERVAL, help=f"seconds between device discoveries, default: {constants.DEFAULT_DISCOVERY_INTERVAL}"
+    )
+    parser.add_argument("--engine", type=str, choices=constants.ENGINES, default=constants.DEFAULT_ENGINE, help=f"collection engine, default: {constants.DEFAULT_ENGINE}")
+    parser.add_argument("--timeout", type=float, help=f"seconds to wait for an alpaca server to respond, default: {constants.DEFAULT_REQUEST_TIMEOUT}")
+    parser.add_argument(
+        "--log_level", type=str.upper, choices=log.LEVELS, default=log.DEFAULT_LEVEL, help=f"log level, SIGUSR1 toggles TRACE at runtime, default: {log.DEFAULT_LEVEL}"
+    )
+    parser.add_argument(
+        "--state_file",
+        type=str,
+        default=constants.DEFAULT_STATE_FILE,
+        help=f"file to keep skip lists and connection status in across restarts, empty to disable, default: {constants.DEFAULT_STATE_FILE}",
+    )
+    parser.add_argument(
+        "--snapshot_file",
+        type=str,
+        default=constants.DEFAULT_SNAPSHOT_FILE,
+        help=f"file to serve last-known values from at startup, empty to disable, default: {constants.DEFAULT_SNAPSHOT_FILE}",
+    )
+    parser.add_argument("--dns_ttl", type=int, help=f"seconds a resolved alpaca server address is reused, 0 to disable, default: {constants.DNS_CACHE_TTL}")
+    parser.add_argument("--address_family", type=str, choices=list(resolver.FAMILIES), default="any", help="address family to resolve alpaca server names to, default: any")
+    parser.add_argument("--pool_maxsize", type=int, help=f"keep-alive connections pooled per alpaca server, default: {constants.DEFAULT_POOL_MAXSIZE}")
 
     # add args for each supported device type
     for device_type in constants.DEVICE_TYPES:
@@ -175,8 +350,12 @@ def main():
     # treat args parsed as a dictionary
     args = vars(parser.parse_args())
 
+    log.configure(args["log_level"])
+    log.install_trace_toggle()
+
     # Parse configuration with defaults
-    alpaca_base_url, refresh_rate, port = exporter_core.parse_config_defaults(args)
+    _, refresh_rate, port = exporter_core.parse_config_defaults(args)
+    alpaca_base_urls = exporter_core.parse_alpaca_base_urls(args)
 
     # Check if using discovery mode
     try:
@@ -185,76 +364,181 @@ def main():
         print(f"ERROR: {e}")
         exit(1)
 
+    # Pooled keep-alive HTTP sessions, one per alpaca server
+    transport.configure(maxsize=args.get("pool_maxsize"), request_timeout=args.get("timeout"), dns_ttl=args.get("dns_ttl"), address_family=args.get("address_family"))
+
     # Load device configurations
     loadConfigurations("config/")
 
-    # Start Prometheus HTTP server
-    metrics_utility.metrics(port)
-
-    # Initialize state tracking
-    all_known_devices = {}  # Tracks all devices ever seen (for discovery mode)
-    device_status = {}  # Tracks connection status: "device_type/device_number" -> True/False/None
-    metrics_previous = []
+    # Device gauges are kept in an array-backed collector, rendered at scrape time
+    device_collector.enable()
+    request_counters.enable()
+    resolver.enable()
+
+    # Last-known values are served until devices are polled again
+    warm = None
+    if args.get("snapshot_file"):
+        warm = warm_start.enable(args["snapshot_file"])
+        restored = warm.restore(device_collector.collector)
+        if restored:
+            print(f"RESTORED: {restored} series from {args['snapshot_file']}")
+
+    # Start Prometheus HTTP server, serves the exposition rendered once per cycle
+    exposition.serve(port)
+
+    # Async engine polls devices concurrently, serial engine runs them one at a time
+    engine = None
+    if args.get("engine") == "async":
+        engine = async_engine.AsyncEngine(max_workers=args.get("pool_maxsize") or constants.DEFAULT_POOL_MAXSIZE)
+
+    discovery_interval = args.get("discovery_interval") or constants.DEFAULT_DISCOVERY_INTERVAL
+
+    # Servers on the network answering alpaca UDP discovery, searched for again in the background
+    server_finder = None
+    if args.get("discover_servers"):
+        server_finder = server_discovery.ServerDiscovery(server_discovery.discover_servers, discovery_interval, known=alpaca_base_urls, identify_fn=serverIdentity)
+        server_finder.start()
+
+    # Initialize state tracking, one state per alpaca server.
+    # The 'server' label is only needed to tell several servers apart.
+    multi_server = len(alpaca_base_urls) > 1 or server_finder is not None
+    for alpaca_base_url in alpaca_base_urls:
+        if multi_server:
+            servers[alpaca_base_url] = exporter_core.ServerState(alpaca_base_url, transport.server_of(alpaca_base_url))
+        else:
+            servers[alpaca_base_url] = exporter_core.ServerState(alpaca_base_url, None, skip_device_attribute)
+    if server_finder is not None:
+        for alpaca_base_url in server_finder.servers:
+            servers.setdefault(alpaca_base_url, exporter_core.ServerState(alpaca_base_url, transport.server_of(alpaca_base_url)))
+
+    # Skip lists and connection status of the last run
+    if args.get("state_file"):
+        state = state_store.StateStore(args["state_file"])
+        if state.load(servers):
+            print(f"RESTORED: state from {args['state_file']}")
+        if not use_discovery:
+            # UniqueIDs identify devices, discovery mode records them on every discovery
+            for server in servers.values():
+                discoverDevices(server.alpaca_base_url, verbose=False, unique_ids=server.unique_ids)
+    # Discovery runs in the background, cycles read the last discovered devices
+    if use_discovery:
+        for server in servers.values():
+            server.discovery = discovery.DeviceDiscovery(functools.partial(fetchConfiguredDevices, server.alpaca_base_url), discovery_interval)
+            server.discovery.start()
+
+    # series owned by each device, stale ones are removed per device
+    series_index = metric_index.MetricIndex()
+
+    # Each attribute is polled on its own interval, default is the refresh rate
+    attribute_scheduler = scheduler.AttributeScheduler(int(refresh_rate))
+
+    def process(server, device_type, device_number):
+        # Process this device and collect metrics
+        # A failing device must not take down the cycle of every other device, None keeps its series as is
+        try:
+            device_metrics = exporter_core.process_device(
+                device_type,
+                device_number,
+                configurations,
+                server.alpaca_base_url,
+                use_discovery,
+                server.devices,
+                server.device_status,
+                server.skip_device_attribute,
+                getValue,
+                getValueCached,
+                get_device_state_fn=getDeviceState,
+                scheduler=attribute_scheduler,
+                invalidate_cache_fn=invalidateDevice,
+                server_label=server.label,
+                plans=server.plans,
+                restore_skips_fn=restoreSkips,
+            )
+        except Exception as e:
+            print(f"EXCEPTION: {device_type}/{device_number}: {e}")
+            device_metrics = None
+        return device_metrics
 
     # Main execution loop - handles both startup and runtime uniformly
     while True:
+        attribute_scheduler.begin_pass()
         try:
-            # Get current device list based on mode
-            if use_discovery:
-                # Discovery mode: query Alpaca Management API
-                devices = discoverDevices(alpaca_base_url, verbose=False)
-
-                # Track newly discovered devices
-                for device_type in devices.keys():
-                    if device_type not in all_known_devices:
-                        all_known_devices[device_type] = []
-                    for device_number in devices[device_type]:
-                        if device_number not in all_known_devices[device_type]:
-                            all_known_devices[device_type].append(device_number)
-                            print(f"NEW DEVICE: {device_type}/{device_number} added to monitoring")
+            # Servers found on the network since the last cycle, their devices are discovered in the background
+            if server_finder is not None:
+                for alpaca_base_url in server_finder.servers:
+                    if alpaca_base_url not in servers:
+                        server = exporter_core.ServerState(alpaca_base_url, transport.server_of(alpaca_base_url))
+                        server.discovery = discovery.DeviceDiscovery(functools.partial(fetchConfiguredDevices, alpaca_base_url), discovery_interval)
+                        server.discovery.start(wait=False)
+                        servers[alpaca_base_url] = server
+
+            device_keys = []
+            for server in servers.values():
+                # Get current device list based on mode
+                if use_discovery:
+                    # Discovery mode: devices found by the background discovery
+                    devices, unique_ids = server.discovery.current
+                    if unique_ids is not server.unique_ids:
+                        renumberDevices(server, device_identity.find_renumbered(server.unique_ids, unique_ids), attribute_scheduler)
+                        server.unique_ids = unique_ids
+                    server.devices = devices
+
+                    # Track newly discovered devices
+                    for device_type in server.devices.keys():
+                        if device_type not in server.all_known_devices:
+                            server.all_known_devices[device_type] = []
+                        for device_number in server.devices[device_type]:
+                            if device_number not in server.all_known_devices[device_type]:
+                                server.all_known_devices[device_type].append(device_number)
+                                device_id = f"{device_type}/{device_number}" if server.label is None else f"{server.label}/{device_type}/{device_number}"
+                                print(f"NEW DEVICE: {device_id} added to monitoring")
+                else:
+                    # Manual mode: use configured device list, the same on every server
+                    server.devices = exporter_core.get_manual_device_list(args)
+
+                    # In manual mode, all configured devices are "known"
+                    if not server.all_known_devices:
+                        server.all_known_devices = {dt: server.devices[dt].copy() for dt in server.devices.keys()}
+
+                # Process devices based on mode
+                device_list_to_process = server.all_known_devices if use_discovery else server.devices
+
+                device_keys.extend((server, device_type, device_number) for device_type in device_list_to_process.keys() for device_number in device_list_to_process[device_type])
+
+            # devices of all servers are processed together
+            if engine is not None:
+                results = engine.run(device_keys, process)
             else:
-                # Manual mode: use configured device list
-                devices = exporter_core.get_manual_device_list(args)
-
-                # In manual mode, all configured devices are "known"
-                if not all_known_devices:
-                    all_known_devices = {dt: devices[dt].copy() for dt in devices.keys()}
-
-            metrics_current = []
-
-            # Process devices based on mode
-            device_list_to_process = all_known_devices if use_discovery else devices
-
-            for device_type in device_list_to_process.keys():
-                device_numbers = all_known_devices[device_type] if use_discovery else devices[device_type]
-
-                for device_number in device_numbers:
-                    # Process this device and collect metrics
-                    device_metrics = exporter_core.process_device(
-                        device_type,
-                        device_number,
-                        configurations,
-                        alpaca_base_url,
-                        use_discovery,
-                        devices,
-                        device_status,
-                        skip_device_attribute,
-                        getValue,
-                        getValueCached,
-                    )
-                    metrics_current.extend(device_metrics)
+                results = [process(server, device_type, device_number) for server, device_type, device_number in device_keys]
 
-        except Exception as e:
-            print(f"EXCEPTION: {e}")
+            # Clean up stale metrics of each device that was processed
+            for (server, device_type, device_number), device_metrics in zip(device_keys, results, strict=True):
+                series_index.update((server.alpaca_base_url, device_type, device_number), device_metrics)
+
+            # restored values nobody reported in the first cycle are gone
+            if warm is not None and warm.restored:
+                warm.settle(device_collector.collector, series_index.series())
 
-        # Clean up stale metrics
-        try:
-            exporter_core.cleanup_stale_metrics(metrics_previous, metrics_current)
-            metrics_previous = metrics_current
         except Exception as e:
             print(f"EXCEPTION: {e}")
 
-        time.sleep(int(refresh_rate))
+        # Scrapes switch to this cycle's values all at once, restored values included
+        device_collector.publish()
+        transport.flush_connection_counts()
+        request_counters.flush()
+        exposition.refresh()
+
+        # Keep the values for a warm start of the next run
+        if warm is not None:
+            warm.save(device_collector.collector)
+
+        # Keep state for the next run, only written when it changed
+        if state is not None:
+            state.save(servers)
+
+        # Sleep until the next attribute is due
+        attribute_scheduler.end_pass()
+        time.sleep(attribute_scheduler.seconds_until_next_due(int(refresh_rate)))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+"""
+Asyncio collection engine.
+
+Polls every device concurrently while keeping the order of calls within a
+device.  Each device is still processed by exporter_core.process_device, so
+the connection state machine and skip list behave exactly as in the serial
+loop; only devices run in parallel.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncEngine:
+    """Runs one collection cycle with all devices in flight at once."""
+
+    def __init__(self, max_workers=None):
+        """
+        Args:
+            max_workers: Maximum devices polled at the same time (None for executor default)
+        """
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="alpaca-device")
+
+    def run(self, device_keys, process_fn):
+        """
+        Process all devices concurrently and wait for every one to finish.
+
+        Args:
+            device_keys: List of device key tuples, e.g. (device_type, device_number)
+            process_fn: Called as process_fn(*device_key) for each device
+
+        Returns:
+            list: Result of process_fn for each device, in device_keys order
+        """
+        return self.loop.run_until_complete(self._gather(device_keys, process_fn))
+
+    async def _gather(self, device_keys, process_fn):
+        tasks = [self.loop.run_in_executor(self.executor, process_fn, *device_key) for device_key in device_keys]
+        return await asyncio.gather(*tasks)
+
+    def close(self):
+        """Stop worker threads and close the event loop."""
+        self.executor.shutdown(wait=True)
+        self.loop.close()
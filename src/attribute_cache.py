@@ -0,0 +1,114 @@
+"""
+Attribute value cache with a TTL per entry.
+
+Unlike a single TTLCache, every cached attribute carries its own time to live
+(config key 'cache_ttl'), so near-static values such as 'siteelevation' can be
+kept for hours while 'coolerpower' expires after seconds.
+"""
+
+import threading
+import time
+
+import constants
+
+
+class AttributeCache:
+    """Maps an attribute key to its value until the value's TTL expires."""
+
+    def __init__(self, maxsize=constants.CACHE_MAXSIZE):
+        """
+        Args:
+            maxsize: Maximum number of entries kept
+        """
+        self.maxsize = maxsize
+        # key -> (expires_at, value)
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl, fetch_fn):
+        """
+        Get a cached value, calling fetch_fn when it is missing or expired.
+
+        Failed fetches (None) are not cached so they are retried on the next call.
+
+        Args:
+            key: Hashable attribute key
+            ttl: Seconds the fetched value stays valid
+            fetch_fn: Called with no arguments to get a fresh value
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+        value = fetch_fn()
+        if value is not None:
+            self.put(key, ttl, value, now)
+        return value
+
+    def put(self, key, ttl, value, now=None):
+        """
+        Store a value.
+
+        Args:
+            key: Hashable attribute key
+            ttl: Seconds the value stays valid
+            value: Value to store
+            now: time.monotonic() of the fetch (defaults to current time)
+        """
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            self.entries.pop(key, None)
+            if len(self.entries) >= self.maxsize:
+                self._evict(now)
+            self.entries[key] = (now + ttl, value)
+
+    def _evict(self, now):
+        # drop expired entries, then the oldest ones if still full
+        for key in [k for k, (expires_at, _) in self.entries.items() if expires_at <= now]:
+            del self.entries[key]
+        while len(self.entries) >= self.maxsize:
+            del self.entries[next(iter(self.entries))]
+
+    def invalidate(self, prefix):
+        """
+        Remove every entry whose key starts with prefix.
+
+        Args:
+            prefix: Leading key elements, i.e. (alpaca_base_url, device_type, device_number) for one device
+        """
+        n = len(prefix)
+        with self._lock:
+            for key in [k for k in self.entries if k[:n] == prefix]:
+                del self.entries[key]
+
+    def remap(self, prefixes):
+        """
+        Move entries to a new key prefix, i.e. when a device got a new device number.
+
+        Entries already under a new prefix belonged to another device and are removed.
+
+        Args:
+            prefixes: Dict of old prefix -> new prefix, all of the same length
+        """
+        if not prefixes:
+            return
+        n = len(next(iter(prefixes)))
+        new_prefixes = set(prefixes.values())
+        with self._lock:
+            moved = {}
+            for key in [k for k in self.entries if k[:n] in prefixes]:
+                moved[prefixes[key[:n]] + key[n:]] = self.entries.pop(key)
+            for key in [k for k in self.entries if k[:n] in new_prefixes]:
+                del self.entries[key]
+            self.entries.update(moved)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self.entries.clear()
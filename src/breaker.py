@@ -0,0 +1,108 @@
+"""
+Circuit breaker for unreachable Alpaca servers.
+
+After consecutive connection failures the breaker opens and requests to that
+server fail immediately instead of waiting for a connection timeout.  While
+open, one probe request is let through per backoff interval; the interval
+doubles (with jitter) after every failed probe and the breaker closes again on
+the first successful request.
+"""
+
+import random
+import threading
+import time
+
+import constants
+
+_random = random.SystemRandom()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a server whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Connection failure tracking for one Alpaca server."""
+
+    def __init__(
+        self,
+        failure_threshold=constants.BREAKER_FAILURE_THRESHOLD,
+        base_backoff=constants.BREAKER_BASE_BACKOFF,
+        max_backoff=constants.BREAKER_MAX_BACKOFF,
+        jitter=constants.BREAKER_JITTER,
+    ):
+        """
+        Args:
+            failure_threshold: Consecutive connection failures that open the breaker
+            base_backoff: Seconds until the first probe after opening
+            max_backoff: Upper bound for the backoff in seconds
+            jitter: Fraction the backoff is randomly varied by (0.2 = +/- 20%)
+        """
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.failures = 0
+        self.backoff = base_backoff
+        # time.monotonic() when the next probe is allowed, None while closed
+        self.open_until = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.open_until is not None
+
+    def allow(self):
+        """
+        Check if a request may be sent.
+
+        Returns:
+            bool: True when closed, or when open and this request is the probe
+        """
+        with self._lock:
+            if self.open_until is None:
+                return True
+            if self.probing or time.monotonic() < self.open_until:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        """
+        Reset after a successful request.
+
+        Returns:
+            bool: True if this closed an open breaker
+        """
+        with self._lock:
+            was_open = self.open_until is not None
+            self.failures = 0
+            self.backoff = self.base_backoff
+            self.open_until = None
+            self.probing = False
+            return was_open
+
+    def record_failure(self):
+        """
+        Count a connection failure.
+
+        Returns:
+            bool: True if this opened a closed breaker
+        """
+        with self._lock:
+            self.failures += 1
+            if self.open_until is not None:
+                # failed probe, wait longer before the next one
+                self.backoff = min(self.backoff * 2, self.max_backoff)
+                self.probing = False
+                self.open_until = time.monotonic() + self._jittered(self.backoff)
+                return False
+            if self.failures >= self.failure_threshold:
+                self.backoff = self.base_backoff
+                self.open_until = time.monotonic() + self._jittered(self.backoff)
+                return True
+            return False
+
+    def _jittered(self, seconds):
+        return seconds * _random.uniform(1 - self.jitter, 1 + self.jitter)
@@ -24,3 +24,71 @@ DEVICE_TYPES = [
 DEFAULT_ALPACA_BASE_URL = "http://127.0.0.1:11111/api/v1"
 DEFAULT_REFRESH_RATE = 5
 DEFAULT_PORT = 9876
+
+# HTTP connection pool defaults (per Alpaca server)
+DEFAULT_POOL_CONNECTIONS = 1
+DEFAULT_POOL_MAXSIZE = 10
+
+# Collection engines: "serial" polls one device at a time, "async" polls devices concurrently
+ENGINES = ["serial", "async"]
+DEFAULT_ENGINE = "serial"
+
+# Minimum 'interfaceversion' per device type that provides the 'devicestate' property (ASCOM Platform 7).
+# Devices reporting at least this version are read with one 'devicestate' call per cycle.
+DEVICESTATE_MIN_INTERFACE_VERSION = {
+    "camera": 4,
+    "covercalibrator": 2,
+    "dome": 3,
+    "filterwheel": 3,
+    "focuser": 4,
+    "observingconditions": 2,
+    "rotator": 4,
+    "safetymonitor": 3,
+    "switch": 3,
+    "telescope": 4,
+}
+
+# Alpaca UDP discovery of servers on the local network, and seconds to wait for responses
+ALPACA_DISCOVERY_PORT = 32227
+ALPACA_DISCOVERY_MESSAGE = b"alpacadiscovery1"
+SERVER_DISCOVERY_TIMEOUT = 2
+
+# Seconds between device discoveries via the Management API (discovery mode)
+DEFAULT_DISCOVERY_INTERVAL = 60
+# Seconds until a failed discovery is tried again
+DISCOVERY_RETRY_INTERVAL = 5
+
+# Shortest allowed per-attribute poll interval in seconds
+MIN_POLL_INTERVAL = 1
+
+# Attribute cache: TTL in seconds for 'cached: 1' entries without 'cache_ttl', and max entries kept
+DEFAULT_CACHE_TTL = 60
+CACHE_MAXSIZE = 1024
+
+# Seconds a resolved Alpaca server address is reused for new connections
+DNS_CACHE_TTL = 300
+
+# Seconds to wait for an Alpaca server to connect / respond
+DEFAULT_REQUEST_TIMEOUT = 5
+
+# Circuit breaker per Alpaca server: opens after this many consecutive connection failures,
+# then allows one probe per backoff interval (doubling up to the max, with +/- jitter)
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_BASE_BACKOFF = 5
+BREAKER_MAX_BACKOFF = 300
+BREAKER_JITTER = 0.2
+
+# ASCOM error numbers
+ASCOM_NOT_IMPLEMENTED = 0x400
+ASCOM_NOT_CONNECTED = 0x407
+
+# Device gauge collector, value slots preallocated (grows as needed)
+COLLECTOR_INITIAL_SLOTS = 256
+
+# File exporter state (skip lists, connection status) is kept in across restarts
+DEFAULT_STATE_FILE = "alpaca-exporter-state.json"
+
+# File the last published device gauges are kept in, served at startup until devices are polled again,
+# and seconds between saving it
+DEFAULT_SNAPSHOT_FILE = "alpaca-exporter-snapshot.json"
+SNAPSHOT_SAVE_INTERVAL = 60
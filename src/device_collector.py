@@ -0,0 +1,200 @@
+"""
+Array-backed Prometheus collector for device gauges.
+
+Each series (metric name + label set) gets a slot in a preallocated array of
+doubles.  Planned attributes remember their slot, so updating a value in the
+collection loop is a plain array store.
+
+The slot arrays are the back buffer written during a cycle.  publish() renders
+them into an immutable snapshot once the cycle is complete and swaps it in with
+a single reference assignment; scrapes only read the current snapshot, so they
+never see a half-finished cycle and never wait on the polling threads.
+
+Until enable() is called, set_gauge() goes through metrics_utility as before.
+"""
+
+import threading
+from array import array
+
+import metrics_utility
+from prometheus_client.core import REGISTRY, Metric
+
+import constants
+import label_set
+
+# the DeviceCollector in use, None until enable() is called
+collector = None
+
+
+class DeviceCollector:
+    """
+    Custom collector holding device gauge values in slots.
+
+    Args:
+        capacity: Number of slots to preallocate
+    """
+
+    def __init__(self, capacity=constants.COLLECTOR_INITIAL_SLOTS):
+        self.values = array("d", bytes(8 * capacity))
+        # 1 if the slot holds a value to export
+        self.present = bytearray(capacity)
+        self.names = [None] * capacity
+        self.labels = [None] * capacity
+        # (metric_name, LabelSet) -> slot
+        self.slots = {}
+        self.free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        # metric families served to scrapes, replaced as a whole by publish()
+        self.snapshot = ()
+
+    def _grow(self):
+        capacity = len(self.values)
+        self.values.extend(array("d", bytes(8 * capacity)))
+        self.present.extend(bytearray(capacity))
+        self.names.extend([None] * capacity)
+        self.labels.extend([None] * capacity)
+        self.free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def slot(self, metric_name, labels):
+        """
+        Get the slot of a series, allocating one if needed.
+
+        Args:
+            metric_name: Metric name
+            labels: Labels dict or LabelSet
+
+        Returns:
+            int: Slot index
+        """
+        labels = label_set.intern_labels(labels)
+        key = (metric_name, labels)
+        with self._lock:
+            slot = self.slots.get(key)
+            if slot is None:
+                if not self.free:
+                    self._grow()
+                slot = self.free.pop()
+                self.slots[key] = slot
+                self.names[slot] = metric_name
+                self.labels[slot] = {k: str(v) for k, v in labels.items()}
+        return slot
+
+    def store(self, slot, value):
+        """
+        Store a value in a slot.  Values that are not numbers clear the slot.
+
+        Args:
+            slot: Slot index from slot()
+            value: New value
+        """
+        if isinstance(value, (int, float)):
+            self.values[slot] = value
+            self.present[slot] = 1
+        else:
+            self.present[slot] = 0
+
+    def release(self, metric_name, labels):
+        """
+        Remove a series and free its slot.
+
+        Args:
+            metric_name: Metric name
+            labels: Labels dict or LabelSet
+        """
+        key = (metric_name, label_set.intern_labels(labels))
+        with self._lock:
+            slot = self.slots.pop(key, None)
+            if slot is None:
+                return
+            self.present[slot] = 0
+            self.names[slot] = None
+            self.labels[slot] = None
+            self.free.append(slot)
+
+    def set(self, metric_name, value, labels):
+        """
+        Same as metrics_utility.set, None removes the series.
+
+        Args:
+            metric_name: Metric name
+            value: New value, None to remove the series
+            labels: Labels dict or LabelSet
+        """
+        if value is None:
+            self.release(metric_name, labels)
+        else:
+            self.store(self.slot(metric_name, labels), value)
+
+    def series(self):
+        """
+        Get every series holding a value.
+
+        Returns:
+            list: (metric_name, LabelSet, value) tuples
+        """
+        with self._lock:
+            return [(metric_name, labels, self.values[slot]) for (metric_name, labels), slot in self.slots.items() if self.present[slot]]
+
+    def describe(self):
+        # nothing to describe up front, keeps registration from calling collect()
+        return []
+
+    def publish(self):
+        """
+        Make the values written so far visible to scrapes.
+
+        Call once per collection cycle, after stale series are removed.
+        """
+        families = {}
+        with self._lock:
+            for slot, name in enumerate(self.names):
+                if name is None or not self.present[slot]:
+                    continue
+                family = families.get(name)
+                if family is None:
+                    family = families[name] = Metric(name, name, "gauge")
+                family.add_sample(name, self.labels[slot], self.values[slot])
+        # swap, scrapes in progress keep the snapshot they started with
+        self.snapshot = tuple(families.values())
+
+    def collect(self):
+        return self.snapshot
+
+
+def enable(registry=REGISTRY):
+    """
+    Serve device gauges from a DeviceCollector.
+
+    Args:
+        registry: Prometheus registry to register the collector with
+
+    Returns:
+        DeviceCollector: The collector now in use
+    """
+    global collector
+    collector = DeviceCollector()
+    registry.register(collector)
+    return collector
+
+
+def publish():
+    """
+    Publish the current cycle to scrapes, see DeviceCollector.publish.
+    """
+    if collector is not None:
+        collector.publish()
+
+
+def set_gauge(metric_name, value, labels):
+    """
+    Set a device gauge, None removes the series.
+
+    Args:
+        metric_name: Metric name
+        value: New value, None to remove the series
+        labels: Labels dict or LabelSet
+    """
+    if collector is None:
+        metrics_utility.set(metric_name, value, labels)
+    else:
+        collector.set(metric_name, value, labels)
@@ -0,0 +1,109 @@
+"""
+Device identity by UniqueID.
+
+Device numbers are only positions in the Alpaca server's configuration: when
+ASCOM Remote is reconfigured a device can show up under another number.  The
+UniqueID reported by the management API stays the same, so it is used to
+recognize a renumbered device and move its state (connection status, skip
+list, cached values) to the new number instead of treating it as a disconnect
+followed by a new device.
+"""
+
+
+def split_device_key(device_key):
+    """
+    Split a "device_type/device_number" key.
+
+    Args:
+        device_key: Device key, i.e. "camera/0"
+
+    Returns:
+        tuple: (device_type, device_number)
+    """
+    device_type, _, device_number = device_key.partition("/")
+    return device_type, int(device_number)
+
+
+def index_by_unique_id(unique_ids):
+    """
+    Build the identity index: where each device is found by its UniqueID.
+
+    UniqueIDs reported by more than one device can't identify a device and are left out.
+
+    Args:
+        unique_ids: "device_type/device_number" -> UniqueID
+
+    Returns:
+        dict: UniqueID -> "device_type/device_number"
+    """
+    index = {}
+    ambiguous = set()
+    for device_key, unique_id in unique_ids.items():
+        if unique_id in index:
+            ambiguous.add(unique_id)
+        index[unique_id] = device_key
+    for unique_id in ambiguous:
+        del index[unique_id]
+    return index
+
+
+def find_renumbered(previous_unique_ids, unique_ids):
+    """
+    Find devices now listed under another device number.
+
+    Args:
+        previous_unique_ids: "device_type/device_number" -> UniqueID of the previous discovery
+        unique_ids: "device_type/device_number" -> UniqueID of the current discovery
+
+    Returns:
+        list: (device_type, previous device_number, device_number) per renumbered device
+    """
+    previous = index_by_unique_id(previous_unique_ids)
+    renumbered = []
+    for unique_id, device_key in index_by_unique_id(unique_ids).items():
+        previous_key = previous.get(unique_id)
+        if previous_key is None or previous_key == device_key:
+            continue
+        previous_type, previous_number = split_device_key(previous_key)
+        device_type, device_number = split_device_key(device_key)
+        if previous_type == device_type:
+            renumbered.append((device_type, previous_number, device_number))
+    return sorted(renumbered)
+
+
+def move_device_state(server, renumbered):
+    """
+    Move per-device state of renumbered devices to their new device numbers.
+
+    All devices are moved at once, so devices swapping numbers keep their own
+    state.  A device number taken over by a renumbered device loses the state of
+    its previous device.  Plans are dropped since they carry the old number, they
+    are compiled again on the next cycle.
+
+    Args:
+        server: ServerState of the Alpaca server
+        renumbered: List of (device_type, previous device_number, device_number) from find_renumbered
+    """
+    moved = []
+    for device_type, previous_number, device_number in renumbered:
+        previous_key = f"{device_type}/{previous_number}"
+        status = server.device_status.pop(previous_key, None)
+        skip = server.skip_device_attribute.get(device_type, {}).pop(str(previous_number), None)
+        server.plans.pop(previous_key, None)
+        moved.append((device_type, device_number, status, skip))
+
+    for device_type, device_number, status, skip in moved:
+        device_key = f"{device_type}/{device_number}"
+        server.plans.pop(device_key, None)
+        if status is None:
+            server.device_status.pop(device_key, None)
+        else:
+            server.device_status[device_key] = status
+        if skip is None:
+            server.skip_device_attribute.get(device_type, {}).pop(str(device_number), None)
+        else:
+            server.skip_device_attribute.setdefault(device_type, {})[str(device_number)] = skip
+        # a known device under its new number, not a new device
+        known = server.all_known_devices.setdefault(device_type, [])
+        if device_number not in known:
+            known.append(device_number)
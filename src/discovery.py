@@ -0,0 +1,114 @@
+"""
+Background device discovery.
+
+Discovery queries the Alpaca Management API on its own interval in a
+background thread, so collection cycles don't wait for the management API.
+Cycles read the device set and UniqueIDs from DeviceDiscovery.current, which is
+only replaced (a single reference assignment) when the discovery result changes.
+A failed discovery keeps the last discovered devices and is retried sooner.
+"""
+
+import threading
+
+import constants
+import log
+
+logger = log.get_logger("discovery")
+
+
+def normalize(devices):
+    """
+    Get a device set in a form that compares equal regardless of order.
+
+    Args:
+        devices: Dict with device_type as key and list of device numbers as value
+
+    Returns:
+        dict: Same devices, device numbers sorted
+    """
+    return {device_type: sorted(device_numbers) for device_type, device_numbers in devices.items()}
+
+
+class DeviceDiscovery:
+    """
+    Keep the discovered devices of one Alpaca server up to date.
+
+    Args:
+        discover_fn: Called as discover_fn(verbose=..., unique_ids=...), returns the discovered devices dict
+            and records each device's UniqueID in unique_ids, None if discovery failed
+        interval: Seconds between discoveries
+        retry_interval: Seconds until a failed discovery is tried again
+    """
+
+    def __init__(self, discover_fn, interval, retry_interval=constants.DISCOVERY_RETRY_INTERVAL):
+        self.discover_fn = discover_fn
+        self.interval = interval
+        self.retry_interval = min(retry_interval, interval)
+        # True if the last discovery failed
+        self.failed = False
+        # (devices, unique_ids) read by collection cycles, replaced as a whole when it changes
+        self.current = ({}, {})
+        # incremented on every change
+        self.version = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self, verbose=False):
+        """
+        Discover devices and swap in the new device set if it changed.
+
+        Args:
+            verbose: If True, discovery prints every device found
+
+        Returns:
+            bool: True if the device set changed
+        """
+        unique_ids = {}
+        devices = self.discover_fn(verbose=verbose, unique_ids=unique_ids)
+        self.failed = devices is None
+        if self.failed:
+            # keep the devices of the last discovery, not knowing is not the same as no devices
+            logger.debug("discovery failed, keeping %s", self.current[0])
+            return False
+        devices = normalize(devices)
+        if (devices, unique_ids) == self.current:
+            return False
+        logger.debug("discovered devices changed: %s", devices)
+        self.current = (devices, unique_ids)
+        self.version += 1
+        return True
+
+    @property
+    def devices(self):
+        """Discovered devices, key is 'device type', value is sorted array of device numbers"""
+        return self.current[0]
+
+    @property
+    def unique_ids(self):
+        """UniqueID of each discovered device, key is "device_type/device_number" """
+        return self.current[1]
+
+    def start(self, wait=True):
+        """
+        Discover devices once, then keep discovering in a background thread.
+
+        Args:
+            wait: If True, the first discovery is done before returning, else it is done by the background thread
+        """
+        if wait:
+            self.refresh(verbose=True)
+        self._thread = threading.Thread(target=self._run, args=(not wait,), name="alpaca-discovery", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, first):
+        # discover_fn handles its own errors, a failed discovery returns None
+        if first:
+            self.refresh(verbose=True)
+        while not self._stop.wait(self.retry_interval if self.failed else self.interval):
+            self.refresh()
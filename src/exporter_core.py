@@ -6,11 +6,58 @@ This module contains the main execution logic that was previously in the
 if __name__ == "__main__" block, now refactored into testable functions.
 """
 
-import copy
+import functools
 
 import metrics_utility
 
 import constants
+import device_collector
+import label_set
+import log
+import request_counters
+
+logger = log.get_logger("exporter_core")
+
+
+class DeviceNotConnectedError(Exception):
+    """
+    Raised by get value functions when a device can't be reached or reports NotConnected.
+
+    process_device stops collecting the device for this cycle.  Whether it is still
+    connected is decided by the next cycle's 'name' check.
+    """
+
+
+class ServerState:
+    """
+    Tracking state of one Alpaca server.
+
+    Device numbers are only unique per server, so each server monitored gets its own
+    device lists, connection status, skip list and collection plans.  Configuration, the scheduler and
+    the value cache are shared by all servers.
+
+    Args:
+        alpaca_base_url: Base URL for Alpaca API
+        label: Value of the 'server' label on this server's metrics, None to omit the label
+        skip_device_attribute: Skip list tracking dict to use (optional, a new one is created)
+    """
+
+    def __init__(self, alpaca_base_url, label=None, skip_device_attribute=None):
+        self.alpaca_base_url = alpaca_base_url
+        self.label = label
+        # devices from the last discovery or command line, key is 'device type', value is array of device numbers
+        self.devices = {}
+        # all devices ever seen (for discovery mode)
+        self.all_known_devices = {}
+        # "device_type/device_number" -> True/False/None
+        self.device_status = {}
+        self.skip_device_attribute = {} if skip_device_attribute is None else skip_device_attribute
+        # "device_type/device_number" -> UniqueID from the management API
+        self.unique_ids = {}
+        # DeviceDiscovery keeping 'devices' up to date (discovery mode only)
+        self.discovery = None
+        # "device_type/device_number" -> DevicePlan of the current connection
+        self.plans = {}
 
 
 def parse_config_defaults(args):
@@ -21,11 +68,10 @@ def parse_config_defaults(args):
         args: Dictionary of parsed command line arguments
 
     Returns:
-        tuple: (alpaca_base_url, refresh_rate, port)
+        tuple: (alpaca_base_url, refresh_rate, port), alpaca_base_url is None if only discovered servers are used
     """
-    alpaca_base_url = constants.DEFAULT_ALPACA_BASE_URL
-    if args.get("alpaca_base_url"):
-        alpaca_base_url = args["alpaca_base_url"].rstrip("/")
+    alpaca_base_urls = parse_alpaca_base_urls(args)
+    alpaca_base_url = alpaca_base_urls[0] if alpaca_base_urls else None
 
     refresh_rate = constants.DEFAULT_REFRESH_RATE
     if args.get("refresh_rate"):
@@ -38,6 +84,56 @@ def parse_config_defaults(args):
     return alpaca_base_url, refresh_rate, port
 
 
+def parse_alpaca_base_urls(args):
+    """
+    Extract the Alpaca server base URLs from args.
+
+    '--alpaca_base_url' may be given several times to monitor several servers.
+    With '--discover_servers' there is no default, servers found on the network are used.
+
+    Args:
+        args: Dictionary of parsed command line arguments
+
+    Returns:
+        list: Base URLs without trailing '/', duplicates removed, in the order given
+    """
+    urls = args.get("alpaca_base_url")
+    if not urls:
+        if args.get("discover_servers"):
+            return []
+        urls = [constants.DEFAULT_ALPACA_BASE_URL]
+    if isinstance(urls, str):
+        urls = [urls]
+
+    alpaca_base_urls = []
+    for url in urls:
+        alpaca_base_url = url.rstrip("/")
+        if alpaca_base_url not in alpaca_base_urls:
+            alpaca_base_urls.append(alpaca_base_url)
+    return alpaca_base_urls
+
+
+def device_labels(device_type, device_number, server_label=None):
+    """
+    Build the base labels identifying a device.
+
+    Args:
+        device_type: Type of device
+        device_number: Device number
+        server_label: Value of the 'server' label, None to omit it (single server)
+
+    Returns:
+        dict: Labels for the device
+    """
+    labels = {
+        "device_type": device_type,
+        "device_number": device_number,
+    }
+    if server_label is not None:
+        labels["server"] = server_label
+    return labels
+
+
 def is_discover_mode(args):
     """
     Check if running in discovery mode and validate configuration.
@@ -49,7 +145,7 @@ def is_discover_mode(args):
         bool: True if using discovery mode, False if using manual mode
 
     Raises:
-        ValueError: If both modes specified or neither mode specified
+        ValueError: If both modes specified, neither mode specified, or servers are discovered without device discovery
     """
     use_discovery = args.get("discover")
     has_explicit_devices = any(args.get(dt) for dt in constants.DEVICE_TYPES)
@@ -63,6 +159,10 @@ def is_discover_mode(args):
         msg = "Must specify either --discover or at least one device. Usage: '--discover' OR explicit devices (e.g., '--telescope 0 --camera 0')"
         raise ValueError(msg)
 
+    if args.get("discover_servers") and not use_discovery:
+        msg = "--discover_servers requires --discover, devices of servers found on the network are discovered too"
+        raise ValueError(msg)
+
     return use_discovery
 
 
@@ -83,81 +183,448 @@ def get_manual_device_list(args):
     return devices
 
 
-def create_device_labels(labels, name, alpaca_base_url, device_type, device_number, label_configs, querystr, get_value_fn, get_value_cached_fn):
+def attribute_url(alpaca_base_url, device_type, device_number, attribute, querystr=""):
     """
-    Create labels for a device from configuration.
+    Build the request URL of a device attribute.
 
     Args:
-        labels: Base labels dict to update
-        name: Device name
         alpaca_base_url: Base URL for Alpaca API
         device_type: Type of device
         device_number: Device number
+        attribute: ASCOM attribute name
+        querystr: Query string for device
+
+    Returns:
+        str: The request URL
+    """
+    return f"{alpaca_base_url}/{device_type}/{device_number}/{attribute}?{querystr}"
+
+
+def cache_ttl_of(config):
+    """
+    Get the cache TTL for a label or metric configuration entry.
+
+    'cache_ttl' is the TTL in seconds.  The legacy 'cached: 1' flag without
+    'cache_ttl' uses the default TTL.
+
+    Args:
+        config: Configuration dict
+
+    Returns:
+        int: TTL in seconds, 0 if the attribute is not cached
+    """
+    if "cache_ttl" in config:
+        return config["cache_ttl"]
+    if "cached" in config and config["cached"] > 0:
+        return constants.DEFAULT_CACHE_TTL
+    return 0
+
+
+class PlannedAttribute:
+    """
+    A label or metric attribute resolved from configuration.
+
+    Args:
+        alpaca_name: ASCOM attribute name
+        name: Label name or full metric name
+        key: Scheduler key
+        interval: Seconds between polls, None without a scheduler
+        fetch: Function returning the attribute value
+        url: Request URL of the attribute
+    """
+
+    __slots__ = ("alpaca_name", "fetch", "interval", "key", "last_value", "name", "slot", "slot_labels", "url")
+
+    def __init__(self, alpaca_name, name, key, interval, fetch, url):
+        self.alpaca_name = alpaca_name
+        self.name = name
+        self.key = key
+        self.interval = interval
+        self.fetch = fetch
+        self.url = url
+        # DeviceCollector slot of the metric, valid while labels are slot_labels
+        self.slot = None
+        self.slot_labels = None
+        # value last written for slot_labels, None if nothing written
+        self.last_value = None
+
+
+def plan_attribute(config, name, alpaca_base_url, device_type, device_number, *, querystr, get_value_fn, get_value_cached_fn, scheduler=None):
+    """
+    Resolve a label or metric configuration entry into a PlannedAttribute.
+
+    Args:
+        config: Label or metric configuration entry
+        name: Label name or full metric name
+        alpaca_base_url: Base URL for Alpaca API
+        device_type: Type of device
+        device_number: Device number
+        querystr: Query string for device
+        get_value_fn: Function to get device values, also given the attribute's 'request_url'
+        get_value_cached_fn: Function to get cached device values, also given the attribute's 'request_url'
+        scheduler: AttributeScheduler, used to resolve the poll interval (optional)
+
+    Returns:
+        PlannedAttribute: The resolved attribute
+    """
+    alpaca_name = config["alpaca_name"]
+    # built once here instead of on every request
+    url = attribute_url(alpaca_base_url, device_type, device_number, alpaca_name, querystr)
+    ttl = cache_ttl_of(config)
+    if ttl > 0:
+        fetch = functools.partial(get_value_cached_fn, alpaca_base_url, device_type, device_number, alpaca_name, querystr, ttl=ttl, request_url=url)
+    else:
+        fetch = functools.partial(get_value_fn, alpaca_base_url, device_type, device_number, alpaca_name, querystr, request_url=url)
+
+    interval = None if scheduler is None else scheduler.interval_of(config)
+    return PlannedAttribute(alpaca_name, name, (alpaca_base_url, device_type, device_number, alpaca_name, querystr), interval, fetch, url)
+
+
+def fetch_planned(attribute, scheduler=None):
+    """
+    Get the value of a planned attribute.
+
+    Args:
+        attribute: PlannedAttribute
+        scheduler: AttributeScheduler, if set the attribute is only polled when due
+
+    Returns:
+        The attribute value, None if unavailable
+    """
+    if scheduler is None:
+        return attribute.fetch()
+    return scheduler.fetch(attribute.key, attribute.interval, attribute.fetch)
+
+
+def plan_labels(label_configs, alpaca_base_url, device_type, device_number, *, querystr, get_value_fn, get_value_cached_fn, scheduler=None):
+    """
+    Resolve label configurations into PlannedAttributes.
+
+    Args:
         label_configs: List of label configurations
-        querystr: Query string for device (e.g. "id=0" for switches)
+        alpaca_base_url: Base URL for Alpaca API
+        device_type: Type of device
+        device_number: Device number
+        querystr: Query string for device
         get_value_fn: Function to get device values
         get_value_cached_fn: Function to get cached device values
+        scheduler: AttributeScheduler (optional)
+
+    Returns:
+        list: PlannedAttribute for each label
     """
+    planned = []
     for l in label_configs:
-        alpaca_name = l["alpaca_name"]
-        label_name = alpaca_name
-        if "label_name" in l:
-            label_name = l["label_name"]
+        label_name = l.get("label_name", l["alpaca_name"])
+        planned.append(
+            plan_attribute(
+                l,
+                label_name,
+                alpaca_base_url,
+                device_type,
+                device_number,
+                querystr=querystr,
+                get_value_fn=get_value_fn,
+                get_value_cached_fn=get_value_cached_fn,
+                scheduler=scheduler,
+            )
+        )
+    return planned
+
+
+def plan_metrics(metric_configs, metric_prefix, alpaca_base_url, device_type, device_number, *, querystr, get_value_fn, get_value_cached_fn, scheduler=None):
+    """
+    Resolve metric configurations into PlannedAttributes.
 
-        if alpaca_name == "name":
+    Args:
+        metric_configs: List of metric configurations
+        metric_prefix: Prefix for metric names
+        alpaca_base_url: Base URL for Alpaca API
+        device_type: Type of device
+        device_number: Device number
+        querystr: Query string for device
+        get_value_fn: Function to get device values
+        get_value_cached_fn: Function to get cached device values
+        scheduler: AttributeScheduler (optional)
+
+    Returns:
+        list: PlannedAttribute for each metric
+    """
+    planned = []
+    for m in metric_configs:
+        metric_name = f"{metric_prefix}{m.get('metric_name', m['alpaca_name'])}"
+        planned.append(
+            plan_attribute(
+                m,
+                metric_name,
+                alpaca_base_url,
+                device_type,
+                device_number,
+                querystr=querystr,
+                get_value_fn=get_value_fn,
+                get_value_cached_fn=get_value_cached_fn,
+                scheduler=scheduler,
+            )
+        )
+    return planned
+
+
+def apply_planned_labels(labels, name, planned, scheduler=None):
+    """
+    Fetch planned labels and add them to labels.
+
+    Args:
+        labels: Labels dict to update
+        name: Device name, used for the 'name' attribute
+        planned: List of PlannedAttribute
+        scheduler: AttributeScheduler (optional)
+    """
+    for attribute in planned:
+        if attribute.alpaca_name == "name":
             # already pulled this early on
             label_value = name
-        elif "cached" in l and l["cached"] > 0:
-            label_value = get_value_cached_fn(alpaca_base_url, device_type, device_number, alpaca_name, querystr)
         else:
-            label_value = get_value_fn(alpaca_base_url, device_type, device_number, alpaca_name, querystr)
+            label_value = fetch_planned(attribute, scheduler)
 
-        if label_name and label_value:
-            labels[label_name] = label_value
+        if attribute.name and label_value:
+            labels[attribute.name] = label_value
 
 
-def collect_device_metrics(labels, configurations, device_type, metric_prefix, alpaca_base_url, device_number, querystr, get_value_fn, get_value_cached_fn):
+def collect_planned_metrics(labels, planned, device_state=None, scheduler=None):
     """
-    Collect metrics for a device from configuration.
+    Fetch planned metrics and set them.
 
     Args:
         labels: Labels dict for the device
+        planned: List of PlannedAttribute
+        device_state: Values from 'devicestate' (see parse_device_state), None to fetch every attribute
+        scheduler: AttributeScheduler (optional)
+
+    Returns:
+        list: List of [metric_name, labels] tuples collected
+    """
+    metrics_collected = []
+    # one shared immutable label set for every sample of this group
+    labels = label_set.intern_labels(labels)
+    collector = device_collector.collector
+
+    for attribute in planned:
+        if device_state is not None and attribute.alpaca_name in device_state:
+            # already fetched in bulk this cycle
+            metric_value = device_state[attribute.alpaca_name]
+        else:
+            metric_value = fetch_planned(attribute, scheduler)
+
+        # no value, not collected.  an existing series is removed as stale and
+        # its slot freed, the next value gets a new one.
+        if not isinstance(metric_value, (int, float)):
+            attribute.last_value = None
+            attribute.slot = None
+            attribute.slot_labels = None
+            continue
+
+        # same labels as last time (interned), same series and slot
+        if attribute.slot_labels is not labels:
+            attribute.slot = None if collector is None else collector.slot(attribute.name, labels)
+            attribute.slot_labels = labels
+            attribute.last_value = None
+
+        # only write values that changed
+        if metric_value != attribute.last_value:
+            if attribute.last_value is not None:
+                request_counters.add(request_counters.CHANGES, labels.get("server"), attribute.key[1], attribute.key[2], attribute.alpaca_name)
+            attribute.last_value = metric_value
+            if collector is None:
+                metrics_utility.set(attribute.name, metric_value, labels)
+            else:
+                collector.store(attribute.slot, metric_value)
+        metrics_collected.append([attribute.name, labels])
+
+    return metrics_collected
+
+
+class DevicePlan:
+    """
+    Everything collected for one device, compiled from configuration once per connection.
+
+    'groups' is None until compile_groups is called, switch groups need 'maxswitch'
+    from the connected device.
+    """
+
+    def __init__(self, device_type, global_labels, metric_prefix):
+        self.device_type = device_type
+        self.global_labels = global_labels
+        self.metric_prefix = metric_prefix
+        # list of (extra labels, planned labels, planned metrics), one per switch id or a single group
+        self.groups = None
+        # poll 'devicestate' as often as the fastest metric it may serve, None if not used
+        self.device_state_interval = None
+        # skip list entries already removed from the plan
+        self.skipped = 0
+
+    def compile_groups(self, configurations, alpaca_base_url, device_number, *, get_value_fn, get_value_cached_fn, scheduler=None):
+        """
+        Compile device specific labels and metrics.
+
+        Args:
+            configurations: All device configurations
+            alpaca_base_url: Base URL for Alpaca API
+            device_number: Device number
+            get_value_fn: Function to get device values
+            get_value_cached_fn: Function to get cached device values
+            scheduler: AttributeScheduler (optional)
+        """
+        c = configurations[self.device_type]
+        label_configs = c.get("labels", [])
+        groups = []
+
+        # SWITCH is a special device with an "id" query param
+        if self.device_type == "switch":
+            ids = get_value_cached_fn(alpaca_base_url, self.device_type, device_number, "maxswitch")
+            for id in range(ids):
+                querystr = f"id={id}"
+                groups.append(
+                    (
+                        {"id": id},
+                        plan_labels(
+                            label_configs,
+                            alpaca_base_url,
+                            self.device_type,
+                            device_number,
+                            querystr=querystr,
+                            get_value_fn=get_value_fn,
+                            get_value_cached_fn=get_value_cached_fn,
+                            scheduler=scheduler,
+                        ),
+                        plan_metrics(
+                            c["metrics"],
+                            self.metric_prefix,
+                            alpaca_base_url,
+                            self.device_type,
+                            device_number,
+                            querystr=querystr,
+                            get_value_fn=get_value_fn,
+                            get_value_cached_fn=get_value_cached_fn,
+                            scheduler=scheduler,
+                        ),
+                    )
+                )
+        else:
+            # All other devices do not have query params
+            groups.append(
+                (
+                    {},
+                    plan_labels(
+                        label_configs,
+                        alpaca_base_url,
+                        self.device_type,
+                        device_number,
+                        querystr="",
+                        get_value_fn=get_value_fn,
+                        get_value_cached_fn=get_value_cached_fn,
+                        scheduler=scheduler,
+                    ),
+                    plan_metrics(
+                        c["metrics"],
+                        self.metric_prefix,
+                        alpaca_base_url,
+                        self.device_type,
+                        device_number,
+                        querystr="",
+                        get_value_fn=get_value_fn,
+                        get_value_cached_fn=get_value_cached_fn,
+                        scheduler=scheduler,
+                    ),
+                )
+            )
+            if scheduler is not None:
+                self.device_state_interval = min(scheduler.interval_of(m) for m in c["metrics"])
+
+        self.groups = groups
+
+    def prune(self, skipped_attributes):
+        """
+        Remove attributes the device reported as not implemented (1024).
+
+        Args:
+            skipped_attributes: The device's skip list
+        """
+        self.skipped = len(skipped_attributes)
+        skipped = set(skipped_attributes)
+        self.global_labels = [a for a in self.global_labels if a.alpaca_name not in skipped]
+        if self.groups is not None:
+            self.groups = [
+                (extra_labels, [a for a in planned_labels if a.alpaca_name not in skipped], [a for a in planned_metrics if a.alpaca_name not in skipped])
+                for extra_labels, planned_labels, planned_metrics in self.groups
+            ]
+
+    def reset_series(self):
+        """
+        Forget the series of every planned metric, the next value of each starts a new one.
+
+        Needed when a cycle ends early: series that were not reported are removed as stale.
+        """
+        for _, _, planned_metrics in self.groups or ():
+            for attribute in planned_metrics:
+                attribute.slot = None
+                attribute.slot_labels = None
+                attribute.last_value = None
+
+
+def compile_device_plan(configurations, device_type, device_number, alpaca_base_url, *, get_value_fn, get_value_cached_fn, scheduler=None):
+    """
+    Compile the collection plan of a device.
+
+    Args:
         configurations: All device configurations
         device_type: Type of device
-        metric_prefix: Prefix for metric names
-        alpaca_base_url: Base URL for Alpaca API
         device_number: Device number
-        querystr: Query string for device
+        alpaca_base_url: Base URL for Alpaca API
         get_value_fn: Function to get device values
         get_value_cached_fn: Function to get cached device values
+        scheduler: AttributeScheduler (optional)
 
     Returns:
-        list: List of [metric_name, labels] tuples collected
+        DevicePlan: Plan with global labels compiled, call compile_groups for the rest
     """
-    metrics_collected = []
-    c = configurations[device_type]
+    global_labels = []
+    if "global" in configurations and "labels" in configurations["global"]:
+        global_labels = plan_labels(
+            configurations["global"]["labels"],
+            alpaca_base_url,
+            device_type,
+            device_number,
+            querystr="",
+            get_value_fn=get_value_fn,
+            get_value_cached_fn=get_value_cached_fn,
+            scheduler=scheduler,
+        )
 
-    for m in c["metrics"]:
-        alpaca_name = m["alpaca_name"]
-        if "metric_name" not in m:
-            metric_name = f"{metric_prefix}{alpaca_name}"
-        else:
-            metric_name = f"{metric_prefix}{m['metric_name']}"
+    return DevicePlan(device_type, global_labels, configurations[device_type].get("metric_prefix", ""))
 
-        if "cached" in m and m["cached"] > 0:
-            metric_value = get_value_cached_fn(alpaca_base_url, device_type, device_number, alpaca_name, querystr)
-        else:
-            metric_value = get_value_fn(alpaca_base_url, device_type, device_number, alpaca_name, querystr)
 
-        # if metric_value is None we'll try to clear it
-        # if it's none but there is no prior value it will fail, ignore this
-        try:
-            metrics_utility.set(metric_name, metric_value, labels)
-            metrics_collected.append([metric_name, copy.deepcopy(labels)])
-        except:
-            pass
+def parse_device_state(state):
+    """
+    Convert a 'devicestate' response into attribute values.
 
-    return metrics_collected
+    Args:
+        state: List of {"Name": ..., "Value": ...} items as returned by the device
+
+    Returns:
+        dict: Lowercase attribute name (matching config alpaca_name) -> value
+    """
+    values = {}
+    for item in state:
+        try:
+            name = item["Name"].lower()
+            value = item["Value"]
+        except (KeyError, TypeError, AttributeError):
+            continue
+        # convert boolean to int, same as getValue
+        if isinstance(value, bool):
+            value = int(value)
+        values[name] = value
+    return values
 
 
 def process_device(
@@ -171,6 +638,13 @@ def process_device(
     skip_device_attribute,
     get_value_fn,
     get_value_cached_fn,
+    *,
+    get_device_state_fn=None,
+    scheduler=None,
+    invalidate_cache_fn=None,
+    server_label=None,
+    plans=None,
+    restore_skips_fn=None,
 ):
     """
     Process a single device - check connectivity and collect metrics.
@@ -186,6 +660,17 @@ def process_device(
         skip_device_attribute: Skip list tracking dict
         get_value_fn: Function to get device values
         get_value_cached_fn: Function to get cached device values
+        get_device_state_fn: Function to get all device values in one 'devicestate' call (optional)
+        scheduler: AttributeScheduler, if set each attribute is only polled when due (optional)
+        invalidate_cache_fn: Function to drop a device's cached values, called on every state transition (optional)
+        server_label: Value of the 'server' label when several servers are monitored (optional)
+        plans: DevicePlan tracking dict, plans are compiled on connect and reused until disconnect (optional, compiled every call)
+        restore_skips_fn: Function returning a saved skip list for the connected device, None if unknown (optional)
+
+    Get value functions may raise DeviceNotConnectedError, the remaining attributes are
+    then not requested this cycle.  Only the 'name' check changes the device's state:
+    ASCOM devices answer 'name' while not connected, so a device reporting NotConnected
+    stays connected, as with any other failed attribute.
 
     Returns:
         list: List of [metric_name, labels] tuples collected for this device
@@ -198,13 +683,12 @@ def process_device(
         return metrics_current
 
     # collect labels for device this iteration
-    labels = {
-        "device_type": device_type,
-        "device_number": device_number,
-    }
+    labels = device_labels(device_type, device_number, server_label)
 
     # Track device status for state change detection
     device_key = f"{device_type}/{device_number}"
+    # how the device is shown in output, device numbers repeat across servers
+    device_id = device_key if server_label is None else f"{server_label}/{device_key}"
     was_connected = device_status.get(device_key)
 
     # Check if device is in currently discovered devices (for discovery mode)
@@ -215,102 +699,119 @@ def process_device(
     # If not discovered, mark as disconnected (only if previously connected)
     if not is_currently_discovered:
         if was_connected is True:
-            print(f"DISCONNECTED: {device_type}/{device_number} no longer discovered")
-            metrics_utility.set("alpaca_device_connected", 0, labels)
-            metrics_current.append(["alpaca_device_connected", copy.deepcopy(labels)])
+            print(f"DISCONNECTED: {device_id} no longer discovered")
+            if invalidate_cache_fn is not None:
+                invalidate_cache_fn(alpaca_base_url, device_type, device_number)
+            connected_labels = label_set.intern_labels(labels)
+            device_collector.set_gauge("alpaca_device_connected", 0, connected_labels)
+            metrics_current.append(["alpaca_device_connected", connected_labels])
         device_status[device_key] = False
+        if plans is not None:
+            plans.pop(device_key, None)
         return metrics_current
 
     # Verify this is a valid device by getting its name
     # Only record metrics if device has been connected before
     should_record = was_connected is True
-    name = get_value_fn(alpaca_base_url, device_type, device_number, "name", "", should_record)
+    fetch_name = functools.partial(get_value_fn, alpaca_base_url, device_type, device_number, "name", "", should_record)
+    try:
+        if scheduler is not None:
+            # connectivity is checked on the default interval (refresh rate)
+            name = scheduler.fetch((alpaca_base_url, device_type, device_number, "name", ""), scheduler.default_interval, fetch_name)
+        else:
+            name = fetch_name()
+    except DeviceNotConnectedError:
+        name = None
 
     if not name:
         if was_connected is True:
-            print(f"DISCONNECTED: {device_type}/{device_number} not responding")
-            metrics_utility.set("alpaca_device_connected", 0, labels)
-            metrics_current.append(["alpaca_device_connected", copy.deepcopy(labels)])
+            print(f"DISCONNECTED: {device_id} not responding")
+            if invalidate_cache_fn is not None:
+                invalidate_cache_fn(alpaca_base_url, device_type, device_number)
+            connected_labels = label_set.intern_labels(labels)
+            device_collector.set_gauge("alpaca_device_connected", 0, connected_labels)
+            metrics_current.append(["alpaca_device_connected", connected_labels])
         device_status[device_key] = False
+        if plans is not None:
+            plans.pop(device_key, None)
         return metrics_current
 
     # Device is connected - create/update metrics
     # NOTE: 'name' label is not added until after the connected metric is created/updated
-    metrics_utility.set("alpaca_device_connected", 1, labels)
-    metrics_current.append(["alpaca_device_connected", copy.deepcopy(labels)])
+    connected_labels = label_set.intern_labels(labels)
+    device_collector.set_gauge("alpaca_device_connected", 1, connected_labels)
+    metrics_current.append(["alpaca_device_connected", connected_labels])
 
     # Print CONNECTED when device becomes available (transitioning from any non-connected state)
     if was_connected is not True:
-        print(f"CONNECTED: {device_type}/{device_number}")
-        # Reset skip list on connect (new connection may have different driver/capabilities)
-        skip_device_attribute.setdefault(device_type, {})[str(device_number)] = []
+        print(f"CONNECTED: {device_id}")
+        # Cached values (driverversion, maxswitch, ...) belong to the previous connection
+        if invalidate_cache_fn is not None:
+            invalidate_cache_fn(alpaca_base_url, device_type, device_number)
+        # So does the plan, it is compiled again from the new connection's capabilities
+        if plans is not None:
+            plans.pop(device_key, None)
+
+    # Reset skip list on connect (new connection may have different driver/capabilities),
+    # or the first time a device restored as connected is seen.
+    # A skip list saved for the same device and driver version is used instead of probing again.
+    if was_connected is not True or str(device_number) not in skip_device_attribute.get(device_type, {}):
+        restored = None if restore_skips_fn is None else restore_skips_fn(alpaca_base_url, device_type, device_number)
+        skip_device_attribute.setdefault(device_type, {})[str(device_number)] = restored or []
 
     device_status[device_key] = True
     labels.update({"name": name})
-    metrics_utility.set("alpaca_device_name", 1, labels)
-    metrics_current.append(["alpaca_device_name", copy.deepcopy(labels)])
+    name_labels = label_set.intern_labels(labels)
+    device_collector.set_gauge("alpaca_device_name", 1, name_labels)
+    metrics_current.append(["alpaca_device_name", name_labels])
+
+    plan = None if plans is None else plans.get(device_key)
+    try:
+        if plan is None:
+            plan = compile_device_plan(
+                configurations, device_type, device_number, alpaca_base_url, get_value_fn=get_value_fn, get_value_cached_fn=get_value_cached_fn, scheduler=scheduler
+            )
+            if plans is not None:
+                plans[device_key] = plan
 
-    metric_prefix = ""
-    if "metric_prefix" in c:
-        metric_prefix = c["metric_prefix"]
+        # Collect global labels
+        apply_planned_labels(labels, name, plan.global_labels, scheduler)
 
-    # Collect global labels
-    if "global" in configurations and "labels" in configurations["global"]:
-        create_device_labels(
-            labels,
-            name,
-            alpaca_base_url,
-            device_type,
-            device_number,
-            configurations["global"]["labels"],
-            "",
-            get_value_fn,
-            get_value_cached_fn,
-        )
+        if plan.groups is None:
+            plan.compile_groups(configurations, alpaca_base_url, device_number, get_value_fn=get_value_fn, get_value_cached_fn=get_value_cached_fn, scheduler=scheduler)
 
-    # SWITCH is a special device with an "id" query param
-    if device_type == "switch":
-        ids = get_value_cached_fn(alpaca_base_url, device_type, device_number, "maxswitch")
-        for id in range(ids):
+        for extra_labels, planned_labels, planned_metrics in plan.groups:
             # Create a copy of labels for each switch ID
-            switch_labels = labels.copy()
-            switch_labels["id"] = id
-            querystr = f"id={id}"
-
-            # Device specific labels for this switch ID
-            if "labels" in c:
-                create_device_labels(switch_labels, name, alpaca_base_url, device_type, device_number, c["labels"], querystr, get_value_fn, get_value_cached_fn)
-
-            # Collect metrics for this switch ID
-            collected = collect_device_metrics(
-                switch_labels, configurations, device_type, metric_prefix, alpaca_base_url, device_number, querystr, get_value_fn, get_value_cached_fn
-            )
-            metrics_current.extend(collected)
-    else:
-        # All other devices do not have query params
-        # Device specific labels
-        if "labels" in c:
-            create_device_labels(labels, name, alpaca_base_url, device_type, device_number, c["labels"], "", get_value_fn, get_value_cached_fn)
-
-        # Collect metrics
-        collected = collect_device_metrics(labels, configurations, device_type, metric_prefix, alpaca_base_url, device_number, "", get_value_fn, get_value_cached_fn)
-        metrics_current.extend(collected)
+            group_labels = labels.copy() if extra_labels else labels
+            group_labels.update(extra_labels)
+
+            # Device specific labels
+            apply_planned_labels(group_labels, name, planned_labels, scheduler)
+
+            # One 'devicestate' call replaces per-attribute calls when the driver supports it.
+            # None means unsupported or failed, every attribute is then fetched individually.
+            # Switch devices are per "id" so never use it.
+            device_state = None
+            if get_device_state_fn is not None and device_type != "switch":
+                fetch_state = functools.partial(get_device_state_fn, alpaca_base_url, device_type, device_number)
+                if scheduler is not None:
+                    device_state = scheduler.fetch((alpaca_base_url, device_type, device_number, "devicestate", ""), plan.device_state_interval, fetch_state)
+                else:
+                    device_state = fetch_state()
+
+            # Collect metrics
+            metrics_current.extend(collect_planned_metrics(group_labels, planned_metrics, device_state, scheduler))
+
+        # Attributes that returned 1024 this cycle are dropped from the plan
+        skipped = skip_device_attribute.get(device_type, {}).get(str(device_number), [])
+        if len(skipped) != plan.skipped:
+            plan.prune(skipped)
+
+    except DeviceNotConnectedError as e:
+        # device dropped mid-cycle, skip its remaining attributes.  the next cycle's
+        # name check tells if it is gone, the series not reported are removed as stale.
+        logger.debug("%s ended cycle early: %s", device_id, e)
+        if plan is not None:
+            plan.reset_series()
 
     return metrics_current
-
-
-def cleanup_stale_metrics(metrics_previous, metrics_current):
-    """
-    Remove metrics that were collected in previous cycle but not current.
-
-    Args:
-        metrics_previous: List of [metric_name, labels] from previous cycle
-        metrics_current: List of [metric_name, labels] from current cycle
-    """
-    for m in metrics_previous:
-        # if the cache has a value we didn't just collect we must remove the metric
-        if m not in metrics_current:
-            metric_name = m[0]
-            labels = m[1]  # type: ignore[assignment]
-            # wipe the metric
-            metrics_utility.set(metric_name, None, labels)
@@ -0,0 +1,105 @@
+"""
+Pre-rendered /metrics exposition.
+
+Metrics only change once per collection cycle, so the text exposition and a
+gzip-compressed copy are rendered once per cycle by refresh() and the same bytes
+are served to every scrape until the next cycle.  Scrape cost no longer depends
+on the number of scrapers.
+"""
+
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+# (body, gzipped body) served to scrapes, replaced as a whole by refresh()
+rendered = (b"", gzip.compress(b""))
+
+# registry rendered by refresh()
+registry = REGISTRY
+
+server = None
+
+
+def refresh():
+    """
+    Render the registry and swap in the new exposition.
+
+    Returns:
+        tuple: (body, gzipped body) now being served
+    """
+    global rendered
+    body = generate_latest(registry)
+    rendered = (body, gzip.compress(body))
+    return rendered
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Check if an Accept-Encoding header allows gzip.
+
+    Args:
+        accept_encoding: Accept-Encoding header value, None if missing
+
+    Returns:
+        bool: True if the response may be gzip-compressed
+    """
+    if not accept_encoding:
+        return False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        # "gzip;q=0" means not acceptable
+        key, _, value = params.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the pre-rendered exposition"""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+
+        body, gzipped = rendered
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE_LATEST)
+        if accepts_gzip(self.headers.get("Accept-Encoding")):
+            body = gzipped
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        # don't log every scrape
+        pass
+
+
+def serve(port, addr=""):
+    """
+    Start the metrics HTTP server in a background thread.
+
+    Args:
+        port: Port to listen on
+        addr: Address to bind to, default is all interfaces
+
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    global server
+    refresh()
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
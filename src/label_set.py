@@ -0,0 +1,80 @@
+"""
+Interned immutable label sets.
+
+Every sample of a device shares one LabelSet instead of a deep copy of the
+labels dict.  Equal label sets built in later cycles resolve to the same
+object, so comparing them is usually an identity check.
+"""
+
+import threading
+import weakref
+from collections.abc import Mapping
+
+
+class LabelSet(Mapping):
+    """
+    Immutable, hashable mapping of label name to value.
+
+    Compares equal to a dict with the same items, so it can be used anywhere a
+    labels dict is expected.  Build with intern_labels rather than directly.
+
+    Args:
+        items: Iterable of (label name, value) pairs, order is kept
+    """
+
+    __slots__ = ("__weakref__", "_hash", "_labels")
+
+    def __init__(self, items):
+        self._labels = dict(items)
+        self._hash = hash(frozenset(self._labels.items()))
+
+    def __getitem__(self, key):
+        return self._labels[key]
+
+    def __iter__(self):
+        return iter(self._labels)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, LabelSet):
+            return self._hash == other._hash and self._labels == other._labels
+        if isinstance(other, Mapping):
+            return self._labels == dict(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"LabelSet({self._labels!r})"
+
+
+# label sets in use, dropped once no sample references them
+_interned: weakref.WeakValueDictionary[tuple, LabelSet] = weakref.WeakValueDictionary()
+_lock = threading.Lock()
+
+
+def intern_labels(labels):
+    """
+    Get the shared LabelSet for a labels dict.
+
+    Args:
+        labels: Labels dict, or a LabelSet which is returned as is
+
+    Returns:
+        LabelSet: The interned label set
+    """
+    if isinstance(labels, LabelSet):
+        return labels
+
+    key = tuple(labels.items())
+    with _lock:
+        label_set = _interned.get(key)
+        if label_set is None:
+            label_set = LabelSet(key)
+            _interned[key] = label_set
+    return label_set
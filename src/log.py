@@ -0,0 +1,85 @@
+"""
+Logging for the exporter.
+
+Each module gets its own logger under "alpaca_exporter" via get_logger().
+Messages use %-style arguments so they are only formatted when the level is
+enabled.  TRACE (below DEBUG) is meant for per-request detail; when it's off a
+trace call costs one cached level check.
+
+User facing state changes (CONNECTED, DISCONNECTED, ...) are still printed.
+"""
+
+import logging
+import signal
+
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+
+LEVELS = ["TRACE", "DEBUG", "INFO", "WARNING", "ERROR"]
+DEFAULT_LEVEL = "INFO"
+
+ROOT = "alpaca_exporter"
+
+# level to go back to when trace is toggled off at runtime
+_configured_level = logging.INFO
+
+
+class StdoutHandler(logging.Handler):
+    """Write records with print(), same as the rest of the exporter output"""
+
+    def emit(self, record):
+        try:
+            print(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+def get_logger(name):
+    """
+    Get the logger of a module.
+
+    Args:
+        name: Short module name, e.g. "transport"
+
+    Returns:
+        logging.Logger: Logger under the exporter's root logger
+    """
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def configure(level=DEFAULT_LEVEL):
+    """
+    Set the log level of every exporter logger and attach the output handler.
+
+    Args:
+        level: Level name from LEVELS
+    """
+    global _configured_level
+    root = logging.getLogger(ROOT)
+    _configured_level = logging.getLevelName(level.upper())
+    root.setLevel(_configured_level)
+    root.propagate = False
+    if not any(isinstance(h, StdoutHandler) for h in root.handlers):
+        handler = StdoutHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+        root.addHandler(handler)
+
+
+def toggle_trace(*_args):
+    """
+    Switch between TRACE and the configured level, used as a signal handler.
+    """
+    root = logging.getLogger(ROOT)
+    if root.level == TRACE:
+        root.setLevel(_configured_level)
+    else:
+        root.setLevel(TRACE)
+    print(f"LOG LEVEL: {logging.getLevelName(root.level)}")
+
+
+def install_trace_toggle():
+    """
+    Toggle TRACE at runtime with SIGUSR1 (not available on Windows).
+    """
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, toggle_trace)
@@ -0,0 +1,59 @@
+"""
+Index of the metric series each device owns.
+
+Replaces diffing the whole previous cycle against the whole current cycle:
+only devices that were processed are diffed, each against its own series, using
+hashed lookups.  A device that failed keeps its series untouched.
+"""
+
+import threading
+
+import device_collector
+import label_set
+
+
+class MetricIndex:
+    """
+    Track series per device and remove the ones a device stopped reporting.
+    """
+
+    def __init__(self):
+        # device key -> set of (metric_name, LabelSet)
+        self.owned = {}
+        self._lock = threading.Lock()
+
+    def update(self, device_key, metrics_current):
+        """
+        Record the series a device reported this cycle and remove its stale series.
+
+        Args:
+            device_key: Hashable device identity, e.g. (alpaca_base_url, device_type, device_number)
+            metrics_current: List of [metric_name, labels] the device reported, None if it failed (nothing is removed)
+
+        Returns:
+            int: Number of series removed
+        """
+        if metrics_current is None:
+            return 0
+
+        current = {(metric_name, label_set.intern_labels(labels)) for metric_name, labels in metrics_current}
+        with self._lock:
+            previous = self.owned.get(device_key, set())
+            self.owned[device_key] = current
+
+        removed = 0
+        for metric_name, labels in previous - current:
+            # wipe the metric
+            device_collector.set_gauge(metric_name, None, labels)
+            removed += 1
+        return removed
+
+    def series(self):
+        """
+        Get every series currently owned.
+
+        Returns:
+            set: All (metric_name, LabelSet) tuples
+        """
+        with self._lock:
+            return set().union(*self.owned.values())
@@ -0,0 +1,145 @@
+"""
+Batched per-attribute counters.
+
+alpaca_success_total / alpaca_error_total count requests, getValue only bumps a
+tally entry per request.  alpaca_attribute_changes_total counts how often a
+metric's value changed, to help pick poll intervals.  alpaca_connection_new_total /
+alpaca_connection_reused_total count requests per server by whether they opened a
+connection, transport adds them once per cycle.  Once per collection cycle
+flush() folds the tally into the counter totals and renders them for scrapes,
+so counter upkeep costs one operation per series per cycle instead of a labels
+dict and a registry lookup per request.
+"""
+
+import threading
+
+from prometheus_client.core import REGISTRY, Metric
+
+SUCCESS = "alpaca_success_total"
+ERROR = "alpaca_error_total"
+CHANGES = "alpaca_attribute_changes_total"
+NEW_CONNECTIONS = "alpaca_connection_new_total"
+REUSED_CONNECTIONS = "alpaca_connection_reused_total"
+
+
+class RequestCounters:
+    """
+    Custom collector for the per-attribute counters.
+    """
+
+    def __init__(self):
+        # (counter name, server label, device_type, device_number, attribute) -> count since last flush
+        self.pending = {}
+        # same key -> total since start
+        self.totals = {}
+        # same key -> labels, built once per series
+        self.labels = {}
+        # (counter name, server) -> total since start
+        self.connections = {}
+        self._lock = threading.Lock()
+        # metric families served to scrapes, replaced as a whole by flush()
+        self.snapshot = ()
+
+    def add(self, counter_name, server_label, device_type, device_number, attribute):
+        """
+        Count one request or value change.
+
+        Args:
+            counter_name: SUCCESS, ERROR or CHANGES
+            server_label: Value of the 'server' label, None to omit it
+            device_type: Type of device
+            device_number: Device number
+            attribute: Attribute requested
+        """
+        key = (counter_name, server_label, device_type, device_number, attribute)
+        with self._lock:
+            self.pending[key] = self.pending.get(key, 0) + 1
+
+    def add_connections(self, server, new, reused):
+        """
+        Count requests that opened a new connection and requests that reused one.
+
+        Args:
+            server: Server origin, value of the 'server' label
+            new: Requests that opened a connection
+            reused: Requests that reused a connection
+        """
+        with self._lock:
+            for counter_name, count in ((NEW_CONNECTIONS, new), (REUSED_CONNECTIONS, reused)):
+                key = (counter_name, server)
+                self.connections[key] = self.connections.get(key, 0) + count
+
+    def flush(self):
+        """
+        Add the tally to the totals and make them visible to scrapes.
+        """
+        with self._lock:
+            pending = self.pending
+            self.pending = {}
+            connections = list(self.connections.items())
+
+        for key, count in pending.items():
+            if key not in self.totals:
+                counter_name, server_label, device_type, device_number, attribute = key
+                labels = {"device_type": device_type, "device_number": str(device_number), "attribute": attribute}
+                if server_label is not None:
+                    labels["server"] = server_label
+                self.labels[key] = labels
+                self.totals[key] = 0
+            self.totals[key] += count
+
+        families = {}
+        for key, total in self.totals.items():
+            counter_name = key[0]
+            family = families.get(counter_name)
+            if family is None:
+                family = families[counter_name] = Metric(counter_name.removesuffix("_total"), counter_name, "counter")
+            family.add_sample(counter_name, self.labels[key], total)
+        for (counter_name, server), total in connections:
+            family = families.get(counter_name)
+            if family is None:
+                family = families[counter_name] = Metric(counter_name.removesuffix("_total"), counter_name, "counter")
+            family.add_sample(counter_name, {"server": server}, total)
+        self.snapshot = tuple(families.values())
+
+    def describe(self):
+        # nothing to describe up front, keeps registration from calling collect()
+        return []
+
+    def collect(self):
+        return self.snapshot
+
+
+# counters used by getValue, registered for scrapes by enable()
+counters = RequestCounters()
+
+
+def enable(registry=REGISTRY):
+    """
+    Expose the request counters.
+
+    Args:
+        registry: Prometheus registry to register the counters with
+    """
+    registry.register(counters)
+
+
+def add(counter_name, server_label, device_type, device_number, attribute):
+    """
+    Count one request, see RequestCounters.add.
+    """
+    counters.add(counter_name, server_label, device_type, device_number, attribute)
+
+
+def add_connections(server, new, reused):
+    """
+    Count connection use of a server, see RequestCounters.add_connections.
+    """
+    counters.add_connections(server, new, reused)
+
+
+def flush():
+    """
+    Flush the tally, see RequestCounters.flush.
+    """
+    counters.flush()
@@ -0,0 +1,163 @@
+"""
+Host name resolution cache for Alpaca servers.
+
+Alpaca servers are often given by mDNS name (i.e. 'pier1.local'), where every
+lookup can take hundreds of milliseconds, more when IPv6 is tried first.
+Connections opened by transport resolve through ResolverCache: a host's
+addresses are looked up once and reused until their TTL expires.  Like urllib3,
+transport tries each address in turn, the one that connected is tried first
+next time.  Lookups can be pinned to one address family.  Hits, misses and the time spent resolving are exported per
+host.
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+
+from prometheus_client.core import REGISTRY, Metric
+
+import constants
+import log
+
+logger = log.get_logger("resolver")
+
+# --address_family choices
+FAMILIES = {"any": socket.AF_UNSPEC, "ipv4": socket.AF_INET, "ipv6": socket.AF_INET6}
+
+
+class ResolverCache:
+    """
+    Cache of resolved addresses, also a custom collector for the lookup counters.
+
+    Args:
+        ttl: Seconds a resolved address is reused, 0 disables the cache
+        family: Address family to resolve, socket.AF_UNSPEC for any
+    """
+
+    def __init__(self, ttl=constants.DNS_CACHE_TTL, family=socket.AF_UNSPEC):
+        self.ttl = ttl
+        self.family = family
+        # host -> (expires_at, addresses)
+        self.entries = {}
+        # host -> [hits, misses, seconds spent resolving]
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def _count(self, host, hit, seconds=0.0):
+        stats = self.stats.get(host)
+        if stats is None:
+            stats = self.stats[host] = [0, 0, 0.0]
+        stats[0 if hit else 1] += 1
+        stats[2] += seconds
+
+    def resolve(self, host, port):
+        """
+        Get the addresses to connect to for a host.
+
+        Args:
+            host: Host name or address
+            port: Port, passed to the lookup
+
+        Returns:
+            list: Addresses in the order to try them, None if the host is already an address or the lookup failed
+        """
+        try:
+            ipaddress.ip_address(host)
+            return None
+        except ValueError:
+            pass
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(host)
+            if entry is not None and entry[0] > now:
+                self._count(host, True)
+                return entry[1]
+
+        # with the cache disabled every connection looks the host up, still pinned to the family
+
+        try:
+            addresses = socket.getaddrinfo(host, port, self.family, socket.SOCK_STREAM)
+        except OSError as e:
+            logger.debug("lookup of %s failed: %s", host, e)
+            addresses = []
+        seconds = time.monotonic() - now
+
+        # one entry per address, getaddrinfo may list the same one for several protocols
+        addresses = list(dict.fromkeys(a[4][0] for a in addresses)) or None
+        with self._lock:
+            self._count(host, False, seconds)
+            if addresses is not None and self.ttl > 0:
+                self.entries[host] = (now + self.ttl, addresses)
+        logger.debug("resolved %s to %s in %.3fs", host, addresses, seconds)
+        return addresses
+
+    def prefer(self, host, address):
+        """
+        Try an address of a host first from now on, i.e. the one that accepted a connection.
+
+        Args:
+            host: Host name
+            address: One of the host's cached addresses
+        """
+        with self._lock:
+            entry = self.entries.get(host)
+            if entry is not None and address in entry[1] and entry[1][0] != address:
+                self.entries[host] = (entry[0], [address] + [a for a in entry[1] if a != address])
+
+    def invalidate(self, host):
+        """
+        Forget the address of a host, i.e. after connecting to it failed.
+
+        Args:
+            host: Host name
+        """
+        with self._lock:
+            self.entries.pop(host, None)
+
+    def clear(self):
+        """Forget all addresses."""
+        with self._lock:
+            self.entries.clear()
+
+    def describe(self):
+        # nothing to describe up front, keeps registration from calling collect()
+        return []
+
+    def collect(self):
+        lookups = Metric("alpaca_dns_lookups", "host name lookups by result", "counter")
+        seconds = Metric("alpaca_dns_lookup_seconds", "seconds spent resolving host names", "counter")
+        with self._lock:
+            for host, (hits, misses, spent) in self.stats.items():
+                lookups.add_sample("alpaca_dns_lookups_total", {"host": host, "result": "hit"}, hits)
+                lookups.add_sample("alpaca_dns_lookups_total", {"host": host, "result": "miss"}, misses)
+                seconds.add_sample("alpaca_dns_lookup_seconds_total", {"host": host}, spent)
+        return [lookups, seconds]
+
+
+# cache used by transport connections, registered for scrapes by enable()
+cache = ResolverCache()
+
+
+def configure(ttl=None, family=None):
+    """
+    Set TTL and address family and drop cached addresses.
+
+    Args:
+        ttl: Seconds a resolved address is reused, 0 disables the cache (None keeps default)
+        family: One of FAMILIES (None keeps default)
+    """
+    cache.ttl = constants.DNS_CACHE_TTL if ttl is None else ttl
+    cache.family = FAMILIES[family or "any"]
+    cache.clear()
+
+
+def enable(registry=REGISTRY):
+    """
+    Expose the lookup counters.
+
+    Args:
+        registry: Prometheus registry to register the counters with
+    """
+    registry.register(cache)
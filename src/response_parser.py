@@ -0,0 +1,60 @@
+"""
+Decoding of Alpaca JSON responses.
+
+Response bodies are parsed straight from bytes, with orjson when it is
+installed and the stdlib json module otherwise.  Only the envelope fields the
+exporter uses are handed back; ClientTransactionID and ServerTransactionID are
+never looked at.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(body):
+    """
+    Parse a JSON response body.
+
+    orjson rejects NaN and Infinity, which some drivers send for unknown
+    values, such bodies are parsed again with the stdlib json module.
+
+    Args:
+        body: Response body, bytes or str
+
+    Returns:
+        The decoded JSON document
+
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(body)
+
+
+def parse_response(body):
+    """
+    Get the fields used by the exporter from an Alpaca API response.
+
+    Args:
+        body: Response body, bytes or str
+
+    Returns:
+        tuple: (ErrorNumber, ErrorMessage, Value), ErrorMessage is None if missing and Value is None on error
+
+    Raises:
+        ValueError: If the body is not valid JSON
+        KeyError: If a successful response has no 'Value'
+    """
+    data = loads(body)
+    error_number = data.get("ErrorNumber", 0)
+    if error_number > 0:
+        return error_number, data.get("ErrorMessage"), None
+    return 0, None, data["Value"]
@@ -0,0 +1,143 @@
+"""
+Per-attribute poll scheduling.
+
+Each attribute is polled on its own interval (config key 'interval', default
+is the refresh rate).  Next due times are kept in a priority queue so the main
+loop can sleep exactly until the earliest attribute is due instead of waking
+on a fixed refresh rate.  Attributes that are not due yet return the value
+from their last poll.
+"""
+
+import heapq
+import threading
+import time
+
+import constants
+
+
+class AttributeScheduler:
+    """Tracks when each attribute is next due and its last polled value."""
+
+    def __init__(self, default_interval):
+        """
+        Args:
+            default_interval: Interval in seconds for attributes without one configured
+        """
+        self.default_interval = default_interval
+        # key is (alpaca_base_url, device_type, device_number, attribute, querystr)
+        self.due_at = {}
+        self.last_value = {}
+        # heap of (due_time, key), may hold outdated entries which are dropped lazily
+        self.queue = []
+        self.seen = set()
+        self.now = time.monotonic()
+        self._lock = threading.Lock()
+
+    def interval_of(self, config):
+        """
+        Get the poll interval for a label or metric configuration entry.
+
+        Args:
+            config: Configuration dict with optional 'interval'
+
+        Returns:
+            float: Interval in seconds
+        """
+        interval = config.get("interval", self.default_interval)
+        return max(interval, constants.MIN_POLL_INTERVAL)
+
+    def begin_pass(self):
+        """Start a pass over all devices, every due check in the pass uses the same time."""
+        self.now = time.monotonic()
+
+    def fetch(self, key, interval, fetch_fn):
+        """
+        Poll an attribute if it is due, otherwise return its last value.
+
+        Args:
+            key: Attribute key (alpaca_base_url, device_type, device_number, attribute, querystr)
+            interval: Seconds between polls
+            fetch_fn: Called with no arguments to poll the attribute
+
+        Returns:
+            The polled or last polled value
+        """
+        with self._lock:
+            self.seen.add(key)
+            due = self.due_at.get(key)
+            if due is not None and self.now < due:
+                return self.last_value.get(key)
+
+        value = fetch_fn()
+
+        with self._lock:
+            due = self.now + interval
+            self.last_value[key] = value
+            self.due_at[key] = due
+            heapq.heappush(self.queue, (due, key))
+        return value
+
+    def end_pass(self):
+        """Forget attributes that were not requested during the pass (i.e. device disconnected)."""
+        with self._lock:
+            for key in list(self.due_at.keys()):
+                if key not in self.seen:
+                    del self.due_at[key]
+                    self.last_value.pop(key, None)
+            self.seen = set()
+
+    def remap(self, prefixes):
+        """
+        Move due times and last values to a new key prefix, i.e. when a device got a new device number.
+
+        Entries already under a new prefix belonged to another device and are removed.
+
+        Args:
+            prefixes: Dict of old prefix -> new prefix, all of the same length
+        """
+        if not prefixes:
+            return
+        n = len(next(iter(prefixes)))
+        new_prefixes = set(prefixes.values())
+        with self._lock:
+            moved = {}
+            for key in [k for k in self.due_at if k[:n] in prefixes]:
+                moved[prefixes[key[:n]] + key[n:]] = (self.due_at.pop(key), self.last_value.pop(key, None))
+            for key in [k for k in self.due_at if k[:n] in new_prefixes]:
+                del self.due_at[key]
+                self.last_value.pop(key, None)
+            for key, (due, value) in moved.items():
+                self.due_at[key] = due
+                self.last_value[key] = value
+                heapq.heappush(self.queue, (due, key))
+
+    def next_due(self):
+        """
+        Get the earliest time any attribute is due.
+
+        Returns:
+            float: time.monotonic() based due time, None if nothing is scheduled
+        """
+        with self._lock:
+            while self.queue:
+                due, key = self.queue[0]
+                if self.due_at.get(key) == due:
+                    return due
+                # outdated entry, attribute was rescheduled or forgotten
+                heapq.heappop(self.queue)
+            return None
+
+    def seconds_until_next_due(self, max_wait):
+        """
+        Get how long to sleep before the next pass.
+
+        Args:
+            max_wait: Upper bound in seconds
+
+        Returns:
+            float: Seconds until the earliest attribute is due, capped at max_wait
+        """
+        due = self.next_due()
+        if due is None:
+            return max_wait
+        return min(max(due - time.monotonic(), 0), max_wait)
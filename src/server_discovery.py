@@ -0,0 +1,220 @@
+"""
+Alpaca server discovery on the local network.
+
+Implements the Alpaca discovery protocol: a "alpacadiscovery1" UDP broadcast
+to port 32227, answered by every Alpaca server with {"AlpacaPort": <port>}.
+Responses are collected until the timeout, each answering host becomes a
+server base URL.
+
+ServerDiscovery repeats the broadcast in a background thread, so the polling
+loop only reads the servers found so far and never waits for responses.  A
+server already monitored under another URL (a configured host name, another
+network interface of the same host) is only polled once: servers are told apart
+by resolved address and port, and by the UniqueIDs of their devices.
+"""
+
+import json
+import select
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import constants
+import log
+import resolver
+
+logger = log.get_logger("server_discovery")
+
+
+def parse_response(host, data):
+    """
+    Get the base URL of a server from its discovery response.
+
+    Args:
+        host: Address the response came from
+        data: Response payload
+
+    Returns:
+        str: Base URL for the server's Alpaca API, None if the response is not valid
+    """
+    try:
+        response = json.loads(data)
+    except ValueError:
+        return None
+    port = response.get("AlpacaPort") if isinstance(response, dict) else None
+    if not isinstance(port, int) or isinstance(port, bool) or not 0 < port < 65536:
+        return None
+    return f"http://{host}:{port}/api/v1"
+
+
+def discover_servers(timeout=constants.SERVER_DISCOVERY_TIMEOUT, address="<broadcast>", port=constants.ALPACA_DISCOVERY_PORT):
+    """
+    Broadcast an Alpaca discovery request and collect the responses.
+
+    Args:
+        timeout: Seconds to wait for responses
+        address: Address to send the request to, default is the IPv4 broadcast address
+        port: Discovery port
+
+    Returns:
+        list: Base URLs of the servers that responded, sorted
+    """
+    found = set()
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            sock.sendto(constants.ALPACA_DISCOVERY_MESSAGE, (address, port))
+        except OSError as e:
+            print(f"WARNING: Failed to send Alpaca discovery request: {e}")
+            return []
+
+        # servers answer independently, take every response that arrives before the deadline
+        deadline = time.monotonic() + timeout
+        while (remaining := deadline - time.monotonic()) > 0:
+            ready, _, _ = select.select([sock], [], [], remaining)
+            if not ready:
+                break
+            try:
+                data, (host, _) = sock.recvfrom(1024)
+            except OSError as e:
+                print(f"WARNING: Failed to receive Alpaca discovery response: {e}")
+                break
+            alpaca_base_url = parse_response(host, data)
+            logger.debug("discovery response from %s: %r", host, data)
+            if alpaca_base_url is not None:
+                found.add(alpaca_base_url)
+    return sorted(found)
+
+
+def address_of(alpaca_base_url):
+    """
+    Get the address and port a server base URL connects to.
+
+    Args:
+        alpaca_base_url: Base URL for Alpaca API
+
+    Returns:
+        tuple: (address, port), the host name if it can't be resolved
+    """
+    parts = urlsplit(alpaca_base_url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    addresses = resolver.cache.resolve(parts.hostname, port)
+    return parts.hostname if addresses is None else addresses[0], port
+
+
+class ServerDiscovery:
+    """
+    Keep the Alpaca servers found on the network up to date.
+
+    Args:
+        discover_fn: Called with no arguments, returns a list of server base URLs
+        interval: Seconds between discoveries
+        known: Base URLs of the servers already monitored (configured)
+        identify_fn: Called with a base URL, returns a hashable identity of the server, None if unknown (optional)
+    """
+
+    def __init__(self, discover_fn, interval, known=(), identify_fn=None):
+        self.discover_fn = discover_fn
+        self.interval = interval
+        self.identify_fn = identify_fn
+        # base URLs of every server found so far, replaced as a whole when one is added
+        self.servers = ()
+        # base URLs of configured servers not identified yet
+        self.pending = list(known)
+        # (address, port) -> base URL of the monitored server
+        self.addresses = {}
+        # identity -> base URL of the monitored server
+        self.identities = {}
+        # base URLs found to be a server that is already monitored
+        self.duplicates = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def identify(self, alpaca_base_url):
+        """
+        Get the identity of a server.
+
+        Args:
+            alpaca_base_url: Base URL for Alpaca API
+
+        Returns:
+            Identity from identify_fn, None if unknown
+        """
+        return None if self.identify_fn is None else self.identify_fn(alpaca_base_url)
+
+    def same_server(self, alpaca_base_url):
+        """
+        Record a server, or find the monitored server it is the same as.
+
+        Args:
+            alpaca_base_url: Base URL for Alpaca API
+
+        Returns:
+            str: Base URL the server is already monitored under, None if it was recorded as a new server
+        """
+        address = address_of(alpaca_base_url)
+        if address in self.addresses:
+            return self.addresses[address]
+        identity = self.identify(alpaca_base_url)
+        if identity is not None and identity in self.identities:
+            return self.identities[identity]
+        self.addresses[address] = alpaca_base_url
+        if identity is not None:
+            self.identities[identity] = alpaca_base_url
+        return None
+
+    def refresh(self):
+        """
+        Discover servers and add the new ones.
+
+        Servers that stop answering are kept, their devices are reported
+        disconnected by device discovery.
+
+        Returns:
+            list: Base URLs of the servers added
+        """
+        # configured servers, tried again until they answer with an identity
+        pending = []
+        for alpaca_base_url in self.pending:
+            self.addresses[address_of(alpaca_base_url)] = alpaca_base_url
+            identity = self.identify(alpaca_base_url)
+            if identity is not None:
+                self.identities[identity] = alpaca_base_url
+            elif self.identify_fn is not None:
+                pending.append(alpaca_base_url)
+        self.pending = pending
+
+        added = []
+        for alpaca_base_url in self.discover_fn():
+            if alpaca_base_url in self.servers or alpaca_base_url in self.duplicates:
+                continue
+            same = self.same_server(alpaca_base_url)
+            if same is not None:
+                print(f"SKIPPED: Alpaca server {alpaca_base_url}, same server as {same}")
+                self.duplicates.add(alpaca_base_url)
+                continue
+            print(f"DISCOVERED: Alpaca server {alpaca_base_url}")
+            added.append(alpaca_base_url)
+        if added:
+            self.servers = self.servers + tuple(added)
+        return added
+
+    def start(self):
+        """
+        Discover servers once, then keep discovering in a background thread.
+        """
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="alpaca-server-discovery", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        # discover_fn handles its own errors, a failed discovery finds no servers
+        while not self._stop.wait(self.interval):
+            self.refresh()
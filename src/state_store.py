@@ -0,0 +1,133 @@
+"""
+Exporter state kept across restarts.
+
+Skip lists, connection status and known devices of every server are written to
+a small JSON file when they change and loaded at startup, so a restart doesn't
+re-probe every unimplemented attribute or lose connection history.
+
+Skip lists are keyed by the device's UniqueID and driver version: a skip list is
+only restored for the same driver build of the same device, whatever device
+number the device has now.
+"""
+
+import json
+from pathlib import Path
+
+# bump when the file layout changes, files of other versions are ignored
+VERSION = 1
+
+
+class StateStore:
+    """
+    Load and save exporter state.
+
+    Args:
+        path: File the state is kept in
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # UniqueID -> {"driverversion": driver version, "skip": [attributes]}
+        self.devices = {}
+        # UniqueID -> driver version of the connected device
+        self.driver_versions = {}
+        # last content written, nothing is written while it is unchanged
+        self.written = None
+
+    def load(self, servers):
+        """
+        Read the state file and restore connection status and known devices.
+
+        Only servers being monitored are restored.  A missing or unreadable file
+        starts with empty state.
+
+        Args:
+            servers: ServerState per alpaca base url
+
+        Returns:
+            bool: True if state was restored
+        """
+        try:
+            content = Path(self.path).read_bytes()
+            data = json.loads(content)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Ignoring state file {self.path}: {e}")
+            return False
+
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            print(f"WARNING: Ignoring state file {self.path}: unsupported version")
+            return False
+
+        self.devices = data.get("devices", {})
+        for alpaca_base_url, saved in data.get("servers", {}).items():
+            server = servers.get(alpaca_base_url)
+            if server is None:
+                continue
+            server.device_status.update(saved.get("device_status", {}))
+            for device_type, device_numbers in saved.get("all_known_devices", {}).items():
+                known = server.all_known_devices.setdefault(device_type, [])
+                known.extend(n for n in device_numbers if n not in known)
+        self.written = content
+        return True
+
+    def identify(self, unique_id, driver_version):
+        """
+        Record the driver version of a connected device and get its saved skip list.
+
+        Args:
+            unique_id: Device's UniqueID from the management API
+            driver_version: Device's 'driverversion'
+
+        Returns:
+            list: Copy of the saved skip list, None if none was saved for this UniqueID and driver version
+        """
+        self.driver_versions[unique_id] = driver_version
+        saved = self.devices.get(unique_id)
+        if saved is None or saved.get("driverversion") != driver_version:
+            return None
+        return list(saved.get("skip", []))
+
+    def save(self, servers):
+        """
+        Write the state file if the state changed.
+
+        Skip lists are saved for devices identified since startup, found by
+        UniqueID under whatever device number they have now.
+
+        Args:
+            servers: ServerState per alpaca base url
+
+        Returns:
+            bool: True if the file was written
+        """
+        for server in servers.values():
+            for device_key, unique_id in server.unique_ids.items():
+                if unique_id not in self.driver_versions:
+                    continue
+                device_type, _, device_number = device_key.partition("/")
+                skip = server.skip_device_attribute.get(device_type, {}).get(device_number)
+                if skip is not None:
+                    # one entry per device, a new driver version replaces the old one
+                    self.devices[unique_id] = {"driverversion": self.driver_versions[unique_id], "skip": sorted(set(skip))}
+
+        data = {
+            "version": VERSION,
+            "servers": {alpaca_base_url: {"device_status": server.device_status, "all_known_devices": server.all_known_devices} for alpaca_base_url, server in servers.items()},
+            "devices": self.devices,
+        }
+        content = json.dumps(data, separators=(",", ":"), sort_keys=True).encode()
+        if content == self.written:
+            return False
+
+        # write a new file and swap it in, a crash never leaves a half written state file
+        tmp_path = Path(f"{self.path}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            tmp_path.replace(self.path)
+        except OSError as e:
+            print(f"WARNING: Failed to save state file {self.path}: {e}")
+            return False
+        self.written = content
+        return True
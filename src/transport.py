@@ -0,0 +1,265 @@
+"""
+Pooled HTTP transport for Alpaca API calls.
+
+Every Alpaca server gets one keep-alive requests.Session so repeated polls
+reuse TCP connections instead of opening a new one per attribute.  New
+connections look up the server's address through resolver.cache.
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import metrics_utility
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+import breaker
+import constants
+import log
+import request_counters
+import resolver
+
+# keep-alive sessions, key is server origin (i.e. 'http://127.0.0.1:11111')
+sessions = {}
+
+# connections opened since the last flush, key is (host, port)
+connections_opened = {}
+
+# successful requests per server since the last flush
+requests_sent = {}
+
+# circuit breakers, key is server origin
+breakers = {}
+
+pool_connections = constants.DEFAULT_POOL_CONNECTIONS
+pool_maxsize = constants.DEFAULT_POOL_MAXSIZE
+timeout = constants.DEFAULT_REQUEST_TIMEOUT
+
+_lock = threading.Lock()
+
+logger = log.get_logger("transport")
+
+# errors meaning the server (and so the device) could not be reached at all
+CONNECTION_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, breaker.CircuitOpenError)
+
+
+class CachedResolutionMixin:
+    """
+    Connect to the addresses from resolver.cache instead of resolving the host again.
+
+    Only the address connected to changes, the Host header and TLS server name
+    still use the host name.  Addresses are tried in turn, as urllib3 does, so a
+    host answering on only one of its addresses (i.e. IPv4 but not IPv6) is reached.
+    """
+
+    def _new_conn(self):
+        host = self._dns_host
+        addresses = resolver.cache.resolve(host, self.port)
+        if addresses is None:
+            # already an address, or lookup failed: let urllib3 resolve and report errors
+            conn = super()._new_conn()
+        else:
+            conn = self._connect_any(host, addresses)
+
+        key = (host.lower(), self.port)
+        with _lock:
+            connections_opened[key] = connections_opened.get(key, 0) + 1
+        return conn
+
+    def _connect_any(self, host, addresses):
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                conn = super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError) as e:
+                logger.debug("connecting to %s at %s failed: %s", host, address, e)
+                error = e
+                continue
+            finally:
+                self._dns_host = host
+            if address != addresses[0]:
+                resolver.cache.prefer(host, address)
+            return conn
+        # the addresses may have changed, look them up again next time
+        resolver.cache.invalidate(host)
+        raise error
+
+
+class CachedResolutionHTTPConnection(CachedResolutionMixin, HTTPConnection):
+    pass
+
+
+class CachedResolutionHTTPSConnection(CachedResolutionMixin, HTTPSConnection):
+    pass
+
+
+class CachedResolutionHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = CachedResolutionHTTPConnection
+
+
+class CachedResolutionHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = CachedResolutionHTTPSConnection
+
+
+class CachedResolutionAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections resolve through resolver.cache"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": CachedResolutionHTTPConnectionPool, "https": CachedResolutionHTTPSConnectionPool}
+
+
+def configure(connections=None, maxsize=None, request_timeout=None, dns_ttl=None, address_family=None):
+    """
+    Set pool sizes and timeout used for new sessions and drop any existing sessions.
+
+    Args:
+        connections: Number of host pools kept per session (None keeps default)
+        maxsize: Maximum keep-alive connections per server (None keeps default)
+        request_timeout: Seconds to wait for connect / response (None keeps default)
+        dns_ttl: Seconds a resolved server address is reused, 0 disables the cache (None keeps default)
+        address_family: Address family to resolve server names to, one of resolver.FAMILIES (None keeps default)
+    """
+    global pool_connections, pool_maxsize, timeout
+    pool_connections = connections or constants.DEFAULT_POOL_CONNECTIONS
+    pool_maxsize = maxsize or constants.DEFAULT_POOL_MAXSIZE
+    timeout = request_timeout or constants.DEFAULT_REQUEST_TIMEOUT
+    resolver.configure(dns_ttl, address_family)
+    close()
+
+
+def close():
+    """Close all sessions and their pooled connections, and reset breakers."""
+    with _lock:
+        for session in sessions.values():
+            session.close()
+        sessions.clear()
+        connections_opened.clear()
+        requests_sent.clear()
+        breakers.clear()
+
+
+def server_of(url):
+    """
+    Get the server origin a URL belongs to.
+
+    Args:
+        url: Any Alpaca URL (device or management API)
+
+    Returns:
+        str: scheme://host:port of the URL
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(server):
+    """
+    Get the keep-alive session for a server, creating it on first use.
+
+    Args:
+        server: Server origin as returned by server_of()
+
+    Returns:
+        requests.Session: Session with a pooled adapter mounted
+    """
+    session = sessions.get(server)
+    if session is None:
+        with _lock:
+            session = sessions.get(server)
+            if session is None:
+                session = requests.Session()
+                adapter = CachedResolutionAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                sessions[server] = session
+                logger.debug("new session for %s (pool_maxsize=%s)", server, pool_maxsize)
+    return session
+
+
+def get_breaker(server):
+    """
+    Get the circuit breaker for a server, creating it on first use.
+
+    Args:
+        server: Server origin as returned by server_of()
+
+    Returns:
+        breaker.CircuitBreaker: The server's breaker
+    """
+    server_breaker = breakers.get(server)
+    if server_breaker is None:
+        with _lock:
+            server_breaker = breakers.setdefault(server, breaker.CircuitBreaker())
+    return server_breaker
+
+
+def get(url, **kwargs):
+    """
+    HTTP GET through the pooled session of the URL's server.
+
+    Fails fast with breaker.CircuitOpenError while the server's breaker is open.
+
+    Args:
+        url: URL to request
+        **kwargs: Passed through to requests.Session.get
+
+    Returns:
+        requests.Response: The response
+    """
+    server = server_of(url)
+    server_breaker = get_breaker(server)
+    if not server_breaker.allow():
+        msg = f"circuit open for {server}"
+        raise breaker.CircuitOpenError(msg)
+    # allowed while open, this request is the probe
+    probe = server_breaker.is_open
+
+    session = get_session(server)
+    kwargs.setdefault("timeout", timeout)
+    try:
+        response = session.get(url, **kwargs)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        if server_breaker.record_failure():
+            print(f"UNREACHABLE: {server} after {server_breaker.failures} connection failures, probing every {server_breaker.backoff}s")
+            metrics_utility.set("alpaca_server_circuit_open", 1, {"server": server})
+        raise
+    except Exception:
+        # a probe that fails any other way is still a failed probe, the breaker
+        # would otherwise wait for its result forever
+        if probe:
+            server_breaker.record_failure()
+        raise
+
+    if server_breaker.record_success():
+        print(f"REACHABLE: {server}")
+        metrics_utility.set("alpaca_server_circuit_open", 0, {"server": server})
+    # connection use is worked out once per cycle by flush_connection_counts
+    with _lock:
+        requests_sent[server] = requests_sent.get(server, 0) + 1
+    return response
+
+
+def flush_connection_counts():
+    """
+    Count the requests since the last flush as opening a new connection or reusing one.
+
+    Each connection opened to a server since the last flush was opened by one
+    request, the other requests reused a connection.  Call once per collection
+    cycle, before request_counters.flush.
+    """
+    with _lock:
+        sent = dict(requests_sent)
+        opened = dict(connections_opened)
+        requests_sent.clear()
+        connections_opened.clear()
+
+    for server, count in sent.items():
+        parts = urlsplit(server)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        new = min(opened.get((parts.hostname, port), 0), count)
+        request_counters.add_connections(server, new, count - new)
@@ -0,0 +1,156 @@
+"""
+Warm start of /metrics after a restart.
+
+Device gauges of the last published cycle are saved to a file.  At startup they
+are loaded back into the device collector and published before the first
+cycle, so /metrics serves the last-known values right away instead of nothing
+until every device was polled.
+
+Restored values are marked: alpaca_exporter_restored is 1 while any are served
+and alpaca_exporter_snapshot_timestamp_seconds tells when they were collected.
+Live values replace restored ones when the first cycle is published, like any
+other cycle.  Restored series no device reported in that cycle are removed.
+"""
+
+import json
+import time
+from pathlib import Path
+
+from prometheus_client.core import REGISTRY, Metric
+
+import constants
+import label_set
+
+# bump when the file layout changes, files of other versions are ignored
+VERSION = 1
+
+
+class WarmStart:
+    """
+    Save and restore device gauges, and export their freshness.
+
+    Args:
+        path: File the gauges are kept in
+        save_interval: Seconds between saves
+    """
+
+    def __init__(self, path, save_interval=constants.SNAPSHOT_SAVE_INTERVAL):
+        self.path = path
+        self.save_interval = save_interval
+        self.saved_at = None
+        # (metric_name, LabelSet) restored and not yet confirmed by a live value
+        self.restored = set()
+        # when the restored values were collected, None if nothing is restored
+        self.timestamp = None
+
+    def restore(self, collector):
+        """
+        Load saved gauges into the collector and publish them.
+
+        Args:
+            collector: DeviceCollector to load the gauges into
+
+        Returns:
+            int: Number of series restored
+        """
+        try:
+            data = json.loads(Path(self.path).read_bytes())
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Ignoring snapshot file {self.path}: {e}")
+            return 0
+
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            print(f"WARNING: Ignoring snapshot file {self.path}: unsupported version")
+            return 0
+
+        for metric_name, saved_labels, value in data.get("series", []):
+            # label values keep their JSON types, so live values land in the same slot
+            labels = label_set.intern_labels(saved_labels)
+            collector.set(metric_name, value, labels)
+            self.restored.add((metric_name, labels))
+        if self.restored:
+            self.timestamp = data.get("timestamp")
+            collector.publish()
+        return len(self.restored)
+
+    def settle(self, collector, live_series):
+        """
+        Remove restored series not reported during the first cycle.
+
+        Call once the first cycle is complete, before publishing it.
+
+        Args:
+            collector: DeviceCollector holding the restored gauges
+            live_series: Set of (metric_name, LabelSet) reported this cycle
+
+        Returns:
+            int: Number of restored series removed
+        """
+        stale = self.restored - live_series
+        for metric_name, labels in stale:
+            collector.release(metric_name, labels)
+        self.restored = set()
+        self.timestamp = None
+        return len(stale)
+
+    def save(self, collector, now=None):
+        """
+        Save the collector's gauges if the save interval has passed.
+
+        Call after publishing a complete cycle.
+
+        Args:
+            collector: DeviceCollector to save
+            now: Current time in seconds (optional, for testing)
+
+        Returns:
+            bool: True if the file was written
+        """
+        now = time.time() if now is None else now
+        if self.saved_at is not None and now - self.saved_at < self.save_interval:
+            return False
+
+        series = [[metric_name, dict(labels), value] for metric_name, labels, value in collector.series()]
+        content = json.dumps({"version": VERSION, "timestamp": now, "series": series}, separators=(",", ":")).encode()
+
+        # write a new file and swap it in, a crash never leaves a half written snapshot
+        tmp_path = Path(f"{self.path}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            tmp_path.replace(self.path)
+        except OSError as e:
+            print(f"WARNING: Failed to save snapshot file {self.path}: {e}")
+            return False
+        self.saved_at = now
+        return True
+
+    def describe(self):
+        # nothing to describe up front, keeps registration from calling collect()
+        return []
+
+    def collect(self):
+        restored = Metric("alpaca_exporter_restored", "1 while values restored from the last run are served", "gauge")
+        restored.add_sample("alpaca_exporter_restored", {}, 1 if self.timestamp is not None else 0)
+        yield restored
+        if self.timestamp is not None:
+            timestamp = Metric("alpaca_exporter_snapshot_timestamp_seconds", "when the restored values were collected", "gauge")
+            timestamp.add_sample("alpaca_exporter_snapshot_timestamp_seconds", {}, self.timestamp)
+            yield timestamp
+
+
+def enable(path, registry=REGISTRY):
+    """
+    Export snapshot freshness and get a WarmStart to restore and save gauges.
+
+    Args:
+        path: File the gauges are kept in
+        registry: Prometheus registry to register the freshness metrics with
+
+    Returns:
+        WarmStart: The warm start in use
+    """
+    warm = WarmStart(path)
+    registry.register(warm)
+    return warm
@@ -0,0 +1,135 @@
+"""
+Unit tests for the asyncio collection engine
+
+Tests verify devices are polled concurrently, results keep device order,
+calls within a device stay in order and the device state machine is reused.
+"""
+
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import async_engine
+import exporter_core
+
+
+class TestAsyncEngineConcurrency(unittest.TestCase):
+    """Test that devices run in parallel"""
+
+    def setUp(self):
+        self.engine = async_engine.AsyncEngine(max_workers=4)
+
+    def tearDown(self):
+        self.engine.close()
+
+    def test_cycle_time_is_slowest_device(self):
+        """Three devices taking 0.2s each should finish in well under 0.6s"""
+
+        def process(device_type, device_number):
+            time.sleep(0.2)
+            return [[f"{device_type}/{device_number}", {}]]
+
+        start = time.monotonic()
+        results = self.engine.run([("telescope", 0), ("camera", 0), ("focuser", 0)], process)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(len(results), 3)
+        self.assertLess(elapsed, 0.5, "Devices should be polled concurrently")
+
+    def test_results_keep_device_order(self):
+        """Results should come back in the order devices were given, not completion order"""
+
+        def process(device_type, device_number):
+            # first device finishes last
+            time.sleep(0.1 if device_number == 0 else 0)
+            return f"{device_type}/{device_number}"
+
+        results = self.engine.run([("camera", 0), ("camera", 1), ("camera", 2)], process)
+
+        self.assertEqual(results, ["camera/0", "camera/1", "camera/2"])
+
+    def test_calls_within_device_stay_ordered(self):
+        """Attributes of one device should be fetched in configured order"""
+        calls = {}
+        lock = threading.Lock()
+
+        def process(device_type, device_number):
+            for attribute in ["name", "altitude", "azimuth"]:
+                with lock:
+                    calls.setdefault(f"{device_type}/{device_number}", []).append(attribute)
+                time.sleep(0.01)
+
+        self.engine.run([("telescope", 0), ("telescope", 1)], process)
+
+        self.assertEqual(calls["telescope/0"], ["name", "altitude", "azimuth"])
+        self.assertEqual(calls["telescope/1"], ["name", "altitude", "azimuth"])
+
+    def test_exception_propagates(self):
+        """A failing device should surface its exception like the serial loop does"""
+
+        def process(device_type, _device_number):
+            if device_type == "camera":
+                msg = "boom"
+                raise RuntimeError(msg)
+            return []
+
+        with pytest.raises(RuntimeError, match="boom"):
+            self.engine.run([("telescope", 0), ("camera", 0)], process)
+
+    def test_empty_device_list(self):
+        """No devices should return no results"""
+        self.assertEqual(self.engine.run([], lambda _dt, _dn: []), [])
+
+
+class TestAsyncEngineStateMachine(unittest.TestCase):
+    """Test that process_device state tracking works under the async engine"""
+
+    def test_device_status_and_skip_list_per_device(self):
+        """Concurrent devices should each update their own status and skip list"""
+        configurations = {
+            "telescope": {"metric_prefix": "alpaca_telescope_", "metrics": [{"alpaca_name": "altitude"}]},
+        }
+        device_status = {"telescope/1": False}
+        skip_device_attribute = {}
+
+        def mock_get_value(_url, _device_type, device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            if attribute == "name":
+                return "Scope" if device_number == 0 else None
+            return 45.0
+
+        def process(device_type, device_number):
+            return exporter_core.process_device(
+                device_type,
+                device_number,
+                configurations,
+                "http://localhost:11111/api/v1",
+                False,
+                {"telescope": [0, 1]},
+                device_status,
+                skip_device_attribute,
+                mock_get_value,
+                mock_get_value,
+            )
+
+        engine = async_engine.AsyncEngine(max_workers=2)
+        try:
+            results = engine.run([("telescope", 0), ("telescope", 1)], process)
+        finally:
+            engine.close()
+
+        self.assertTrue(device_status["telescope/0"])
+        self.assertFalse(device_status["telescope/1"])
+        self.assertEqual(skip_device_attribute, {"telescope": {"0": []}})
+        self.assertIn("alpaca_telescope_altitude", [m[0] for m in results[0]])
+        self.assertEqual(results[1], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
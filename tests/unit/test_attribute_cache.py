@@ -0,0 +1,190 @@
+"""
+Unit tests for the per-attribute TTL cache
+
+Tests verify each entry expires on its own TTL, failed reads are not cached,
+the cache key ignores record_metrics, and config TTL resolution.
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from importlib import import_module
+
+import attribute_cache
+import constants
+import exporter_core
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAttributeCache(unittest.TestCase):
+    """Test TTL per entry"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("attribute_cache.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = attribute_cache.AttributeCache()
+
+    def test_entries_expire_independently(self):
+        """A long TTL entry should outlive a short TTL entry"""
+        fetch = Mock(side_effect=[100.0, 50.0, 100.0, 60.0])
+
+        self.cache.get("siteelevation", 3600, fetch)
+        self.cache.get("coolerpower", 10, fetch)
+
+        self.clock.now += 11
+        self.assertEqual(self.cache.get("siteelevation", 3600, fetch), 100.0)
+        self.assertEqual(self.cache.get("coolerpower", 10, fetch), 100.0)
+        self.assertEqual(fetch.call_count, 3)
+
+    def test_expired_entry_refetched(self):
+        """Once the TTL passes the value is fetched again"""
+        fetch = Mock(side_effect=[1, 2])
+
+        self.assertEqual(self.cache.get("gain", 60, fetch), 1)
+        self.clock.now += 60
+        self.assertEqual(self.cache.get("gain", 60, fetch), 2)
+
+    def test_none_not_cached(self):
+        """Failed reads should be retried on the next call"""
+        fetch = Mock(side_effect=[None, "Scope"])
+
+        self.assertIsNone(self.cache.get("name", 60, fetch))
+        self.assertEqual(self.cache.get("name", 60, fetch), "Scope")
+
+    def test_maxsize_evicts_oldest(self):
+        """When full the oldest entry is dropped"""
+        cache = attribute_cache.AttributeCache(maxsize=2)
+        cache.put("a", 60, 1)
+        cache.put("b", 60, 2)
+        cache.put("c", 60, 3)
+
+        self.assertEqual(list(cache.entries.keys()), ["b", "c"])
+
+    def test_maxsize_evicts_expired_first(self):
+        """Expired entries are dropped before live ones"""
+        cache = attribute_cache.AttributeCache(maxsize=2)
+        cache.put("short", 1, 1)
+        cache.put("long", 3600, 2)
+        self.clock.now += 2
+        cache.put("new", 60, 3)
+
+        self.assertEqual(set(cache.entries.keys()), {"long", "new"})
+
+    def test_invalidate_device_prefix(self):
+        """invalidate() drops only the matching device's entries"""
+        self.cache.put(("http://a", "switch", 0, "maxswitch", ""), 60, 8)
+        self.cache.put(("http://a", "switch", 0, "getswitchname", "id=1"), 60, "Fan")
+        self.cache.put(("http://a", "switch", 1, "maxswitch", ""), 60, 4)
+        self.cache.put(("http://b", "switch", 0, "maxswitch", ""), 60, 2)
+
+        self.cache.invalidate(("http://a", "switch", 0))
+
+        self.assertEqual(set(self.cache.entries.keys()), {("http://a", "switch", 1, "maxswitch", ""), ("http://b", "switch", 0, "maxswitch", "")})
+
+    def test_clear(self):
+        """clear() empties the cache"""
+        self.cache.put("a", 60, 1)
+        self.cache.clear()
+
+        self.assertEqual(self.cache.entries, {})
+
+
+class TestCacheTtlOf(unittest.TestCase):
+    """Test TTL resolution from config"""
+
+    def test_not_cached(self):
+        self.assertEqual(exporter_core.cache_ttl_of({"alpaca_name": "altitude"}), 0)
+
+    def test_legacy_cached_flag_uses_default(self):
+        self.assertEqual(exporter_core.cache_ttl_of({"alpaca_name": "sideofpier", "cached": 1}), constants.DEFAULT_CACHE_TTL)
+
+    def test_cache_ttl_wins(self):
+        self.assertEqual(exporter_core.cache_ttl_of({"alpaca_name": "siteelevation", "cached": 1, "cache_ttl": 3600}), 3600)
+
+    def test_cache_ttl_alone(self):
+        self.assertEqual(exporter_core.cache_ttl_of({"alpaca_name": "coolerpower", "cache_ttl": 10}), 10)
+
+    def test_configured_ttl_passed_to_cached_fn(self):
+        """A planned attribute should hand the TTL to the cached getter"""
+        cached_fn = Mock(return_value=100.0)
+
+        attribute = exporter_core.plan_attribute(
+            {"alpaca_name": "siteelevation", "cache_ttl": 3600},
+            "siteelevation",
+            "http://localhost:11111/api/v1",
+            "telescope",
+            0,
+            querystr="",
+            get_value_fn=Mock(),
+            get_value_cached_fn=cached_fn,
+        )
+
+        self.assertEqual(exporter_core.fetch_planned(attribute), 100.0)
+        cached_fn.assert_called_once_with("http://localhost:11111/api/v1", "telescope", 0, "siteelevation", "", ttl=3600, request_url=attribute.url)
+
+
+class TestGetValueCachedKey(unittest.TestCase):
+    """Test getValueCached cache key"""
+
+    @patch("requests.Session.get")
+    def test_record_metrics_shares_entry(self, mock_get):
+        """Calls differing only in record_metrics should hit the same cache entry"""
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.value_cache.clear()
+        alpaca_exporter.skip_device_attribute = {}
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({"Value": "Driver 1.0", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
+        mock_get.return_value = mock_response
+
+        alpaca_exporter.getValueCached("http://localhost:11111/api/v1", "telescope", 0, "driverversion", "", True)
+        alpaca_exporter.getValueCached("http://localhost:11111/api/v1", "telescope", 0, "driverversion", "", False)
+
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("requests.Session.get")
+    def test_planned_url_requested(self, mock_get):
+        """The url of a planned attribute is requested as is"""
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.value_cache.clear()
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({"Value": 3600.0, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
+        mock_get.return_value = mock_response
+
+        attribute = exporter_core.plan_attribute(
+            {"alpaca_name": "siteelevation", "cache_ttl": 3600},
+            "siteelevation",
+            "http://localhost:11111/api/v1",
+            "telescope",
+            0,
+            querystr="",
+            get_value_fn=alpaca_exporter.getValue,
+            get_value_cached_fn=alpaca_exporter.getValueCached,
+        )
+
+        self.assertEqual(exporter_core.fetch_planned(attribute), 3600.0)
+        self.assertEqual(mock_get.call_args.args[0], "http://localhost:11111/api/v1/telescope/0/siteelevation?")
+
+
+if __name__ == "__main__":
+    unittest.main()
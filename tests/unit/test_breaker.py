@@ -0,0 +1,175 @@
+"""
+Unit tests for the per-server circuit breaker
+
+Tests verify the breaker opens after consecutive connection failures, lets a
+single probe through per backoff interval with exponential backoff, and that
+devices on an open breaker are reported disconnected without a request.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import requests
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from importlib import import_module
+
+import breaker
+import exporter_core
+import transport
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test breaker state changes"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("breaker.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = breaker.CircuitBreaker(failure_threshold=3, base_backoff=10, max_backoff=40, jitter=0)
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        """Breaker stays closed below the threshold and opens on reaching it"""
+        self.assertFalse(self.breaker.record_failure())
+        self.assertFalse(self.breaker.record_failure())
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.record_failure())
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_failure_count(self):
+        """Failures must be consecutive to open the breaker"""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.record_success())
+        self.breaker.record_failure()
+
+        self.assertFalse(self.breaker.is_open)
+
+    def test_single_probe_after_backoff(self):
+        """Only one request is allowed once the backoff has elapsed"""
+        self.open_breaker()
+        self.clock.now += 10
+
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow(), "Only one probe at a time")
+
+    def test_failed_probe_doubles_backoff(self):
+        """Backoff doubles after each failed probe up to the max"""
+        self.open_breaker()
+        backoffs = []
+        for _ in range(4):
+            self.clock.now += self.breaker.backoff
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+            backoffs.append(self.breaker.backoff)
+
+        self.assertEqual(backoffs, [20, 40, 40, 40])
+        self.clock.now += 39
+        self.assertFalse(self.breaker.allow())
+
+    def test_successful_probe_closes(self):
+        """A successful probe closes the breaker and resets the backoff"""
+        self.open_breaker()
+        self.clock.now += 10
+        self.breaker.allow()
+
+        self.assertTrue(self.breaker.record_success())
+        self.assertFalse(self.breaker.is_open)
+        self.assertEqual(self.breaker.backoff, 10)
+        self.assertTrue(self.breaker.allow())
+
+    def test_jitter_bounds(self):
+        """Jittered backoff stays within the configured fraction"""
+        jittered = breaker.CircuitBreaker(base_backoff=10, jitter=0.2)
+        for _ in range(50):
+            self.assertTrue(8 <= jittered._jittered(10) <= 12)
+
+
+class TestTransportBreaker(unittest.TestCase):
+    """Test that the transport fails fast for an unreachable server"""
+
+    def setUp(self):
+        transport.configure()
+
+    def tearDown(self):
+        transport.configure()
+
+    @patch("transport.metrics_utility.set")
+    @patch("builtins.print")
+    @patch("requests.Session.get")
+    def test_open_breaker_skips_requests(self, mock_get, mock_print, mock_set):
+        """After the threshold no further requests reach the dead server"""
+        mock_get.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        url = "http://dead:11111/api/v1/telescope/0/name?"
+
+        for _ in range(3):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                transport.get(url)
+        with pytest.raises(breaker.CircuitOpenError):
+            transport.get(url)
+
+        self.assertEqual(mock_get.call_count, 3)
+        mock_set.assert_called_with("alpaca_server_circuit_open", 1, {"server": "http://dead:11111"})
+        self.assertTrue(any("UNREACHABLE" in str(call) for call in mock_print.call_args_list))
+
+    @patch("requests.Session.get")
+    def test_probe_failing_otherwise_counts_as_failed(self, mock_get):
+        """A probe raising something other than a connection error does not block later probes"""
+        clock = FakeClock()
+        server_breaker = transport.get_breaker("http://flaky:11111")
+        server_breaker.open_until = clock.now
+        mock_get.side_effect = requests.exceptions.ChunkedEncodingError("Connection broken")
+
+        with patch("time.monotonic", clock), pytest.raises(requests.exceptions.ChunkedEncodingError):
+            transport.get("http://flaky:11111/api/v1/telescope/0/name?")
+
+        self.assertFalse(server_breaker.probing)
+        clock.now += server_breaker.max_backoff * 2
+        with patch("time.monotonic", clock):
+            self.assertTrue(server_breaker.allow())
+
+    @patch("requests.Session.get")
+    def test_other_servers_unaffected(self, mock_get):
+        """An open breaker for one server does not block another"""
+        transport.get_breaker("http://dead:11111").open_until = float("inf")
+
+        transport.get("http://alive:11111/api/v1/telescope/0/name?")
+
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch("requests.Session.get")
+    def test_get_value_marks_device_disconnected(self, mock_get):
+        """getValue reports the device not connected without a request while open"""
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.skip_device_attribute = {}
+        transport.get_breaker("http://dead:11111").open_until = float("inf")
+
+        with pytest.raises(exporter_core.DeviceNotConnectedError):
+            alpaca_exporter.getValue("http://dead:11111/api/v1", "telescope", 0, "name", "", False)
+
+        mock_get.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
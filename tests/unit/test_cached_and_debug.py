@@ -1,14 +1,13 @@
 # Generated By: Cursor (Claude Sonnet 4.5)
 """
-Unit tests for cached getValue and debug functions
+Unit tests for cached getValue and discovery messages
 
-Tests verify caching behavior and debug logging functionality.
+Tests verify caching behavior and the messages printed for skipped devices.
 """
 
 import json
 import sys
 import unittest
-from io import StringIO
 from pathlib import Path
 from unittest.mock import Mock, patch
 
@@ -19,17 +18,18 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 class TestGetValueCached(unittest.TestCase):
     """Test the cached version of getValue"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_value_cached_makes_request_on_first_call(self, mock_get):
         """Test that first call to cached getValue makes HTTP request"""
         from importlib import import_module
 
         alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.value_cache.clear()
 
         # Mock successful response
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         # First call - should hit the network
@@ -45,7 +45,7 @@ class TestGetValueCached(unittest.TestCase):
         self.assertEqual(value1, "TestDevice")
         self.assertEqual(mock_get.call_count, 1, "First call should make HTTP request")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_value_cached_uses_cache_on_second_call(self, mock_get):
         """Test that second call within TTL uses cache"""
         from importlib import import_module
@@ -53,13 +53,12 @@ class TestGetValueCached(unittest.TestCase):
         alpaca_exporter = import_module("alpaca-exporter")
 
         # Clear the cache
-        if hasattr(alpaca_exporter.getValueCached, "cache_clear"):
-            alpaca_exporter.getValueCached.cache_clear()
+        alpaca_exporter.value_cache.clear()
 
         # Mock successful response
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         # First call
@@ -88,53 +87,10 @@ class TestGetValueCached(unittest.TestCase):
         self.assertEqual(mock_get.call_count, 1, "Second call should use cache, not make another request")
 
 
-class TestDebugFunction(unittest.TestCase):
-    """Test the debug() logging function"""
-
-    def test_debug_prints_when_enabled(self):
-        """Test that debug() prints messages when DEBUG is True"""
-        from importlib import import_module
-
-        alpaca_exporter = import_module("alpaca-exporter")
-
-        # Enable debug mode
-        alpaca_exporter.DEBUG = True
-
-        # Capture stdout
-        captured_output = StringIO()
-
-        with patch("sys.stdout", new=captured_output):
-            alpaca_exporter.debug("Test debug message")
-
-        output = captured_output.getvalue()
-        self.assertIn("Test debug message", output, "Debug message should be printed when DEBUG=True")
-
-        # Reset DEBUG
-        alpaca_exporter.DEBUG = False
-
-    def test_debug_silent_when_disabled(self):
-        """Test that debug() doesn't print when DEBUG is False"""
-        from importlib import import_module
-
-        alpaca_exporter = import_module("alpaca-exporter")
-
-        # Disable debug mode
-        alpaca_exporter.DEBUG = False
-
-        # Capture stdout
-        captured_output = StringIO()
-
-        with patch("sys.stdout", new=captured_output):
-            alpaca_exporter.debug("Test debug message")
-
-        output = captured_output.getvalue()
-        self.assertEqual(output, "", "Debug message should NOT be printed when DEBUG=False")
-
-
 class TestDiscoverDevicesSkippedMessage(unittest.TestCase):
     """Test that discoverDevices logs SKIPPED for unsupported device types"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     @patch("builtins.print")
     def test_discover_skips_unsupported_device_with_verbose(self, mock_print, mock_get):
         """Test that unsupported devices log SKIPPED message in verbose mode"""
@@ -158,7 +114,7 @@ class TestDiscoverDevicesSkippedMessage(unittest.TestCase):
             "ErrorNumber": 0,
             "ErrorMessage": "",
         }
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         # Call with verbose=True
@@ -170,7 +126,7 @@ class TestDiscoverDevicesSkippedMessage(unittest.TestCase):
 
         self.assertTrue(skipped_found, "Should log SKIPPED message for unsupported device type in verbose mode")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     @patch("builtins.print")
     def test_discover_silent_skip_without_verbose(self, mock_print, mock_get):
         """Test that unsupported devices are silently skipped when verbose=False"""
@@ -194,7 +150,7 @@ class TestDiscoverDevicesSkippedMessage(unittest.TestCase):
             "ErrorNumber": 0,
             "ErrorMessage": "",
         }
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         # Reset mock
@@ -0,0 +1,118 @@
+"""
+Unit tests for change-only gauge updates
+
+Tests verify unchanged values are not written again, changes are counted per
+attribute, and a series starts fresh when its labels change or it goes missing.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import device_collector
+import exporter_core
+import label_set
+import metric_index
+import request_counters
+
+LABELS = label_set.intern_labels({"device_type": "telescope", "device_number": 0, "name": "Scope"})
+
+
+def plan(values):
+    return exporter_core.plan_metrics(
+        [{"alpaca_name": "sideofpier"}],
+        "alpaca_telescope_",
+        "http://localhost:11111/api/v1",
+        "telescope",
+        0,
+        querystr="",
+        get_value_fn=Mock(side_effect=values),
+        get_value_cached_fn=Mock(),
+    )
+
+
+class TestChangeOnly(unittest.TestCase):
+    """Test writes and change counting"""
+
+    def setUp(self):
+        self.counters = request_counters.RequestCounters()
+        patcher = patch("request_counters.counters", self.counters)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def changes(self):
+        return self.counters.pending.get((request_counters.CHANGES, None, "telescope", 0, "sideofpier"), 0)
+
+    @patch("metrics_utility.set")
+    def test_unchanged_value_not_written(self, mock_set):
+        """Only the first value and real changes are written, every cycle still reports the series"""
+        planned = plan([0, 0, 0, 1, 1])
+
+        for _ in range(5):
+            collected = exporter_core.collect_planned_metrics(LABELS, planned)
+            self.assertEqual(collected, [["alpaca_telescope_sideofpier", LABELS]])
+
+        self.assertEqual([c.args[1] for c in mock_set.call_args_list], [0, 1])
+        self.assertEqual(self.changes(), 1)
+
+    def test_collector_slot_written_on_change(self):
+        """With the array collector unchanged values skip the store"""
+        collector = device_collector.DeviceCollector()
+        planned = plan([5.0, 5.0, 6.0])
+
+        with patch("device_collector.collector", collector), patch.object(collector, "store", wraps=collector.store) as mock_store:
+            for _ in range(3):
+                exporter_core.collect_planned_metrics(LABELS, planned)
+
+        self.assertEqual([c.args[1] for c in mock_store.call_args_list], [5.0, 6.0])
+        self.assertEqual(collector.values[planned[0].slot], 6.0)
+
+    @patch("metrics_utility.set")
+    def test_missing_value_restarts_series(self, mock_set):
+        """After a cycle without a value the next value is written and not counted as a change"""
+        planned = plan([0, None, 0])
+
+        for _ in range(3):
+            exporter_core.collect_planned_metrics(LABELS, planned)
+
+        self.assertEqual([c.args[1] for c in mock_set.call_args_list], [0, 0])
+        self.assertEqual(self.changes(), 0)
+
+    def test_missing_value_releases_slot(self):
+        """A series removed as stale gets a new slot, another series may own the old one by then"""
+        collector = device_collector.DeviceCollector()
+        planned_x = plan([1.0, None, 2.0, 3.0])
+        planned_y = plan([50.0])
+        planned_y[0].name = "alpaca_telescope_y"
+        index = metric_index.MetricIndex()
+
+        with patch("device_collector.collector", collector):
+            for cycle in range(4):
+                collected = exporter_core.collect_planned_metrics(LABELS, planned_x)
+                index.update("x", collected)
+                if cycle == 1:
+                    # takes the slot freed by the missing value
+                    index.update("y", exporter_core.collect_planned_metrics(LABELS, planned_y))
+
+        series = {name: value for name, _, value in collector.series()}
+        self.assertEqual(series, {"alpaca_telescope_sideofpier": 3.0, "alpaca_telescope_y": 50.0})
+
+    @patch("metrics_utility.set")
+    def test_new_labels_restart_series(self, mock_set):
+        """A label change is a new series, its first value is written"""
+        planned = plan([0, 0])
+        renamed = label_set.intern_labels({"device_type": "telescope", "device_number": 0, "name": "Renamed"})
+
+        exporter_core.collect_planned_metrics(LABELS, planned)
+        exporter_core.collect_planned_metrics(renamed, planned)
+
+        self.assertEqual([c.args[2] for c in mock_set.call_args_list], [LABELS, renamed])
+        self.assertEqual(self.changes(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
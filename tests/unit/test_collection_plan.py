@@ -0,0 +1,149 @@
+"""
+Unit tests for compiled collection plans
+
+Tests verify the configuration is compiled once per device connection, metric
+names and fetch policies are resolved up front, and attributes reported as not
+implemented (1024) are dropped from the plan.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import exporter_core
+
+CONFIGURATIONS = {
+    "global": {"labels": [{"alpaca_name": "driverversion", "cache_ttl": 3600}]},
+    "camera": {
+        "metric_prefix": "alpaca_camera_",
+        "metrics": [
+            {"alpaca_name": "ccdtemperature", "metric_name": "sensor_temperature"},
+            {"alpaca_name": "cooleron"},
+            {"alpaca_name": "gain", "cached": 1},
+        ],
+    },
+}
+
+
+class FakeDevice:
+    """Device answering like getValue, 'cooleron' is not implemented"""
+
+    def __init__(self, skip_device_attribute):
+        self.skip_device_attribute = skip_device_attribute
+        self.requested = []
+        self.connected = True
+
+    def get_value(self, _url, device_type, device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+        self.requested.append(attribute)
+        if attribute == "name":
+            return "Camera" if self.connected else None
+        if attribute == "cooleron":
+            self.skip_device_attribute.setdefault(device_type, {}).setdefault(str(device_number), []).append(attribute)
+            return None
+        return 1.0
+
+
+class TestPlanAttributes(unittest.TestCase):
+    """Test configuration resolution"""
+
+    def test_metric_names_and_fetch_policies(self):
+        """Metric names, TTLs and scheduler keys are resolved at compile time"""
+        get_value = Mock(return_value=1.0)
+        get_value_cached = Mock(return_value=2.0)
+
+        planned = exporter_core.plan_metrics(
+            CONFIGURATIONS["camera"]["metrics"],
+            "alpaca_camera_",
+            "http://localhost:11111/api/v1",
+            "camera",
+            0,
+            querystr="",
+            get_value_fn=get_value,
+            get_value_cached_fn=get_value_cached,
+        )
+
+        self.assertEqual([a.name for a in planned], ["alpaca_camera_sensor_temperature", "alpaca_camera_cooleron", "alpaca_camera_gain"])
+        self.assertEqual(planned[2].key, ("http://localhost:11111/api/v1", "camera", 0, "gain", ""))
+        self.assertEqual(planned[2].url, "http://localhost:11111/api/v1/camera/0/gain?")
+        self.assertEqual(exporter_core.fetch_planned(planned[2]), 2.0)
+        get_value_cached.assert_called_once_with("http://localhost:11111/api/v1", "camera", 0, "gain", "", ttl=60, request_url="http://localhost:11111/api/v1/camera/0/gain?")
+        get_value.assert_not_called()
+
+    def test_prune_removes_skipped(self):
+        """prune() drops skipped attributes and remembers how many it saw"""
+        plan = exporter_core.compile_device_plan(CONFIGURATIONS, "camera", 0, "http://localhost:11111/api/v1", get_value_fn=Mock(), get_value_cached_fn=Mock())
+        plan.compile_groups(CONFIGURATIONS, "http://localhost:11111/api/v1", 0, get_value_fn=Mock(), get_value_cached_fn=Mock())
+
+        plan.prune(["cooleron", "driverversion"])
+
+        self.assertEqual(plan.global_labels, [])
+        self.assertEqual([a.alpaca_name for a in plan.groups[0][2]], ["ccdtemperature", "gain"])
+        self.assertEqual(plan.skipped, 2)
+
+
+class TestPlanLifecycle(unittest.TestCase):
+    """Test plans across collection cycles"""
+
+    def setUp(self):
+        self.skip_device_attribute = {}
+        self.device_status = {}
+        self.plans = {}
+        self.device = FakeDevice(self.skip_device_attribute)
+
+    def cycle(self):
+        with patch("exporter_core.metrics_utility.set"), patch("builtins.print"):
+            return exporter_core.process_device(
+                "camera",
+                0,
+                CONFIGURATIONS,
+                "http://localhost:11111/api/v1",
+                False,
+                {"camera": [0]},
+                self.device_status,
+                self.skip_device_attribute,
+                self.device.get_value,
+                self.device.get_value,
+                plans=self.plans,
+            )
+
+    def test_compiled_once_per_connection(self):
+        """A connected device reuses its plan every cycle"""
+        with patch("exporter_core.compile_device_plan", wraps=exporter_core.compile_device_plan) as mock_compile:
+            self.cycle()
+            plan = self.plans["camera/0"]
+            self.cycle()
+            self.cycle()
+
+        self.assertEqual(mock_compile.call_count, 1)
+        self.assertIs(self.plans["camera/0"], plan)
+
+    def test_not_implemented_removed_from_plan(self):
+        """After a 1024 the attribute is not requested again while connected"""
+        self.cycle()
+        self.device.requested.clear()
+        metrics = self.cycle()
+
+        self.assertNotIn("cooleron", self.device.requested)
+        self.assertNotIn("alpaca_camera_cooleron", [m[0] for m in metrics])
+
+    def test_plan_dropped_on_disconnect(self):
+        """Reconnecting compiles a fresh plan, so dropped attributes are tried again"""
+        self.cycle()
+        self.device.connected = False
+        self.cycle()
+        self.assertNotIn("camera/0", self.plans)
+
+        self.device.connected = True
+        self.skip_device_attribute.clear()
+        self.device.requested.clear()
+        self.cycle()
+
+        self.assertIn("cooleron", self.device.requested)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -256,7 +256,7 @@ class TestConfigurationFileAccess(unittest.TestCase):
 class TestRuntimeDeviceDiscovery(unittest.TestCase):
     """Test runtime device discovery (new devices added while running)"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_new_device_discovered_during_runtime(self, mock_get):
         """
         Test that new devices discovered during runtime are properly handled.
@@ -276,9 +276,9 @@ class TestRuntimeDeviceDiscovery(unittest.TestCase):
         # First discovery: telescope only
         mock_response_1 = Mock()
         mock_response_1.status_code = 200
-        mock_response_1.text = json.dumps(
+        mock_response_1.content = json.dumps(
             {"Value": [{"DeviceType": "Telescope", "DeviceNumber": 0, "DeviceName": "TestTelescope", "UniqueID": "tel-001"}], "ErrorNumber": 0, "ErrorMessage": ""}
-        )
+        ).encode()
         mock_get.return_value = mock_response_1
 
         discovered_1 = alpaca_exporter.discoverDevices(alpaca_base_url="http://localhost:11111/api/v1", verbose=False)
@@ -289,7 +289,7 @@ class TestRuntimeDeviceDiscovery(unittest.TestCase):
         # Second discovery: telescope and camera
         mock_response_2 = Mock()
         mock_response_2.status_code = 200
-        mock_response_2.text = json.dumps(
+        mock_response_2.content = json.dumps(
             {
                 "Value": [
                     {"DeviceType": "Telescope", "DeviceNumber": 0, "DeviceName": "TestTelescope", "UniqueID": "tel-001"},
@@ -298,7 +298,7 @@ class TestRuntimeDeviceDiscovery(unittest.TestCase):
                 "ErrorNumber": 0,
                 "ErrorMessage": "",
             }
-        )
+        ).encode()
         mock_get.return_value = mock_response_2
 
         discovered_2 = alpaca_exporter.discoverDevices(alpaca_base_url="http://localhost:11111/api/v1", verbose=False)
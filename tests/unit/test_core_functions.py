@@ -18,7 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 class TestGetValue(unittest.TestCase):
     """Test the getValue function"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_value_success(self, mock_get):
         """Test successful value retrieval from Alpaca API"""
         # Import here to ensure path is set
@@ -26,7 +26,7 @@ class TestGetValue(unittest.TestCase):
         # Mock a successful Alpaca API response
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         # Import and test
@@ -53,7 +53,7 @@ class TestGetValue(unittest.TestCase):
         # Verify the returned value matches the mocked response
         self.assertEqual(value, "TestTelescope")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_value_error_1024(self, mock_get):
         """
         Test error 1024 (not implemented) handling.
@@ -65,7 +65,7 @@ class TestGetValue(unittest.TestCase):
         # Mock an Alpaca API response with error 1024 (not implemented)
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": None, "ErrorNumber": 1024, "ErrorMessage": "Not implemented"})
+        mock_response.content = json.dumps({"Value": None, "ErrorNumber": 1024, "ErrorMessage": "Not implemented"}).encode()
         mock_get.return_value = mock_response
 
         # Import and test
@@ -86,7 +86,7 @@ class TestGetValue(unittest.TestCase):
         # Error 1024 should return None (not an error, just not available)
         self.assertIsNone(value)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_get_value_boolean_conversion(self, mock_get):
         """
         Test boolean to integer conversion.
@@ -99,7 +99,7 @@ class TestGetValue(unittest.TestCase):
         # Mock an Alpaca API response with a boolean value
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": True, "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": True, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         # Import and test
@@ -124,7 +124,7 @@ class TestGetValue(unittest.TestCase):
 class TestDiscoverDevices(unittest.TestCase):
     """Test the discoverDevices function"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discover_devices_success(self, mock_get):
         """
         Test successful device discovery via Alpaca Management API.
@@ -146,7 +146,7 @@ class TestDiscoverDevices(unittest.TestCase):
             "ErrorNumber": 0,
             "ErrorMessage": "",
         }
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         # Import and test
@@ -171,7 +171,7 @@ class TestDiscoverDevices(unittest.TestCase):
         self.assertIn(0, discovered["camera"], "Camera device #0 should be in the list")
         self.assertIn(0, discovered["rotator"], "Rotator device #0 should be in the list")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discover_devices_empty(self, mock_get):
         """
         Test discovery when no devices are configured.
@@ -184,7 +184,7 @@ class TestDiscoverDevices(unittest.TestCase):
         mock_response = Mock()
         mock_response.status_code = 200
         devices_data = {"Value": [], "ErrorNumber": 0, "ErrorMessage": ""}
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         # Import and test
@@ -19,7 +19,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 class TestSkipListBehavior(unittest.TestCase):
     """Test skip list behavior for error 1024 (not implemented)"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_true_converts_to_1(self, mock_get):
         """
         Test that boolean True converts to integer 1.
@@ -33,7 +33,7 @@ class TestSkipListBehavior(unittest.TestCase):
         # Mock response with True value
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": True, "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": True, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         value = alpaca_exporter.getValue(
@@ -48,7 +48,7 @@ class TestSkipListBehavior(unittest.TestCase):
         self.assertEqual(value, 1, "Boolean True should convert to integer 1")
         self.assertIsInstance(value, int, "Converted value should be an integer type")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_false_converts_to_0(self, mock_get):
         """
         Test that boolean False converts to integer 0.
@@ -62,7 +62,7 @@ class TestSkipListBehavior(unittest.TestCase):
         # Mock response with False value
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": False, "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": False, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         value = alpaca_exporter.getValue(
@@ -81,7 +81,7 @@ class TestSkipListBehavior(unittest.TestCase):
 class TestNumericValues(unittest.TestCase):
     """Test handling of numeric values (integers and floats)"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_integer_value_unchanged(self, mock_get):
         """
         Test that integer values pass through unchanged.
@@ -95,7 +95,7 @@ class TestNumericValues(unittest.TestCase):
         # Mock response with integer value
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": 42, "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": 42, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         value = alpaca_exporter.getValue(
@@ -109,7 +109,7 @@ class TestNumericValues(unittest.TestCase):
 
         self.assertEqual(value, 42, "Integer value should be unchanged")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_float_value_unchanged(self, mock_get):
         """
         Test that float values pass through unchanged.
@@ -123,7 +123,7 @@ class TestNumericValues(unittest.TestCase):
         # Mock response with float value
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": 15.3, "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": 15.3, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         value = alpaca_exporter.getValue(
@@ -0,0 +1,165 @@
+"""
+Unit tests for the array-backed device gauge collector
+
+Tests verify slots are allocated once per series and reused, values that are
+not numbers never raise, removed series free their slot, and scrapes render the
+last published snapshot of the slot arrays.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import device_collector
+import exporter_core
+import label_set
+
+LABELS = {"device_type": "camera", "device_number": 0, "name": "Cam"}
+
+
+class TestDeviceCollector(unittest.TestCase):
+    """Test slot handling"""
+
+    def setUp(self):
+        self.collector = device_collector.DeviceCollector(capacity=2)
+
+    def test_slot_reused_for_same_series(self):
+        """The same name and labels always map to the same slot"""
+        slot = self.collector.slot("alpaca_camera_gain", LABELS)
+
+        self.assertEqual(self.collector.slot("alpaca_camera_gain", dict(LABELS)), slot)
+        self.assertNotEqual(self.collector.slot("alpaca_camera_offset", LABELS), slot)
+
+    def test_store_and_clear(self):
+        """Numbers are stored, anything else clears the slot without raising"""
+        slot = self.collector.slot("alpaca_camera_gain", LABELS)
+        self.collector.store(slot, 100)
+        self.assertEqual((self.collector.values[slot], self.collector.present[slot]), (100.0, 1))
+
+        self.collector.store(slot, None)
+        self.assertEqual(self.collector.present[slot], 0)
+        self.collector.store(slot, "not a number")
+        self.assertEqual(self.collector.present[slot], 0)
+
+    def test_grows_and_reuses_released_slots(self):
+        """Running out of slots grows the arrays, released slots are handed out again"""
+        slots = [self.collector.slot(f"alpaca_metric_{i}", LABELS) for i in range(5)]
+
+        self.assertEqual(len(set(slots)), 5)
+        self.assertGreaterEqual(len(self.collector.values), 5)
+
+        self.collector.release("alpaca_metric_2", LABELS)
+        self.assertEqual(self.collector.slot("alpaca_metric_new", LABELS), slots[2])
+
+    def test_set_none_removes_series(self):
+        """set() with None behaves like metrics_utility.set, unknown series are ignored"""
+        self.collector.set("alpaca_camera_gain", 100, LABELS)
+        self.collector.set("alpaca_camera_gain", None, LABELS)
+        self.collector.set("alpaca_camera_never_set", None, LABELS)
+
+        self.assertEqual(self.collector.slots, {})
+
+    def test_exposition(self):
+        """Scrapes render every present slot, grouped by metric name"""
+        registry = CollectorRegistry()
+        registry.register(self.collector)
+        self.collector.set("alpaca_camera_gain", 100, LABELS)
+        self.collector.set("alpaca_camera_gain", 200, {"device_type": "camera", "device_number": 1, "name": "Cam2"})
+        self.collector.set("alpaca_device_connected", 1, {"device_type": "camera", "device_number": 0})
+        self.collector.store(self.collector.slot("alpaca_camera_offset", LABELS), None)
+        self.collector.publish()
+
+        text = generate_latest(registry).decode()
+
+        self.assertIn('alpaca_camera_gain{device_number="0",device_type="camera",name="Cam"} 100.0', text)
+        self.assertIn('alpaca_camera_gain{device_number="1",device_type="camera",name="Cam2"} 200.0', text)
+        self.assertIn("# TYPE alpaca_device_connected gauge", text)
+        self.assertNotIn("alpaca_camera_offset", text)
+
+
+class TestSnapshot(unittest.TestCase):
+    """Test scrapes only see published cycles"""
+
+    def setUp(self):
+        self.collector = device_collector.DeviceCollector()
+        self.registry = CollectorRegistry()
+        self.registry.register(self.collector)
+
+    def scrape(self):
+        return generate_latest(self.registry).decode()
+
+    def test_nothing_before_first_publish(self):
+        self.collector.set("alpaca_camera_gain", 100, LABELS)
+
+        self.assertNotIn("alpaca_camera_gain", self.scrape())
+
+    def test_mid_cycle_changes_not_visible(self):
+        """Updates and removals of a cycle in progress are invisible until published"""
+        self.collector.set("alpaca_camera_gain", 100, LABELS)
+        self.collector.set("alpaca_camera_offset", 10, LABELS)
+        self.collector.publish()
+
+        # next cycle, half done
+        self.collector.set("alpaca_camera_gain", 120, LABELS)
+        self.collector.set("alpaca_camera_offset", None, LABELS)
+        text = self.scrape()
+        self.assertIn('alpaca_camera_gain{device_number="0",device_type="camera",name="Cam"} 100.0', text)
+        self.assertIn("alpaca_camera_offset", text)
+
+        self.collector.publish()
+        text = self.scrape()
+        self.assertIn('alpaca_camera_gain{device_number="0",device_type="camera",name="Cam"} 120.0', text)
+        self.assertNotIn("alpaca_camera_offset", text)
+
+    def test_collect_does_not_lock(self):
+        """A scrape completes while the polling side holds the collector lock"""
+        self.collector.set("alpaca_camera_gain", 100, LABELS)
+        self.collector.publish()
+
+        with self.collector._lock:
+            self.assertIn("alpaca_camera_gain", self.scrape())
+
+
+class TestPlannedMetricsWithCollector(unittest.TestCase):
+    """Test collect_planned_metrics writes straight into slots"""
+
+    def setUp(self):
+        self.collector = device_collector.DeviceCollector()
+        patcher = patch("device_collector.collector", self.collector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("metrics_utility.set")
+    def test_slot_cached_on_planned_attribute(self, mock_set):
+        """The slot is looked up once and reused while the label set is unchanged"""
+        planned = exporter_core.plan_metrics(
+            [{"alpaca_name": "gain"}, {"alpaca_name": "offset"}],
+            "alpaca_camera_",
+            "http://localhost:11111/api/v1",
+            "camera",
+            0,
+            querystr="",
+            get_value_fn=Mock(side_effect=[100, None, 110, None]),
+            get_value_cached_fn=Mock(),
+        )
+        labels = label_set.intern_labels(LABELS)
+
+        with patch.object(self.collector, "slot", wraps=self.collector.slot) as mock_slot:
+            first = exporter_core.collect_planned_metrics(labels, planned)
+            second = exporter_core.collect_planned_metrics(labels, planned)
+
+        self.assertEqual(mock_slot.call_count, 1)
+        self.assertEqual(first, [["alpaca_camera_gain", labels]])
+        self.assertEqual(second, first)
+        self.assertEqual(self.collector.values[planned[0].slot], 110.0)
+        mock_set.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""
+Unit tests for UniqueID based device identity
+
+Tests verify renumbered devices are found by UniqueID, and keep their
+connection status, skip list cached values and last polled values under the new device number.
+"""
+
+import sys
+import unittest
+from importlib import import_module
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import attribute_cache
+import device_identity
+import exporter_core
+import scheduler
+
+ALPACA_BASE_URL = "http://localhost:11111/api/v1"
+
+CONFIGURATIONS = {
+    "camera": {
+        "metric_prefix": "alpaca_camera_",
+        "metrics": [{"alpaca_name": "ccdtemperature"}, {"alpaca_name": "coolerpower"}],
+    }
+}
+
+
+class TestFindRenumbered(unittest.TestCase):
+    """Test the UniqueID identity index"""
+
+    def test_moved(self):
+        previous = {"camera/0": "uid-cam", "focuser/0": "uid-foc"}
+        current = {"camera/2": "uid-cam", "focuser/0": "uid-foc"}
+
+        self.assertEqual(device_identity.find_renumbered(previous, current), [("camera", 0, 2)])
+
+    def test_swapped(self):
+        previous = {"camera/0": "uid-a", "camera/1": "uid-b"}
+        current = {"camera/0": "uid-b", "camera/1": "uid-a"}
+
+        self.assertEqual(device_identity.find_renumbered(previous, current), [("camera", 0, 1), ("camera", 1, 0)])
+
+    def test_ambiguous_and_new_ignored(self):
+        """Shared UniqueIDs, new devices and a different device type are not renumbering"""
+        previous = {"camera/0": "uid-shared", "camera/1": "uid-shared", "switch/0": "uid-x"}
+        current = {"camera/2": "uid-shared", "camera/3": "uid-new", "focuser/0": "uid-x"}
+
+        self.assertEqual(device_identity.find_renumbered(previous, current), [])
+        self.assertEqual(device_identity.index_by_unique_id(previous), {"uid-x": "switch/0"})
+
+
+class TestMoveDeviceState(unittest.TestCase):
+    """Test per-device state follows the device"""
+
+    def setUp(self):
+        self.server = exporter_core.ServerState(ALPACA_BASE_URL)
+        self.server.device_status.update({"camera/0": True, "camera/1": False})
+        self.server.skip_device_attribute["camera"] = {"0": ["coolerpower"], "1": []}
+        self.server.all_known_devices["camera"] = [0, 1]
+        self.server.plans.update({"camera/0": Mock(), "camera/1": Mock()})
+
+    def test_swap(self):
+        device_identity.move_device_state(self.server, [("camera", 0, 1), ("camera", 1, 0)])
+
+        self.assertEqual(self.server.device_status, {"camera/0": False, "camera/1": True})
+        self.assertEqual(self.server.skip_device_attribute, {"camera": {"0": [], "1": ["coolerpower"]}})
+        self.assertEqual(self.server.plans, {})
+
+    def test_number_taken_over(self):
+        """The device that had the new number before is forgotten"""
+        self.server.device_status.pop("camera/0")
+        self.server.skip_device_attribute["camera"].pop("0")
+
+        device_identity.move_device_state(self.server, [("camera", 0, 1), ("camera", 1, 2)])
+
+        self.assertEqual(self.server.device_status, {"camera/2": False})
+        self.assertEqual(self.server.skip_device_attribute, {"camera": {"2": []}})
+        self.assertEqual(self.server.all_known_devices, {"camera": [0, 1, 2]})
+
+    def test_renumbered_device_stays_connected(self):
+        """Under its new number the device keeps its skip list and is not reported as a new connection"""
+        device_identity.move_device_state(self.server, [("camera", 0, 3)])
+        get_value = Mock(side_effect=lambda _url, _dt, _dn, attribute, *_args, **_kwargs: "Cam" if attribute == "name" else 1.0)
+
+        with patch("exporter_core.metrics_utility.set"), patch("builtins.print") as mock_print:
+            metrics = exporter_core.process_device(
+                "camera", 3, CONFIGURATIONS, ALPACA_BASE_URL, True, {"camera": [1, 3]}, self.server.device_status, self.server.skip_device_attribute, get_value, get_value
+            )
+
+        mock_print.assert_not_called()
+        self.assertEqual(self.server.skip_device_attribute["camera"]["3"], ["coolerpower"])
+        self.assertIn(["alpaca_camera_ccdtemperature", {"device_type": "camera", "device_number": 3, "name": "Cam"}], metrics)
+
+
+class TestCacheRemap(unittest.TestCase):
+    """Test cached values follow the device"""
+
+    def test_remap(self):
+        cache = attribute_cache.AttributeCache()
+        cache.put((ALPACA_BASE_URL, "camera", 0, "driverversion", ""), 60, "1.0")
+        cache.put((ALPACA_BASE_URL, "camera", 1, "driverversion", ""), 60, "2.0")
+        cache.put((ALPACA_BASE_URL, "focuser", 0, "driverversion", ""), 60, "3.0")
+
+        cache.remap({(ALPACA_BASE_URL, "camera", 0): (ALPACA_BASE_URL, "camera", 1)})
+
+        fetch = Mock(return_value="fresh")
+        self.assertEqual(cache.get((ALPACA_BASE_URL, "camera", 1, "driverversion", ""), 60, fetch), "1.0")
+        self.assertEqual(cache.get((ALPACA_BASE_URL, "camera", 0, "driverversion", ""), 60, fetch), "fresh")
+        self.assertEqual(cache.get((ALPACA_BASE_URL, "focuser", 0, "driverversion", ""), 60, fetch), "3.0")
+        fetch.assert_called_once()
+
+
+class TestSchedulerRemap(unittest.TestCase):
+    """Test last polled values follow the device"""
+
+    def test_swap(self):
+        """Two devices swapping numbers keep their own values until due"""
+        attribute_scheduler = scheduler.AttributeScheduler(5)
+        attribute_scheduler.fetch((ALPACA_BASE_URL, "telescope", 0, "sitelatitude", ""), 300, Mock(return_value=10.0))
+        attribute_scheduler.fetch((ALPACA_BASE_URL, "telescope", 1, "sitelatitude", ""), 300, Mock(return_value=20.0))
+        server = exporter_core.ServerState(ALPACA_BASE_URL)
+        alpaca_exporter = import_module("alpaca-exporter")
+
+        with patch("builtins.print"):
+            alpaca_exporter.renumberDevices(server, [("telescope", 0, 1), ("telescope", 1, 0)], attribute_scheduler)
+
+        fetch = Mock(return_value=0.0)
+        self.assertEqual(attribute_scheduler.fetch((ALPACA_BASE_URL, "telescope", 0, "sitelatitude", ""), 300, fetch), 20.0)
+        self.assertEqual(attribute_scheduler.fetch((ALPACA_BASE_URL, "telescope", 1, "sitelatitude", ""), 300, fetch), 10.0)
+        fetch.assert_not_called()
+
+    def test_replaced_entries_dropped(self):
+        """Values under the new number that belonged to another device are forgotten"""
+        attribute_scheduler = scheduler.AttributeScheduler(5)
+        attribute_scheduler.fetch((ALPACA_BASE_URL, "telescope", 1, "name", ""), 300, Mock(return_value="Gone"))
+
+        attribute_scheduler.remap({(ALPACA_BASE_URL, "telescope", 0): (ALPACA_BASE_URL, "telescope", 1)})
+
+        self.assertEqual(attribute_scheduler.fetch((ALPACA_BASE_URL, "telescope", 1, "name", ""), 300, Mock(return_value="Scope")), "Scope")
+
+
+if __name__ == "__main__":
+    unittest.main()
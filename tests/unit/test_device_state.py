@@ -0,0 +1,190 @@
+"""
+Unit tests for the ASCOM 'devicestate' bulk read
+
+Tests verify that devices with a new enough interface version are read with a
+single 'devicestate' call and that anything missing or failing falls back to
+per-attribute requests.
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from importlib import import_module
+
+import exporter_core
+
+TELESCOPE_CONFIG = {
+    "telescope": {
+        "metric_prefix": "alpaca_telescope_",
+        "metrics": [
+            {"alpaca_name": "altitude"},
+            {"alpaca_name": "tracking"},
+            {"alpaca_name": "siteelevation"},
+        ],
+    }
+}
+
+
+def alpaca_response(value, error_number=0):
+    response = Mock()
+    response.status_code = 200
+    response.content = json.dumps({"Value": value, "ErrorNumber": error_number, "ErrorMessage": ""}).encode()
+    return response
+
+
+class TestParseDeviceState(unittest.TestCase):
+    """Test conversion of the devicestate payload"""
+
+    def test_names_lowercased_and_bools_converted(self):
+        """Names should match config alpaca_name and booleans become ints"""
+        state = [
+            {"Name": "Altitude", "Value": 45.5},
+            {"Name": "Tracking", "Value": True},
+            {"Name": "TimeStamp", "Value": "2026-01-01T00:00:00"},
+        ]
+
+        values = exporter_core.parse_device_state(state)
+
+        self.assertEqual(values["altitude"], 45.5)
+        self.assertEqual(values["tracking"], 1)
+        self.assertIn("timestamp", values)
+
+    def test_malformed_items_ignored(self):
+        """Items without Name/Value should be skipped"""
+        values = exporter_core.parse_device_state([{"Name": "Altitude"}, "junk", {"Value": 1}, {"Name": "Azimuth", "Value": 180.0}])
+
+        self.assertEqual(values, {"azimuth": 180.0})
+
+
+class TestCollectWithDeviceState(unittest.TestCase):
+    """Test collect_planned_metrics using bulk values"""
+
+    @patch("exporter_core.metrics_utility.set")
+    def test_bulk_values_used_and_missing_fetched(self, mock_set):
+        """Attributes in devicestate are not requested, others fall back to getValue"""
+        requested = []
+
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            requested.append(attribute)
+            return 1234.0
+
+        planned = exporter_core.plan_metrics(
+            TELESCOPE_CONFIG["telescope"]["metrics"],
+            "alpaca_telescope_",
+            "http://localhost:11111/api/v1",
+            "telescope",
+            0,
+            querystr="",
+            get_value_fn=mock_get_value,
+            get_value_cached_fn=mock_get_value,
+        )
+        metrics = exporter_core.collect_planned_metrics({"device_type": "telescope", "device_number": 0}, planned, device_state={"altitude": 45.5, "tracking": 1})
+
+        self.assertEqual(requested, ["siteelevation"])
+        self.assertEqual(len(metrics), 3)
+        mock_set.assert_any_call("alpaca_telescope_altitude", 45.5, {"device_type": "telescope", "device_number": 0})
+
+    @patch("exporter_core.metrics_utility.set")
+    def test_process_device_falls_back_when_unsupported(self, mock_set):
+        """When get_device_state_fn returns None every attribute is requested"""
+        requested = []
+
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            requested.append(attribute)
+            return "Scope" if attribute == "name" else 1.0
+
+        exporter_core.process_device(
+            "telescope",
+            0,
+            TELESCOPE_CONFIG,
+            "http://localhost:11111/api/v1",
+            False,
+            {"telescope": [0]},
+            {},
+            {},
+            mock_get_value,
+            mock_get_value,
+            get_device_state_fn=lambda _url, _device_type, _device_number: None,
+        )
+
+        self.assertEqual(requested, ["name", "altitude", "tracking", "siteelevation"])
+        mock_set.assert_any_call("alpaca_telescope_altitude", 1.0, {"device_type": "telescope", "device_number": 0, "name": "Scope"})
+
+
+class TestGetDeviceState(unittest.TestCase):
+    """Test getDeviceState interface version gating and fallback"""
+
+    def setUp(self):
+        self.alpaca_exporter = import_module("alpaca-exporter")
+        self.alpaca_exporter.skip_device_attribute = {}
+        self.alpaca_exporter.value_cache.clear()
+
+    @patch("requests.Session.get")
+    def test_new_interface_uses_devicestate(self, mock_get):
+        """Interface version 4 telescope should be read via devicestate"""
+
+        def side_effect(url, *_args, **_kwargs):
+            if "interfaceversion" in url:
+                return alpaca_response(4)
+            if "devicestate" in url:
+                return alpaca_response([{"Name": "Altitude", "Value": 10.0}, {"Name": "Slewing", "Value": False}])
+            return alpaca_response(None, 1025)
+
+        mock_get.side_effect = side_effect
+
+        state = self.alpaca_exporter.getDeviceState("http://localhost:11111/api/v1", "telescope", 0)
+
+        self.assertEqual(state, {"altitude": 10.0, "slewing": 0})
+
+    @patch("requests.Session.get")
+    def test_old_interface_skips_devicestate(self, mock_get):
+        """Interface version 3 telescope should not call devicestate"""
+        mock_get.return_value = alpaca_response(3)
+
+        state = self.alpaca_exporter.getDeviceState("http://localhost:11111/api/v1", "telescope", 0)
+
+        self.assertIsNone(state)
+        urls = [call.args[0] for call in mock_get.call_args_list]
+        self.assertFalse(any("devicestate" in url for url in urls))
+
+    @patch("requests.Session.get")
+    def test_devicestate_error_returns_none(self, mock_get):
+        """A failing devicestate call should return None so callers fall back"""
+
+        def side_effect(url, *_args, **_kwargs):
+            if "interfaceversion" in url:
+                return alpaca_response(4)
+            return alpaca_response(None, 1280)
+
+        mock_get.side_effect = side_effect
+
+        state = self.alpaca_exporter.getDeviceState("http://localhost:11111/api/v1", "telescope", 0)
+
+        self.assertIsNone(state)
+
+    @patch("requests.Session.get")
+    def test_not_implemented_devicestate_not_requested_again(self, mock_get):
+        """devicestate is not planned, a 1024 must stop it being requested"""
+
+        def side_effect(url, *_args, **_kwargs):
+            if "interfaceversion" in url:
+                return alpaca_response(4)
+            return alpaca_response(None, 1024)
+
+        mock_get.side_effect = side_effect
+
+        self.assertIsNone(self.alpaca_exporter.getDeviceState("http://localhost:11111/api/v1", "telescope", 0))
+        self.assertIsNone(self.alpaca_exporter.getDeviceState("http://localhost:11111/api/v1", "telescope", 0))
+
+        urls = [call.args[0] for call in mock_get.call_args_list]
+        self.assertEqual(sum("devicestate" in url for url in urls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
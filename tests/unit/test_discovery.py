@@ -0,0 +1,118 @@
+"""
+Unit tests for background device discovery
+
+Tests verify the device set is only replaced when discovery finds a change,
+the first discovery happens before start() returns, and later discoveries run
+in the background.
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import discovery
+
+
+class TestDeviceDiscovery(unittest.TestCase):
+    """Test change detection and the background thread"""
+
+    def test_unchanged_devices_not_replaced(self):
+        """The same devices in another order keep the current device set object"""
+        discover = Mock(side_effect=[{"camera": [1, 0]}, {"camera": [0, 1]}, {"camera": [0, 1], "focuser": [0]}])
+        device_discovery = discovery.DeviceDiscovery(discover, 60)
+
+        self.assertTrue(device_discovery.refresh())
+        devices = device_discovery.devices
+        self.assertFalse(device_discovery.refresh())
+        self.assertIs(device_discovery.devices, devices)
+        self.assertEqual(device_discovery.version, 1)
+
+        self.assertTrue(device_discovery.refresh())
+        self.assertEqual(device_discovery.devices, {"camera": [0, 1], "focuser": [0]})
+        self.assertEqual(device_discovery.version, 2)
+
+    def test_unique_id_change_detected(self):
+        """A device renumbered onto a number that is still in use changes only the UniqueIDs"""
+
+        def discover(unique_ids, **_kwargs):
+            unique_ids.update(next(results))
+            return {"camera": [0, 1]}
+
+        results = iter([{"camera/0": "uid-a", "camera/1": "uid-b"}, {"camera/0": "uid-b", "camera/1": "uid-a"}])
+        device_discovery = discovery.DeviceDiscovery(discover, 60)
+
+        device_discovery.refresh()
+        devices, unique_ids = device_discovery.current
+        self.assertTrue(device_discovery.refresh())
+
+        self.assertEqual(device_discovery.devices, devices)
+        self.assertIsNot(device_discovery.unique_ids, unique_ids)
+        self.assertEqual(device_discovery.unique_ids, {"camera/0": "uid-b", "camera/1": "uid-a"})
+
+    def test_failed_refresh_keeps_devices(self):
+        """A failed discovery is not the same as no devices, the last devices are kept"""
+        discover = Mock(side_effect=[{"camera": [0]}, None, {}])
+        device_discovery = discovery.DeviceDiscovery(discover, 60)
+
+        device_discovery.refresh()
+        devices = device_discovery.current
+        self.assertFalse(device_discovery.refresh())
+        self.assertTrue(device_discovery.failed)
+        self.assertIs(device_discovery.current, devices)
+
+        # a server that really lists no devices does replace them
+        self.assertTrue(device_discovery.refresh())
+        self.assertFalse(device_discovery.failed)
+        self.assertEqual(device_discovery.devices, {})
+
+    def test_failed_refresh_retried_sooner(self):
+        """After a failure the next discovery is on the retry interval"""
+        retried = threading.Event()
+        results = iter([None, {"camera": [0]}])
+
+        def discover(**_kwargs):
+            result = next(results)
+            if result is not None:
+                retried.set()
+            return result
+
+        device_discovery = discovery.DeviceDiscovery(discover, 60, retry_interval=0.01)
+        device_discovery.start()
+        self.addCleanup(device_discovery.stop)
+
+        self.assertTrue(retried.wait(5))
+        device_discovery.stop()
+        self.assertEqual(device_discovery.devices, {"camera": [0]})
+
+    def test_start_discovers_then_runs_in_background(self):
+        """start() returns with devices discovered, later discoveries happen on the interval"""
+        rediscovered = threading.Event()
+        calls = []
+
+        def discover(verbose, **_kwargs):
+            calls.append(verbose)
+            if len(calls) > 1:
+                rediscovered.set()
+                return {"camera": [0], "telescope": [0]}
+            return {"camera": [0]}
+
+        device_discovery = discovery.DeviceDiscovery(discover, 0.01)
+        device_discovery.start()
+        self.addCleanup(device_discovery.stop)
+
+        # first discovery is verbose and done before start() returns
+        self.assertEqual(calls[0], True)
+
+        self.assertTrue(rediscovered.wait(5))
+        device_discovery.stop()
+        self.assertEqual(device_discovery.devices, {"camera": [0], "telescope": [0]})
+        self.assertFalse(any(calls[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,7 +19,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 class TestDiscoveryMode(unittest.TestCase):
     """Test auto-discovery mode specific behavior"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discovery_filters_by_device_type(self, mock_get):
         """
         Test that discovery only includes supported device types.
@@ -45,7 +45,7 @@ class TestDiscoveryMode(unittest.TestCase):
             "ErrorNumber": 0,
             "ErrorMessage": "",
         }
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         # Call discovery (verbose=False to avoid log output)
@@ -59,7 +59,7 @@ class TestDiscoveryMode(unittest.TestCase):
         self.assertIn("camera", discovered, "Supported camera should be discovered")
         self.assertNotIn("unsupportedtype", discovered, "Unsupported device type should be filtered out")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discovery_handles_multiple_devices_same_type(self, mock_get):
         """
         Test discovery with multiple devices of the same type.
@@ -83,7 +83,7 @@ class TestDiscoveryMode(unittest.TestCase):
             "ErrorNumber": 0,
             "ErrorMessage": "",
         }
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         discovered = alpaca_exporter.discoverDevices(
@@ -98,7 +98,7 @@ class TestDiscoveryMode(unittest.TestCase):
         self.assertIn(1, discovered["camera"], "Camera #1 should be discovered")
         self.assertIn(2, discovered["camera"], "Camera #2 should be discovered")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discovery_handles_failed_management_api(self, mock_get):
         """
         Test discovery behavior when Management API returns an error.
@@ -112,7 +112,7 @@ class TestDiscoveryMode(unittest.TestCase):
         # Mock Management API returning HTTP error
         mock_response = Mock()
         mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
+        mock_response.content = b"Internal Server Error"
         mock_get.return_value = mock_response
 
         # Should handle error gracefully
@@ -125,7 +125,7 @@ class TestDiscoveryMode(unittest.TestCase):
         self.assertEqual(len(discovered), 0, "Failed API call should return empty dict")
         self.assertIsInstance(discovered, dict, "Should still return a dict even on error")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discovery_handles_missing_value_field(self, mock_get):
         """
         Test discovery when Management API response is missing the Value field.
@@ -139,7 +139,7 @@ class TestDiscoveryMode(unittest.TestCase):
         # Mock Management API with malformed response (missing Value field)
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         discovered = alpaca_exporter.discoverDevices(
@@ -154,7 +154,7 @@ class TestDiscoveryMode(unittest.TestCase):
 class TestDiscoveryVerboseFlag(unittest.TestCase):
     """Test verbose flag behavior in discovery"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     @patch("builtins.print")
     def test_verbose_true_prints_discovered_devices(self, mock_print, mock_get):
         """
@@ -176,7 +176,7 @@ class TestDiscoveryVerboseFlag(unittest.TestCase):
             "ErrorNumber": 0,
             "ErrorMessage": "",
         }
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         # Call with verbose=True
@@ -191,7 +191,7 @@ class TestDiscoveryVerboseFlag(unittest.TestCase):
         discovered_message_found = any("DISCOVERED" in str(call) and "telescope/0" in str(call) for call in print_calls)
         self.assertTrue(discovered_message_found, "verbose=True should print DISCOVERED message for devices")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     @patch("builtins.print")
     def test_verbose_false_no_discovery_output(self, mock_print, mock_get):
         """
@@ -214,7 +214,7 @@ class TestDiscoveryVerboseFlag(unittest.TestCase):
             "ErrorNumber": 0,
             "ErrorMessage": "",
         }
-        mock_response.text = json.dumps(devices_data)
+        mock_response.content = json.dumps(devices_data).encode()
         mock_get.return_value = mock_response
 
         # Reset print mock
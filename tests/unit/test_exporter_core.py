@@ -2,21 +2,18 @@
 """
 Unit tests for exporter_core.py functions
 
-Tests configuration parsing, mode validation, device list building,
-and metric cleanup functions.
+Tests configuration parsing, mode validation and device list building.
 """
 
 import sys
 import unittest
 from pathlib import Path
-from unittest.mock import patch
 
 import pytest
 
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
-import metrics_utility
 
 import constants
 import exporter_core
@@ -176,107 +173,5 @@ class TestGetManualDeviceList(unittest.TestCase):
         self.assertEqual(devices, expected)
 
 
-class TestCleanupStaleMetrics(unittest.TestCase):
-    """Test stale metric cleanup"""
-
-    def test_cleanup_removes_stale_metrics(self):
-        """Should remove metrics that were in previous cycle but not current"""
-        # Create some metrics in "previous" cycle
-        metrics_utility.set("alpaca_device_connected", 1, {"device_type": "telescope", "device_number": 0})
-        metrics_utility.set("alpaca_telescope_altitude", 45.0, {"device_type": "telescope", "device_number": 0, "name": "Test"})
-
-        metrics_previous = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-            ["alpaca_telescope_altitude", {"device_type": "telescope", "device_number": 0, "name": "Test"}],
-        ]
-
-        # Current cycle only has device_connected (altitude is stale)
-        metrics_current = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-        ]
-
-        # Should call metrics_utility.set with None for stale metric
-        with patch("exporter_core.metrics_utility.set") as mock_set:
-            exporter_core.cleanup_stale_metrics(metrics_previous, metrics_current)
-
-            # Should be called once to clear the stale altitude metric
-            mock_set.assert_called_once_with(
-                "alpaca_telescope_altitude",
-                None,
-                {"device_type": "telescope", "device_number": 0, "name": "Test"},
-            )
-
-    def test_cleanup_no_stale_metrics(self):
-        """Should not remove anything if all metrics still present"""
-        metrics_previous = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-            ["alpaca_telescope_altitude", {"device_type": "telescope", "device_number": 0, "name": "Test"}],
-        ]
-
-        metrics_current = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-            ["alpaca_telescope_altitude", {"device_type": "telescope", "device_number": 0, "name": "Test"}],
-        ]
-
-        with patch("exporter_core.metrics_utility.set") as mock_set:
-            exporter_core.cleanup_stale_metrics(metrics_previous, metrics_current)
-
-            # Should not call metrics_utility.set at all
-            mock_set.assert_not_called()
-
-    def test_cleanup_empty_previous(self):
-        """Should handle empty previous metrics list"""
-        metrics_previous = []
-        metrics_current = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-        ]
-
-        with patch("exporter_core.metrics_utility.set") as mock_set:
-            exporter_core.cleanup_stale_metrics(metrics_previous, metrics_current)
-
-            # Should not call metrics_utility.set
-            mock_set.assert_not_called()
-
-    def test_cleanup_multiple_stale_metrics(self):
-        """Should remove multiple stale metrics"""
-        metrics_previous = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-            ["alpaca_telescope_altitude", {"device_type": "telescope", "device_number": 0, "name": "Test"}],
-            ["alpaca_telescope_azimuth", {"device_type": "telescope", "device_number": 0, "name": "Test"}],
-            ["alpaca_telescope_declination", {"device_type": "telescope", "device_number": 0, "name": "Test"}],
-        ]
-
-        metrics_current = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-        ]
-
-        with patch("exporter_core.metrics_utility.set") as mock_set:
-            exporter_core.cleanup_stale_metrics(metrics_previous, metrics_current)
-
-            # Should call metrics_utility.set 3 times for 3 stale metrics
-            self.assertEqual(mock_set.call_count, 3)
-
-    def test_cleanup_with_different_labels(self):
-        """Should only remove metrics with exact label match"""
-        metrics_previous = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 1}],
-        ]
-
-        metrics_current = [
-            ["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}],
-        ]
-
-        with patch("exporter_core.metrics_utility.set") as mock_set:
-            exporter_core.cleanup_stale_metrics(metrics_previous, metrics_current)
-
-            # Should only clear device_number=1
-            mock_set.assert_called_once_with(
-                "alpaca_device_connected",
-                None,
-                {"device_type": "telescope", "device_number": 1},
-            )
-
-
 if __name__ == "__main__":
     unittest.main()
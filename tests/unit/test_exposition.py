@@ -0,0 +1,102 @@
+"""
+Unit tests for the pre-rendered /metrics exposition
+
+Tests verify the exposition is rendered once per refresh and served unchanged
+to every scrape, with a gzip copy for scrapers that accept it.
+"""
+
+import gzip
+import http.client
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from prometheus_client import CollectorRegistry, Gauge
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import exposition
+
+
+class TestAcceptsGzip(unittest.TestCase):
+    """Test Accept-Encoding parsing"""
+
+    def test_values(self):
+        self.assertTrue(exposition.accepts_gzip("gzip"))
+        self.assertTrue(exposition.accepts_gzip("identity, GZIP;q=0.5"))
+        self.assertTrue(exposition.accepts_gzip("*"))
+        self.assertFalse(exposition.accepts_gzip(None))
+        self.assertFalse(exposition.accepts_gzip("identity"))
+        self.assertFalse(exposition.accepts_gzip("gzip;q=0"))
+
+
+class TestExposition(unittest.TestCase):
+    """Test rendering and serving"""
+
+    def setUp(self):
+        self.registry = CollectorRegistry()
+        self.gauge = Gauge("alpaca_test_value", "test", registry=self.registry)
+        patcher = patch("exposition.registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.server = exposition.serve(0, "127.0.0.1")
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def scrape(self, accept_encoding=None, path="/metrics"):
+        connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        try:
+            headers = {"Accept-Encoding": accept_encoding} if accept_encoding else {}
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            return response, response.read()
+        finally:
+            connection.close()
+
+    def test_served_until_next_refresh(self):
+        """Changes only show up after refresh()"""
+        self.gauge.set(1)
+        exposition.refresh()
+        self.gauge.set(2)
+
+        _, body = self.scrape()
+        self.assertIn(b"alpaca_test_value 1.0", body)
+
+        exposition.refresh()
+        _, body = self.scrape()
+        self.assertIn(b"alpaca_test_value 2.0", body)
+
+    def test_scrapes_do_not_render(self):
+        """Any number of scrapes reuse the rendered bytes"""
+        exposition.refresh()
+
+        with patch("exposition.generate_latest") as mock_generate:
+            for _ in range(3):
+                self.scrape()
+                self.scrape("gzip")
+
+        mock_generate.assert_not_called()
+
+    def test_gzip(self):
+        """Scrapers accepting gzip get the pre-compressed copy"""
+        self.gauge.set(3)
+        exposition.refresh()
+
+        response, body = self.scrape("gzip")
+        plain_response, plain = self.scrape()
+
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+        self.assertEqual(gzip.decompress(body), plain)
+        self.assertIsNone(plain_response.getheader("Content-Encoding"))
+
+    def test_unknown_path(self):
+        response, _ = self.scrape(path="/other")
+
+        self.assertEqual(response.status, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
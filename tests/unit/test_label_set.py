@@ -0,0 +1,92 @@
+"""
+Unit tests for interned immutable label sets
+
+Tests verify label sets behave like read-only dicts, equal labels share one
+object, and every sample of a device references the same label set.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import exporter_core
+import label_set
+
+
+class TestLabelSet(unittest.TestCase):
+    """Test LabelSet mapping behavior"""
+
+    def test_equal_to_dict(self):
+        """A label set compares equal to a dict with the same items, both ways"""
+        labels = label_set.intern_labels({"device_type": "switch", "device_number": 0, "id": 3})
+
+        self.assertEqual(labels, {"device_number": 0, "device_type": "switch", "id": 3})
+        self.assertEqual({"device_number": 0, "device_type": "switch", "id": 3}, labels)
+        self.assertEqual(["alpaca_switch_value", labels], ["alpaca_switch_value", {"device_type": "switch", "device_number": 0, "id": 3}])
+        self.assertNotEqual(labels, {"device_type": "switch", "device_number": 0, "id": 4})
+
+    def test_keeps_order_and_unpacks(self):
+        """Label order is kept, and ** unpacking works like a dict"""
+        labels = label_set.intern_labels({"device_type": "camera", "device_number": 1, "name": "Cam"})
+
+        self.assertEqual(list(labels.keys()), ["device_type", "device_number", "name"])
+        self.assertEqual(dict(**labels), {"device_type": "camera", "device_number": 1, "name": "Cam"})
+
+    def test_immutable(self):
+        """Label sets can't be changed after creation"""
+        labels = label_set.intern_labels({"device_type": "camera"})
+
+        with pytest.raises(TypeError):
+            labels["name"] = "Cam"  # type: ignore[index]
+
+    def test_interned(self):
+        """Equal labels resolve to the same object and hash alike"""
+        first = label_set.intern_labels({"device_type": "camera", "device_number": 0})
+        second = label_set.intern_labels({"device_type": "camera", "device_number": 0})
+
+        self.assertIs(first, second)
+        self.assertIs(label_set.intern_labels(first), first)
+        self.assertEqual(len({first, second}), 1)
+
+
+class TestSharedLabels(unittest.TestCase):
+    """Test samples share label sets"""
+
+    @patch("exporter_core.metrics_utility.set")
+    def test_switch_samples_share_label_set(self, mock_set):
+        """Every metric of one switch id references the same label set"""
+        configurations = {
+            "switch": {
+                "metric_prefix": "alpaca_switch_",
+                "metrics": [{"alpaca_name": "getswitchvalue", "metric_name": "value"}, {"alpaca_name": "minswitchvalue"}, {"alpaca_name": "maxswitchvalue"}],
+            }
+        }
+
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            if attribute == "name":
+                return "Switch"
+            if attribute == "maxswitch":
+                return 2
+            return 1.0
+
+        with patch("builtins.print"):
+            metrics = exporter_core.process_device("switch", 0, configurations, "http://localhost:11111/api/v1", False, {"switch": [0]}, {}, {}, mock_get_value, mock_get_value)
+
+        by_id = {}
+        for metric_name, labels in metrics:
+            self.assertIsInstance(labels, label_set.LabelSet)
+            if metric_name.startswith("alpaca_switch_"):
+                by_id.setdefault(labels["id"], set()).add(id(labels))
+        self.assertEqual({switch_id: len(ids) for switch_id, ids in by_id.items()}, {0: 1, 1: 1})
+        # metrics_utility gets the same object that is tracked
+        self.assertIs(mock_set.call_args.args[2], metrics[-1][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Unit tests for exporter logging
+
+Tests verify per-module loggers, level gating, lazy formatting and the runtime
+TRACE toggle.
+"""
+
+import logging
+import sys
+import unittest
+from io import StringIO
+from pathlib import Path
+from unittest.mock import MagicMock, Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from importlib import import_module
+
+import log
+
+
+class TestLog(unittest.TestCase):
+    """Test level gating"""
+
+    def setUp(self):
+        root = logging.getLogger(log.ROOT)
+        level = root.level
+        self.addCleanup(root.setLevel, level)
+
+    def test_module_loggers_under_root(self):
+        self.assertEqual(log.get_logger("transport").name, "alpaca_exporter.transport")
+        self.assertEqual(logging.getLevelName(log.TRACE), "TRACE")
+
+    def test_disabled_level_not_formatted(self):
+        """Arguments of a disabled message are never formatted"""
+        log.configure("INFO")
+        argument = MagicMock()
+
+        log.get_logger("exporter").log(log.TRACE, "value %s", argument)
+        log.get_logger("exporter").debug("value %s", argument)
+
+        argument.__str__.assert_not_called()
+
+    def test_enabled_level_printed(self):
+        log.configure("trace")
+        captured_output = StringIO()
+
+        with patch("sys.stdout", new=captured_output):
+            log.get_logger("exporter").log(log.TRACE, "request_url = %s", "http://localhost:11111/api/v1/camera/0/gain?")
+
+        self.assertIn("TRACE alpaca_exporter.exporter: request_url = http://localhost:11111/api/v1/camera/0/gain?", captured_output.getvalue())
+
+    def test_toggle_trace(self):
+        """The runtime toggle switches to TRACE and back to the configured level"""
+        log.configure("WARNING")
+        root = logging.getLogger(log.ROOT)
+
+        with patch("builtins.print"):
+            log.toggle_trace()
+            self.assertEqual(root.level, log.TRACE)
+            log.toggle_trace()
+        self.assertEqual(root.level, logging.WARNING)
+
+    def test_single_handler(self):
+        log.configure("INFO")
+        log.configure("DEBUG")
+
+        handlers = [h for h in logging.getLogger(log.ROOT).handlers if isinstance(h, log.StdoutHandler)]
+        self.assertEqual(len(handlers), 1)
+
+
+class TestGetValueTracing(unittest.TestCase):
+    """Test getValue only traces when enabled"""
+
+    @patch("requests.Session.get")
+    def test_get_value_silent_by_default(self, mock_get):
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.skip_device_attribute = {}
+        mock_get.return_value = Mock(status_code=200, content=b'{"Value": 1, "ErrorNumber": 0, "ErrorMessage": ""}')
+        log.configure("INFO")
+        captured_output = StringIO()
+
+        with patch("sys.stdout", new=captured_output):
+            alpaca_exporter.getValue("http://localhost:11111/api/v1", "camera", 0, "gain", "", False)
+
+        self.assertEqual(captured_output.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Unit tests for the per-device metric ownership index
+
+Tests verify stale series are removed per device, devices that failed or were
+not processed keep their series, and unchanged series are left alone.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import call, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import label_set
+import metric_index
+
+TELESCOPE = ("http://localhost:11111/api/v1", "telescope", 0)
+CAMERA = ("http://localhost:11111/api/v1", "camera", 0)
+
+TELESCOPE_LABELS = {"device_type": "telescope", "device_number": 0, "name": "Scope"}
+CAMERA_LABELS = {"device_type": "camera", "device_number": 0, "name": "Cam"}
+
+
+class TestMetricIndex(unittest.TestCase):
+    """Test per-device stale series removal"""
+
+    def setUp(self):
+        self.index = metric_index.MetricIndex()
+
+    @patch("metrics_utility.set")
+    def test_unchanged_series_kept(self, mock_set):
+        """Reporting the same series again removes nothing, even with new dict objects"""
+        self.index.update(TELESCOPE, [["alpaca_telescope_altitude", dict(TELESCOPE_LABELS)]])
+        removed = self.index.update(TELESCOPE, [["alpaca_telescope_altitude", dict(TELESCOPE_LABELS)]])
+
+        self.assertEqual(removed, 0)
+        mock_set.assert_not_called()
+
+    @patch("metrics_utility.set")
+    def test_stale_series_removed(self, mock_set):
+        """A series the device no longer reports is wiped"""
+        self.index.update(TELESCOPE, [["alpaca_telescope_altitude", TELESCOPE_LABELS], ["alpaca_telescope_slewing", TELESCOPE_LABELS]])
+        removed = self.index.update(TELESCOPE, [["alpaca_telescope_altitude", TELESCOPE_LABELS]])
+
+        self.assertEqual(removed, 1)
+        mock_set.assert_called_once_with("alpaca_telescope_slewing", None, TELESCOPE_LABELS)
+
+    @patch("metrics_utility.set")
+    def test_first_update_removes_nothing(self, mock_set):
+        """A device seen for the first time has no stale series"""
+        self.assertEqual(self.index.update(TELESCOPE, [["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}]]), 0)
+        mock_set.assert_not_called()
+
+    @patch("metrics_utility.set")
+    def test_only_exact_labels_removed(self, mock_set):
+        """A series is only kept if its labels match exactly"""
+        self.index.update(
+            TELESCOPE,
+            [["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}], ["alpaca_device_connected", {"device_type": "telescope", "device_number": 1}]],
+        )
+        self.index.update(TELESCOPE, [["alpaca_device_connected", {"device_type": "telescope", "device_number": 0}]])
+
+        mock_set.assert_called_once_with("alpaca_device_connected", None, {"device_type": "telescope", "device_number": 1})
+
+    @patch("metrics_utility.set")
+    def test_failed_device_keeps_series(self, mock_set):
+        """None (device raised) leaves the device's series in place"""
+        self.index.update(CAMERA, [["alpaca_camera_ccdtemperature", CAMERA_LABELS]])
+
+        self.assertEqual(self.index.update(CAMERA, None), 0)
+        mock_set.assert_not_called()
+        self.assertIn(("alpaca_camera_ccdtemperature", label_set.intern_labels(CAMERA_LABELS)), self.index.series())
+
+    @patch("metrics_utility.set")
+    def test_other_devices_untouched(self, mock_set):
+        """Updating one device never removes another device's series"""
+        self.index.update(TELESCOPE, [["alpaca_telescope_altitude", TELESCOPE_LABELS]])
+        self.index.update(CAMERA, [["alpaca_camera_ccdtemperature", CAMERA_LABELS], ["alpaca_camera_gain", CAMERA_LABELS]])
+
+        self.index.update(CAMERA, [])
+
+        self.assertEqual(mock_set.call_count, 2)
+        mock_set.assert_has_calls([call("alpaca_camera_ccdtemperature", None, CAMERA_LABELS), call("alpaca_camera_gain", None, CAMERA_LABELS)], any_order=True)
+        self.assertEqual(self.index.series(), {("alpaca_telescope_altitude", label_set.intern_labels(TELESCOPE_LABELS))})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+"""
+Unit tests for monitoring several Alpaca servers from one process
+
+Tests verify URL parsing, the 'server' label, and that device status, skip lists
+and scheduled attributes are kept apart for devices with the same number on
+different servers.
+"""
+
+import json
+import sys
+import unittest
+from importlib import import_module
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import constants
+import exporter_core
+import request_counters
+import scheduler
+
+PIER1 = "http://pier1:11111/api/v1"
+PIER2 = "http://pier2:11111/api/v1"
+
+CONFIGURATIONS = {
+    "camera": {
+        "metric_prefix": "alpaca_camera_",
+        "metrics": [{"alpaca_name": "ccdtemperature"}],
+    }
+}
+
+
+class TestParseAlpacaBaseUrls(unittest.TestCase):
+    """Test --alpaca_base_url parsing"""
+
+    def test_default(self):
+        self.assertEqual(exporter_core.parse_alpaca_base_urls({}), [constants.DEFAULT_ALPACA_BASE_URL])
+
+    def test_single_string(self):
+        self.assertEqual(exporter_core.parse_alpaca_base_urls({"alpaca_base_url": PIER1 + "/"}), [PIER1])
+
+    def test_repeated_urls_keep_order_and_drop_duplicates(self):
+        args = {"alpaca_base_url": [PIER2, PIER1 + "/", PIER2]}
+
+        self.assertEqual(exporter_core.parse_alpaca_base_urls(args), [PIER2, PIER1])
+
+    def test_parse_config_defaults_returns_first(self):
+        alpaca_base_url, _, _ = exporter_core.parse_config_defaults({"alpaca_base_url": [PIER1, PIER2]})
+
+        self.assertEqual(alpaca_base_url, PIER1)
+
+
+class TestServerLabel(unittest.TestCase):
+    """Test process_device with a server label"""
+
+    @patch("exporter_core.metrics_utility.set")
+    def test_server_label_added(self, mock_set):
+        """Every metric of the device carries the server label"""
+
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            return "Camera" if attribute == "name" else -10.0
+
+        with patch("builtins.print") as mock_print:
+            metrics = exporter_core.process_device(
+                "camera", 0, CONFIGURATIONS, PIER1, False, {"camera": [0]}, {}, {}, mock_get_value, mock_get_value, server_label="http://pier1:11111"
+            )
+
+        self.assertTrue(all(m[1]["server"] == "http://pier1:11111" for m in metrics))
+        mock_set.assert_any_call("alpaca_camera_ccdtemperature", -10.0, {"device_type": "camera", "device_number": 0, "server": "http://pier1:11111", "name": "Camera"})
+        mock_print.assert_any_call("CONNECTED: http://pier1:11111/camera/0")
+
+    @patch("exporter_core.metrics_utility.set")
+    def test_no_server_label_by_default(self, mock_set):
+        """Single server mode keeps the original labels"""
+        exporter_core.process_device("camera", 0, CONFIGURATIONS, PIER1, False, {"camera": [0]}, {}, {}, Mock(return_value=None), Mock())
+
+        mock_set.assert_not_called()
+        self.assertEqual(exporter_core.device_labels("camera", 0), {"device_type": "camera", "device_number": 0})
+
+
+class TestPerServerState(unittest.TestCase):
+    """Test that same numbered devices on different servers don't share state"""
+
+    @patch("exporter_core.metrics_utility.set")
+    def test_device_status_and_schedule_per_server(self, mock_set):
+        """camera/0 is polled on both servers and tracked separately"""
+        requested = []
+
+        def mock_get_value(url, _device_type, _device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            requested.append((url, attribute))
+            if attribute == "name":
+                return "Camera" if url == PIER1 else None
+            return -10.0
+
+        attribute_scheduler = scheduler.AttributeScheduler(5)
+        attribute_scheduler.begin_pass()
+        states = [exporter_core.ServerState(PIER1, "http://pier1:11111"), exporter_core.ServerState(PIER2, "http://pier2:11111")]
+        with patch("builtins.print"):
+            for state in states:
+                exporter_core.process_device(
+                    "camera",
+                    0,
+                    CONFIGURATIONS,
+                    state.alpaca_base_url,
+                    False,
+                    {"camera": [0]},
+                    state.device_status,
+                    state.skip_device_attribute,
+                    mock_get_value,
+                    mock_get_value,
+                    scheduler=attribute_scheduler,
+                    server_label=state.label,
+                )
+
+        self.assertEqual(requested, [(PIER1, "name"), (PIER1, "ccdtemperature"), (PIER2, "name")])
+        self.assertTrue(states[0].device_status["camera/0"])
+        self.assertFalse(states[1].device_status["camera/0"])
+        self.assertEqual({call.args[2]["server"] for call in mock_set.call_args_list}, {"http://pier1:11111"})
+
+    @patch("requests.Session.get")
+    def test_get_value_uses_server_skip_list(self, mock_get):
+        """A 1024 on one server does not skip the attribute on another"""
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.skip_device_attribute = {}
+        alpaca_exporter.servers.clear()
+        self.addCleanup(alpaca_exporter.servers.clear)
+        for url, label in [(PIER1, "http://pier1:11111"), (PIER2, "http://pier2:11111")]:
+            alpaca_exporter.servers[url] = exporter_core.ServerState(url, label)
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({"Value": None, "ErrorNumber": 1024, "ErrorMessage": "Not implemented"}).encode()
+        mock_get.return_value = mock_response
+
+        self.assertIsNone(alpaca_exporter.getValue(PIER1, "camera", 0, "cooleron", "", True))
+
+        self.assertEqual(alpaca_exporter.servers[PIER1].skip_device_attribute, {"camera": {"0": ["cooleron"]}})
+        self.assertEqual(alpaca_exporter.servers[PIER2].skip_device_attribute, {})
+        self.assertEqual(alpaca_exporter.skip_device_attribute, {})
+
+    @patch("requests.Session.get")
+    def test_counters_carry_server_label(self, mock_get):
+        """Success counters of a registered server include its label"""
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.servers.clear()
+        self.addCleanup(alpaca_exporter.servers.clear)
+        alpaca_exporter.servers[PIER2] = exporter_core.ServerState(PIER2, "http://pier2:11111")
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({"Value": -10.0, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
+        mock_get.return_value = mock_response
+
+        counters = request_counters.RequestCounters()
+        with patch("request_counters.counters", counters):
+            alpaca_exporter.getValue(PIER2, "camera", 0, "ccdtemperature", "", True)
+        counters.flush()
+
+        self.assertEqual(
+            counters.labels,
+            {
+                ("alpaca_success_total", "http://pier2:11111", "camera", 0, "ccdtemperature"): {
+                    "device_type": "camera",
+                    "device_number": "0",
+                    "attribute": "ccdtemperature",
+                    "server": "http://pier2:11111",
+                }
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
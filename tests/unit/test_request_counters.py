@@ -0,0 +1,92 @@
+"""
+Unit tests for batched request counters
+
+Tests verify requests are tallied without touching Prometheus, the tally is
+folded into cumulative totals once per flush, and getValue counts through the
+tally.
+"""
+
+import json
+import sys
+import unittest
+from importlib import import_module
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import request_counters
+
+
+class TestRequestCounters(unittest.TestCase):
+    """Test tally and flush"""
+
+    def setUp(self):
+        self.counters = request_counters.RequestCounters()
+        self.registry = CollectorRegistry()
+        self.registry.register(self.counters)
+
+    def scrape(self):
+        return generate_latest(self.registry).decode()
+
+    def test_tally_not_visible_until_flush(self):
+        self.counters.add(request_counters.SUCCESS, None, "camera", 0, "gain")
+
+        self.assertEqual(self.counters.pending, {(request_counters.SUCCESS, None, "camera", 0, "gain"): 1})
+        self.assertNotIn("alpaca_success_total", self.scrape())
+
+    def test_flush_accumulates(self):
+        """Totals keep growing across flushes, one entry per series"""
+        for _ in range(3):
+            self.counters.add(request_counters.SUCCESS, None, "camera", 0, "gain")
+        self.counters.add(request_counters.ERROR, None, "camera", 0, "offset")
+        self.counters.flush()
+        self.counters.add(request_counters.SUCCESS, None, "camera", 0, "gain")
+        self.counters.flush()
+
+        self.assertEqual(self.counters.pending, {})
+        text = self.scrape()
+        self.assertIn('alpaca_success_total{attribute="gain",device_number="0",device_type="camera"} 4.0', text)
+        self.assertIn('alpaca_error_total{attribute="offset",device_number="0",device_type="camera"} 1.0', text)
+        self.assertIn("# TYPE alpaca_success_total counter", text)
+
+    def test_server_label(self):
+        self.counters.add(request_counters.ERROR, "http://pier1:11111", "camera", 0, "gain")
+        self.counters.flush()
+
+        self.assertIn('alpaca_error_total{attribute="gain",device_number="0",device_type="camera",server="http://pier1:11111"} 1.0', self.scrape())
+
+
+class TestGetValueCounting(unittest.TestCase):
+    """Test getValue uses the tally"""
+
+    @patch("metrics_utility.inc")
+    @patch("requests.Session.get")
+    def test_get_value_tallies(self, mock_get, mock_inc):
+        """Success and error are tallied, record_metrics=False counts nothing"""
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.skip_device_attribute = {}
+
+        ok = Mock(status_code=200, content=json.dumps({"Value": 1.0, "ErrorNumber": 0, "ErrorMessage": ""}).encode())
+        failed = Mock(status_code=500, content=b"")
+        mock_get.side_effect = [ok, ok, failed, ok]
+
+        counters = request_counters.RequestCounters()
+        with patch("request_counters.counters", counters):
+            for _ in range(3):
+                alpaca_exporter.getValue("http://localhost:11111/api/v1", "camera", 0, "gain", "", True)
+            alpaca_exporter.getValue("http://localhost:11111/api/v1", "camera", 0, "gain", "", False)
+
+        self.assertEqual(
+            counters.pending,
+            {(request_counters.SUCCESS, None, "camera", 0, "gain"): 2, (request_counters.ERROR, None, "camera", 0, "gain"): 1},
+        )
+        self.assertNotIn("alpaca_success_total", [c.args[0] for c in mock_inc.call_args_list])
+        self.assertNotIn("alpaca_error_total", [c.args[0] for c in mock_inc.call_args_list])
+
+
+if __name__ == "__main__":
+    unittest.main()
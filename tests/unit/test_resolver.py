@@ -0,0 +1,204 @@
+"""
+Unit tests for the Alpaca server address cache
+
+Tests verify host names are looked up once per TTL, lookups can be pinned to
+an address family, failed connections force a new lookup, and connections
+made by transport use the cached address.
+"""
+
+import socket
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import requests
+from prometheus_client import CollectorRegistry
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import resolver
+import transport
+
+HOST = "pier1.local"
+
+real_getaddrinfo = socket.getaddrinfo
+
+
+def local_getaddrinfo(host, port, *args, **kwargs):
+    """Resolve HOST to the loopback address, everything else as usual"""
+    if host == HOST:
+        host = "127.0.0.1"
+    return real_getaddrinfo(host, port, *args, **kwargs)
+
+
+def dual_stack_getaddrinfo(host, port, *_args, **_kwargs):
+    """Resolve HOST to ::1 first, then 127.0.0.1, listed per protocol as getaddrinfo does"""
+    if host != HOST:
+        return real_getaddrinfo(host, port, *_args, **_kwargs)
+    return [
+        (socket.AF_INET6, socket.SOCK_STREAM, 6, "", ("::1", port, 0, 0)),
+        (socket.AF_INET6, socket.SOCK_DGRAM, 17, "", ("::1", port, 0, 0)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port)),
+    ]
+
+
+class TestResolverCache(unittest.TestCase):
+    """Test caching, pinning and counters"""
+
+    @patch("socket.getaddrinfo", side_effect=local_getaddrinfo)
+    def test_hit_and_miss(self, mock_getaddrinfo):
+        cache = resolver.ResolverCache(ttl=60)
+
+        self.assertEqual(cache.resolve(HOST, 11111), ["127.0.0.1"])
+        self.assertEqual(cache.resolve(HOST, 11111), ["127.0.0.1"])
+
+        mock_getaddrinfo.assert_called_once_with(HOST, 11111, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        self.assertEqual(cache.stats[HOST][:2], [1, 1])
+
+    @patch("socket.getaddrinfo", side_effect=local_getaddrinfo)
+    def test_expired_and_invalidated(self, mock_getaddrinfo):
+        cache = resolver.ResolverCache(ttl=60)
+        cache.resolve(HOST, 11111)
+
+        cache.invalidate(HOST)
+        cache.resolve(HOST, 11111)
+        cache.entries[HOST] = (0, ["127.0.0.1"])
+        cache.resolve(HOST, 11111)
+
+        self.assertEqual(mock_getaddrinfo.call_count, 3)
+
+    @patch("socket.getaddrinfo", side_effect=local_getaddrinfo)
+    def test_family_pinned(self, mock_getaddrinfo):
+        resolver.configure(family="ipv4")
+        self.addCleanup(resolver.configure)
+
+        resolver.cache.resolve(HOST, 11111)
+
+        self.assertEqual(mock_getaddrinfo.call_args.args[2], socket.AF_INET)
+
+    @patch("socket.getaddrinfo", side_effect=socket.gaierror("no such host"))
+    def test_not_cached(self, mock_getaddrinfo):
+        """Addresses and failed lookups give no address"""
+        cache = resolver.ResolverCache(ttl=60)
+
+        self.assertIsNone(cache.resolve("127.0.0.1", 11111))
+        self.assertIsNone(cache.resolve("::1", 11111))
+        self.assertIsNone(cache.resolve(HOST, 11111))
+        self.assertIsNone(cache.resolve(HOST, 11111))
+
+        self.assertEqual(mock_getaddrinfo.call_count, 2)
+        self.assertEqual(cache.stats[HOST][:2], [0, 2])
+
+    @patch("socket.getaddrinfo", side_effect=local_getaddrinfo)
+    def test_disabled_still_pinned(self, mock_getaddrinfo):
+        """With the cache disabled every call looks the host up, in the configured family"""
+        cache = resolver.ResolverCache(ttl=0, family=socket.AF_INET)
+
+        self.assertEqual(cache.resolve(HOST, 11111), ["127.0.0.1"])
+        self.assertEqual(cache.resolve(HOST, 11111), ["127.0.0.1"])
+
+        self.assertEqual(mock_getaddrinfo.call_count, 2)
+        self.assertEqual(mock_getaddrinfo.call_args.args[2], socket.AF_INET)
+        self.assertEqual(cache.entries, {})
+
+    @patch("socket.getaddrinfo", side_effect=local_getaddrinfo)
+    def test_counters_exported(self, mock_getaddrinfo):
+        registry = CollectorRegistry()
+        cache = resolver.ResolverCache(ttl=60)
+        registry.register(cache)
+        cache.resolve(HOST, 11111)
+        cache.resolve(HOST, 11111)
+
+        self.assertEqual(registry.get_sample_value("alpaca_dns_lookups_total", {"host": HOST, "result": "hit"}), 1)
+        self.assertEqual(registry.get_sample_value("alpaca_dns_lookups_total", {"host": HOST, "result": "miss"}), 1)
+        self.assertGreaterEqual(registry.get_sample_value("alpaca_dns_lookup_seconds_total", {"host": HOST}), 0)
+        mock_getaddrinfo.assert_called_once()
+
+    @patch("socket.getaddrinfo", side_effect=dual_stack_getaddrinfo)
+    def test_all_addresses_kept(self, mock_getaddrinfo):
+        """Every address is returned once, an address that connected moves to the front"""
+        cache = resolver.ResolverCache(ttl=60)
+
+        self.assertEqual(cache.resolve(HOST, 11111), ["::1", "127.0.0.1"])
+        cache.prefer(HOST, "127.0.0.1")
+        self.assertEqual(cache.resolve(HOST, 11111), ["127.0.0.1", "::1"])
+        mock_getaddrinfo.assert_called_once()
+
+
+class HostHandler(BaseHTTPRequestHandler):
+    """Answer every request with the Host header it was sent with"""
+
+    def do_GET(self):
+        body = self.headers["Host"].encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+class TestTransportResolution(unittest.TestCase):
+    """Test transport connections use the cached address"""
+
+    def setUp(self):
+        transport.configure()
+        self.addCleanup(transport.configure)
+        patcher = patch("resolver.cache", resolver.ResolverCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), HostHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://{HOST}:{self.server.server_address[1]}/api/v1/camera/0/name"
+
+    def test_new_connections_use_cached_address(self):
+        with patch("socket.getaddrinfo", side_effect=local_getaddrinfo) as mock_getaddrinfo:
+            response = transport.get(self.url)
+            # drop the pooled connection, the next request has to connect again
+            transport.close()
+            transport.get(self.url)
+
+        # the Host header keeps the name
+        self.assertEqual(response.text, f"{HOST}:{self.server.server_address[1]}")
+        # the name was looked up once, connecting to the cached address doesn't need a lookup
+        self.assertEqual([c.args[0] for c in mock_getaddrinfo.call_args_list].count(HOST), 1)
+        self.assertEqual(resolver.cache.stats[HOST][:2], [1, 1])
+
+    def test_next_address_tried(self):
+        """A server listening on IPv4 only is reached when its name resolves to IPv6 first"""
+        for ttl in (60, 0):
+            resolver.cache.ttl = ttl
+            with patch("socket.getaddrinfo", side_effect=dual_stack_getaddrinfo):
+                response = transport.get(self.url, timeout=1)
+                transport.close()
+                transport.get(self.url, timeout=1)
+            transport.close()
+
+            self.assertEqual(response.status_code, 200)
+        # the cached address that connected is tried first
+        resolver.cache.ttl = 60
+        with patch("socket.getaddrinfo", side_effect=dual_stack_getaddrinfo):
+            transport.get(self.url, timeout=1)
+        self.assertEqual(resolver.cache.entries[HOST][1], ["127.0.0.1", "::1"])
+
+    def test_failed_connection_forgets_address(self):
+        port = self.server.server_address[1]
+        self.server.shutdown()
+        self.server.server_close()
+
+        with patch("socket.getaddrinfo", side_effect=local_getaddrinfo), pytest.raises(requests.exceptions.ConnectionError):
+            transport.get(f"http://{HOST}:{port}/api/v1/camera/0/name", timeout=1)
+
+        self.assertNotIn(HOST, resolver.cache.entries)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+"""
+Unit tests for Alpaca response decoding
+
+Tests verify bodies are parsed from bytes with or without orjson, values the
+fast decoder rejects fall back to the stdlib, and only the used envelope
+fields are returned.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import constants
+import response_parser
+
+OK = b'{"ClientTransactionID": 1, "ServerTransactionID": 42, "Value": -10.5, "ErrorNumber": 0, "ErrorMessage": ""}'
+NOT_CONNECTED = b'{"ClientTransactionID": 1, "ServerTransactionID": 43, "Value": null, "ErrorNumber": 1031, "ErrorMessage": "Camera not connected"}'
+
+
+class TestParseResponse(unittest.TestCase):
+    """Test envelope fields are extracted with either decoder"""
+
+    def check(self):
+        self.assertEqual(response_parser.parse_response(OK), (0, None, -10.5))
+        self.assertEqual(response_parser.parse_response(OK.decode()), (0, None, -10.5))
+        self.assertEqual(response_parser.parse_response(NOT_CONNECTED), (constants.ASCOM_NOT_CONNECTED, "Camera not connected", None))
+        self.assertEqual(response_parser.parse_response(b'{"Value": [1, 2]}'), (0, None, [1, 2]))
+        self.assertEqual(response_parser.parse_response(b'{"ErrorNumber": 1024}'), (constants.ASCOM_NOT_IMPLEMENTED, None, None))
+
+    def test_default_decoder(self):
+        self.check()
+
+    def test_stdlib_decoder(self):
+        with patch("response_parser.orjson", None):
+            self.check()
+
+    def test_non_finite_values(self):
+        """NaN and Infinity are not JSON but are sent by some drivers"""
+        value = response_parser.parse_response(b'{"Value": NaN, "ErrorNumber": 0}')[2]
+        self.assertNotEqual(value, value)
+        self.assertEqual(response_parser.parse_response(b'{"Value": -Infinity, "ErrorNumber": 0}')[2], float("-inf"))
+
+    def test_invalid(self):
+        with pytest.raises(ValueError, match="Expecting value"):
+            response_parser.parse_response(b"Internal Server Error")
+        with pytest.raises(KeyError):
+            response_parser.parse_response(b'{"ErrorNumber": 0, "ErrorMessage": ""}')
+
+
+if __name__ == "__main__":
+    unittest.main()
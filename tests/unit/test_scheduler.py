@@ -0,0 +1,170 @@
+"""
+Unit tests for per-attribute poll scheduling
+
+Tests verify attributes are only polled when due, the earliest due time drives
+the main loop sleep, and attributes of devices that stop being polled are
+forgotten.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import exporter_core
+import scheduler
+
+
+class FakeClock:
+    """Controllable replacement for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAttributeScheduler(unittest.TestCase):
+    """Test due tracking and the priority queue"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("scheduler.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.scheduler = scheduler.AttributeScheduler(5)
+
+    def poll(self, key, interval, value):
+        calls = []
+
+        def fetch():
+            calls.append(key)
+            return value
+
+        result = self.scheduler.fetch(key, interval, fetch)
+        return result, len(calls)
+
+    def test_not_due_returns_last_value(self):
+        """Second poll before the interval elapses should not fetch"""
+        key = ("telescope", 0, "siteelevation", "")
+        self.scheduler.begin_pass()
+        self.assertEqual(self.poll(key, 300, 100.0), (100.0, 1))
+
+        self.clock.now += 5
+        self.scheduler.begin_pass()
+        self.assertEqual(self.poll(key, 300, 200.0), (100.0, 0))
+
+        self.clock.now += 300
+        self.scheduler.begin_pass()
+        self.assertEqual(self.poll(key, 300, 200.0), (200.0, 1))
+
+    def test_next_due_is_earliest_attribute(self):
+        """Sleep should be until the fastest attribute is due"""
+        self.scheduler.begin_pass()
+        self.poll(("telescope", 0, "siteelevation", ""), 300, 1)
+        self.poll(("telescope", 0, "slewing", ""), 2, 0)
+        self.poll(("telescope", 0, "altitude", ""), 5, 45)
+        self.scheduler.end_pass()
+
+        self.assertEqual(self.scheduler.seconds_until_next_due(5), 2)
+
+    def test_sleep_capped_at_max_wait(self):
+        """Nothing scheduled, or only slow attributes, waits at most max_wait"""
+        self.assertEqual(self.scheduler.seconds_until_next_due(5), 5)
+
+        self.scheduler.begin_pass()
+        self.poll(("telescope", 0, "siteelevation", ""), 300, 1)
+        self.assertEqual(self.scheduler.seconds_until_next_due(5), 5)
+
+    def test_rescheduled_entries_skipped(self):
+        """Outdated heap entries should not be reported as due"""
+        key = ("camera", 0, "ccdtemperature", "")
+        self.scheduler.begin_pass()
+        self.poll(key, 2, -10)
+        self.clock.now += 2
+        self.scheduler.begin_pass()
+        self.poll(key, 2, -10)
+        self.scheduler.end_pass()
+
+        self.assertEqual(self.scheduler.next_due(), self.clock.now + 2)
+
+    def test_end_pass_forgets_unseen_attributes(self):
+        """Attributes not requested in a pass are dropped and fetched fresh next time"""
+        key = ("camera", 0, "gain", "")
+        self.scheduler.begin_pass()
+        self.poll(key, 300, 100)
+        self.scheduler.end_pass()
+
+        # next pass device is disconnected, gain not requested
+        self.clock.now += 5
+        self.scheduler.begin_pass()
+        self.scheduler.end_pass()
+        self.assertIsNone(self.scheduler.next_due())
+
+        # reconnect, polled immediately
+        self.clock.now += 5
+        self.scheduler.begin_pass()
+        self.assertEqual(self.poll(key, 300, 120), (120, 1))
+
+    def test_interval_of_defaults_and_minimum(self):
+        """Missing interval uses default, tiny intervals are clamped"""
+        self.assertEqual(self.scheduler.interval_of({"alpaca_name": "altitude"}), 5)
+        self.assertEqual(self.scheduler.interval_of({"alpaca_name": "siteelevation", "interval": 3600}), 3600)
+        self.assertEqual(self.scheduler.interval_of({"alpaca_name": "slewing", "interval": 0}), 1)
+
+
+class TestProcessDeviceWithScheduler(unittest.TestCase):
+    """Test that process_device only polls due attributes"""
+
+    @patch("exporter_core.metrics_utility.set")
+    def test_slow_attribute_polled_once(self, mock_set):
+        """Across two passes within the slow interval only fast attributes are refetched"""
+        clock = FakeClock()
+        configurations = {
+            "telescope": {
+                "metric_prefix": "alpaca_telescope_",
+                "metrics": [
+                    {"alpaca_name": "altitude"},
+                    {"alpaca_name": "siteelevation", "interval": 300},
+                ],
+            }
+        }
+        requested = []
+
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            requested.append(attribute)
+            return "Scope" if attribute == "name" else 1.0
+
+        with patch("scheduler.time.monotonic", clock):
+            attribute_scheduler = scheduler.AttributeScheduler(5)
+            metrics = []
+            for _ in range(2):
+                attribute_scheduler.begin_pass()
+                metrics = exporter_core.process_device(
+                    "telescope",
+                    0,
+                    configurations,
+                    "http://localhost:11111/api/v1",
+                    False,
+                    {"telescope": [0]},
+                    {},
+                    {},
+                    mock_get_value,
+                    mock_get_value,
+                    scheduler=attribute_scheduler,
+                )
+                attribute_scheduler.end_pass()
+                clock.now += 5
+
+        self.assertEqual(requested, ["name", "altitude", "siteelevation", "name", "altitude"])
+        # slow attribute still reported so it isn't treated as stale
+        self.assertIn("alpaca_telescope_siteelevation", [m[0] for m in metrics])
+        mock_set.assert_any_call("alpaca_telescope_siteelevation", 1.0, {"device_type": "telescope", "device_number": 0, "name": "Scope"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,7 +20,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 class TestServerUnavailableAtStartup(unittest.TestCase):
     """Test exporter behavior when Alpaca server unavailable at startup"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_startup_retries_when_server_unavailable(self, mock_get):
         """
         Test that exporter retries indefinitely when server unavailable at startup.
@@ -59,7 +59,7 @@ class TestServerUnavailableAtStartup(unittest.TestCase):
         # 4. Sleep and retry
         # 5. NOT call os._exit(-1)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_startup_no_metrics_until_server_available(self, mock_get):
         """
         Test that no metrics are created until server becomes available.
@@ -87,7 +87,7 @@ class TestServerUnavailableAtStartup(unittest.TestCase):
 class TestServerUnavailableDuringRuntime(unittest.TestCase):
     """Test exporter behavior when Alpaca server becomes unavailable during runtime"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_runtime_server_failure_marks_devices_disconnected(self, mock_get):
         """
         Test that all devices marked disconnected when server becomes unavailable.
@@ -113,7 +113,7 @@ class TestServerUnavailableDuringRuntime(unittest.TestCase):
         # Initial state: devices connected
         mock_response_success = Mock()
         mock_response_success.status_code = 200
-        mock_response_success.text = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response_success.content = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response_success
 
         # Query telescope
@@ -166,7 +166,7 @@ class TestServerUnavailableDuringRuntime(unittest.TestCase):
         # Error counters should have been incremented
         # (This is verified by the fact that record_metrics=True was passed and None was returned)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_runtime_server_recovery_reconnects_devices(self, mock_get):
         """
         Test that devices reconnect when server becomes available again.
@@ -189,7 +189,7 @@ class TestServerUnavailableDuringRuntime(unittest.TestCase):
         # Initial: device connected
         mock_response_success = Mock()
         mock_response_success.status_code = 200
-        mock_response_success.text = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response_success.content = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response_success
 
         name = alpaca_exporter.getValue(
@@ -229,7 +229,7 @@ class TestServerUnavailableDuringRuntime(unittest.TestCase):
         )
         self.assertEqual(name, "TestDevice", "Device should reconnect after server recovery")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discovery_api_failure_during_runtime(self, mock_get):
         """
         Test discovery mode behavior when Management API fails during runtime.
@@ -252,9 +252,9 @@ class TestServerUnavailableDuringRuntime(unittest.TestCase):
         # Initial discovery succeeds
         mock_response_success = Mock()
         mock_response_success.status_code = 200
-        mock_response_success.text = json.dumps(
+        mock_response_success.content = json.dumps(
             {"Value": [{"DeviceType": "Telescope", "DeviceNumber": 0, "DeviceName": "Test", "UniqueID": "test-001"}], "ErrorNumber": 0, "ErrorMessage": ""}
-        )
+        ).encode()
         mock_get.return_value = mock_response_success
 
         discovered = alpaca_exporter.discoverDevices(alpaca_base_url="http://localhost:11111/api/v1", verbose=False)
@@ -273,7 +273,7 @@ class TestServerUnavailableDuringRuntime(unittest.TestCase):
 class TestPartialServerFailures(unittest.TestCase):
     """Test behavior with partial server failures (some endpoints work, others don't)"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_management_api_works_device_api_fails(self, mock_get):
         """
         Test when Management API works but Device API fails.
@@ -296,9 +296,9 @@ class TestPartialServerFailures(unittest.TestCase):
                 # Management API works
                 mock_response = Mock()
                 mock_response.status_code = 200
-                mock_response.text = json.dumps(
+                mock_response.content = json.dumps(
                     {"Value": [{"DeviceType": "Telescope", "DeviceNumber": 0, "DeviceName": "Test", "UniqueID": "test-001"}], "ErrorNumber": 0, "ErrorMessage": ""}
-                )
+                ).encode()
                 return mock_response
             # Device API fails
             msg = "Connection refused"
@@ -321,7 +321,7 @@ class TestPartialServerFailures(unittest.TestCase):
         )
         self.assertIsNone(name, "Device query should fail")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_http_500_error_treated_as_failure(self, mock_get):
         """
         Test that HTTP 500 errors are treated as device unavailable.
@@ -335,7 +335,7 @@ class TestPartialServerFailures(unittest.TestCase):
         # Simulate HTTP 500 error
         mock_response = Mock()
         mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
+        mock_response.content = b"Internal Server Error"
         mock_get.return_value = mock_response
 
         name = alpaca_exporter.getValue(
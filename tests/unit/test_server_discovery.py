@@ -0,0 +1,167 @@
+"""
+Unit tests for Alpaca UDP discovery of servers
+
+Tests verify discovery requests are answered by a local responder standing in
+for Alpaca servers, invalid responses are ignored, and servers found are only
+ever added.
+"""
+
+import json
+import socket
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import constants
+import exporter_core
+import resolver
+import server_discovery
+
+
+class Responder:
+    """Local stand-in for Alpaca servers answering discovery requests"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.settimeout(5)
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        data, address = self.sock.recvfrom(1024)
+        self.requests.append(data)
+        for response in self.responses:
+            self.sock.sendto(response, address)
+
+    def close(self):
+        self.thread.join()
+        self.sock.close()
+
+
+class TestDiscoverServers(unittest.TestCase):
+    """Test the discovery request and responses"""
+
+    def discover(self, responses):
+        responder = Responder(responses)
+        try:
+            return server_discovery.discover_servers(timeout=0.5, address="127.0.0.1", port=responder.port), responder.requests
+        finally:
+            responder.close()
+
+    def test_servers_found(self):
+        """Every valid response becomes a base URL, duplicates are dropped"""
+        urls, requests = self.discover([json.dumps({"AlpacaPort": 11111}).encode(), b'{"AlpacaPort": 11111}', b'{"AlpacaPort": 32323}'])
+
+        self.assertEqual(requests, [constants.ALPACA_DISCOVERY_MESSAGE])
+        self.assertEqual(urls, ["http://127.0.0.1:11111/api/v1", "http://127.0.0.1:32323/api/v1"])
+
+    def test_invalid_responses_ignored(self):
+        urls, _ = self.discover([b"not json", b'{"AlpacaPort": "11111"}', b'{"AlpacaPort": 0}', b"[]"])
+
+        self.assertEqual(urls, [])
+
+    @patch("select.select")
+    @patch("socket.socket")
+    def test_receive_error(self, mock_socket, mock_select):
+        """A failing receive ends the discovery with what was found, nothing is raised"""
+        sock = mock_socket.return_value.__enter__.return_value
+        sock.recvfrom.side_effect = OSError("Network is unreachable")
+        mock_select.return_value = ([sock], [], [])
+
+        with patch("builtins.print") as mock_print:
+            self.assertEqual(server_discovery.discover_servers(timeout=0.5, address="127.0.0.1", port=32227), [])
+
+        self.assertIn("WARNING", str(mock_print.call_args))
+
+    def test_no_responses(self):
+        """Nothing answering returns nothing once the timeout is over"""
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+            self.assertEqual(server_discovery.discover_servers(timeout=0.1, address="127.0.0.1", port=port), [])
+
+
+class TestServerDiscovery(unittest.TestCase):
+    """Test the background server list"""
+
+    def test_servers_only_added(self):
+        discover = Mock(side_effect=[["http://a:11111/api/v1"], ["http://b:11111/api/v1", "http://a:11111/api/v1"], []])
+        finder = server_discovery.ServerDiscovery(discover, 60)
+
+        with patch("builtins.print") as mock_print:
+            finder.refresh()
+            self.assertEqual(finder.refresh(), ["http://b:11111/api/v1"])
+            self.assertEqual(finder.refresh(), [])
+
+        self.assertEqual(finder.servers, ("http://a:11111/api/v1", "http://b:11111/api/v1"))
+        self.assertEqual(mock_print.call_count, 2)
+
+    def setUp(self):
+        patcher = patch("resolver.cache", resolver.ResolverCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # no host names are resolved unless a test says so
+        patcher = patch("socket.getaddrinfo", side_effect=socket.gaierror("no such host"))
+        self.mock_getaddrinfo = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_configured_server_not_added(self):
+        """A configured host name answering discovery from its address is polled once"""
+        self.mock_getaddrinfo.side_effect = None
+        self.mock_getaddrinfo.return_value = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("192.168.1.20", 11111))]
+        discover = Mock(return_value=["http://192.168.1.20:11111/api/v1", "http://192.168.1.21:11111/api/v1"])
+        finder = server_discovery.ServerDiscovery(discover, 60, known=["http://pier1.local:11111/api/v1"])
+
+        with patch("builtins.print"):
+            self.assertEqual(finder.refresh(), ["http://192.168.1.21:11111/api/v1"])
+            self.assertEqual(finder.refresh(), [])
+
+    def test_same_devices_added_once(self):
+        """A server answering on several interfaces is told apart by the UniqueIDs of its devices"""
+        discover = Mock(return_value=["http://192.168.1.20:11111/api/v1", "http://10.0.0.20:11111/api/v1", "http://192.168.1.30:11111/api/v1"])
+        identities = {
+            "http://192.168.1.20:11111/api/v1": frozenset({"a", "b"}),
+            "http://10.0.0.20:11111/api/v1": frozenset({"a", "b"}),
+            "http://192.168.1.30:11111/api/v1": None,
+        }
+        identify = Mock(side_effect=identities.get)
+        finder = server_discovery.ServerDiscovery(discover, 60, identify_fn=identify)
+
+        with patch("builtins.print") as mock_print:
+            finder.refresh()
+            finder.refresh()
+
+        self.assertEqual(finder.servers, ("http://192.168.1.20:11111/api/v1", "http://192.168.1.30:11111/api/v1"))
+        self.assertIn("same server as http://192.168.1.20:11111/api/v1", str(mock_print.call_args_list))
+        # each server is identified once
+        self.assertEqual(identify.call_count, 3)
+
+
+class TestDiscoverServersArgs(unittest.TestCase):
+    """Test --discover_servers argument handling"""
+
+    def test_no_default_server(self):
+        self.assertEqual(exporter_core.parse_alpaca_base_urls({"discover_servers": True}), [])
+        self.assertEqual(exporter_core.parse_alpaca_base_urls({"discover_servers": True, "alpaca_base_url": ["http://pier1:11111/api/v1"]}), ["http://pier1:11111/api/v1"])
+        self.assertIsNone(exporter_core.parse_config_defaults({"discover_servers": True})[0])
+
+    def test_requires_device_discovery(self):
+        self.assertTrue(exporter_core.is_discover_mode({"discover": True, "discover_servers": True}))
+        with pytest.raises(ValueError, match="--discover_servers requires --discover"):
+            exporter_core.is_discover_mode({"discover_servers": True, "camera": [0]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,7 +21,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 class TestStartupRetryBehavior(unittest.TestCase):
     """Test that exporter retries indefinitely at startup when server unavailable"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_startup_retries_on_connection_error(self, mock_get):
         """
         Test that startup retries indefinitely when Alpaca server unavailable.
@@ -52,12 +52,12 @@ class TestStartupRetryBehavior(unittest.TestCase):
             mock_response.status_code = 200
             if "management" in args[0]:
                 # Management API for discovery
-                mock_response.text = json.dumps(
+                mock_response.content = json.dumps(
                     {"Value": [{"DeviceType": "Telescope", "DeviceNumber": 0, "DeviceName": "Test", "UniqueID": "test-001"}], "ErrorNumber": 0, "ErrorMessage": ""}
-                )
+                ).encode()
             else:
                 # Device API
-                mock_response.text = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""})
+                mock_response.content = json.dumps({"Value": "TestDevice", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
             return mock_response
 
         mock_get.side_effect = connection_side_effect
@@ -76,7 +76,7 @@ class TestStartupRetryBehavior(unittest.TestCase):
 class TestManualModeStartupMetrics(unittest.TestCase):
     """Test that manual mode creates metrics immediately for all specified devices"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_manual_mode_creates_disconnected_metrics_immediately(self, mock_get):
         """
         Test that manual mode creates alpaca_device_connected=0 immediately.
@@ -119,7 +119,7 @@ class TestManualModeStartupMetrics(unittest.TestCase):
         # Current code doesn't distinguish between modes in getValue()
         # so this behavior needs to be implemented in the main startup logic
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_manual_mode_startup_logs_disconnected(self, mock_get):
         """
         Test that manual mode logs DISCONNECTED for unreachable devices at startup.
@@ -155,7 +155,7 @@ class TestManualModeStartupMetrics(unittest.TestCase):
         # that the logic would correctly identify this as disconnected
         self.assertIsNone(name, "Device should be identified as disconnected")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_manual_mode_startup_logs_connected(self, mock_get):
         """
         Test that manual mode logs CONNECTED for reachable devices at startup.
@@ -172,7 +172,7 @@ class TestManualModeStartupMetrics(unittest.TestCase):
         # Simulate device online
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         name = alpaca_exporter.getValue(
@@ -195,7 +195,7 @@ class TestManualModeStartupMetrics(unittest.TestCase):
 class TestDiscoveryModeNeverConnected(unittest.TestCase):
     """Test that discovery mode doesn't create metrics for never-connected devices"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discovery_mode_never_connected_no_metrics(self, mock_get):
         """
         Test that discovery mode doesn't create metrics for devices that never connect.
@@ -231,7 +231,7 @@ class TestDiscoveryModeNeverConnected(unittest.TestCase):
         # In discovery mode with record_metrics=False, no counters should be created
         # (This is verified by the fact that record_metrics=False was passed)
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_discovery_mode_first_connection_creates_metrics(self, mock_get):
         """
         Test that discovery mode creates metrics on first successful connection.
@@ -268,7 +268,7 @@ class TestDiscoveryModeNeverConnected(unittest.TestCase):
         mock_get.side_effect = None
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         name = alpaca_exporter.getValue(
@@ -289,7 +289,7 @@ class TestDiscoveryModeNeverConnected(unittest.TestCase):
 class TestManualModeNeverConnected(unittest.TestCase):
     """Test that manual mode creates metrics immediately even for never-connected devices"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_manual_mode_never_connected_creates_metrics(self, mock_get):
         """
         Test that manual mode creates metrics immediately for offline devices.
@@ -336,7 +336,7 @@ class TestManualModeNeverConnected(unittest.TestCase):
 class TestStartupMixedDeviceStates(unittest.TestCase):
     """Test startup with multiple devices in different states"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_manual_mode_mixed_device_states_at_startup(self, mock_get):
         """
         Test manual mode with some devices online and some offline at startup.
@@ -363,7 +363,7 @@ class TestStartupMixedDeviceStates(unittest.TestCase):
 
             if "telescope" in url:
                 # Telescope online
-                mock_response.text = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""})
+                mock_response.content = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
                 return mock_response
             if "camera" in url:
                 # Camera offline
@@ -371,7 +371,7 @@ class TestStartupMixedDeviceStates(unittest.TestCase):
                 raise ConnectionRefusedError(msg)
             if "rotator" in url:
                 # Rotator online
-                mock_response.text = json.dumps({"Value": "TestRotator", "ErrorNumber": 0, "ErrorMessage": ""})
+                mock_response.content = json.dumps({"Value": "TestRotator", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
                 return mock_response
             msg = "Unknown device"
             raise ValueError(msg)
@@ -0,0 +1,188 @@
+"""
+Unit tests for exporter state kept across restarts
+
+Tests verify skip lists are restored only for the same UniqueID and driver
+version, connection status and known devices survive a restart, and broken
+state files are ignored.
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from importlib import import_module
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import exporter_core
+import state_store
+
+ALPACA_BASE_URL = "http://localhost:11111/api/v1"
+
+CONFIGURATIONS = {
+    "camera": {
+        "metric_prefix": "alpaca_camera_",
+        "metrics": [{"alpaca_name": "ccdtemperature"}, {"alpaca_name": "coolerpower"}],
+    }
+}
+
+
+class TestStateStore(unittest.TestCase):
+    """Test saving and loading state"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "state.json")
+
+    def saved_servers(self):
+        """Servers as a previous run left them, with a connected camera that skips coolerpower"""
+        server = exporter_core.ServerState(ALPACA_BASE_URL)
+        server.device_status["camera/0"] = True
+        server.all_known_devices["camera"] = [0]
+        server.skip_device_attribute["camera"] = {"0": ["coolerpower"]}
+        server.unique_ids["camera/0"] = "uid-cam"
+        servers = {ALPACA_BASE_URL: server}
+
+        store = state_store.StateStore(self.path)
+        store.identify("uid-cam", "1.2.3")
+        self.assertTrue(store.save(servers))
+        return servers
+
+    def test_round_trip(self):
+        """Connection status, known devices and the skip list of the same driver are restored"""
+        self.saved_servers()
+
+        server = exporter_core.ServerState(ALPACA_BASE_URL)
+        store = state_store.StateStore(self.path)
+        self.assertTrue(store.load({ALPACA_BASE_URL: server}))
+
+        self.assertEqual(server.device_status, {"camera/0": True})
+        self.assertEqual(server.all_known_devices, {"camera": [0]})
+        self.assertEqual(store.identify("uid-cam", "1.2.3"), ["coolerpower"])
+
+    def test_new_driver_version_not_restored(self):
+        """A different driver build has to be probed again"""
+        self.saved_servers()
+
+        store = state_store.StateStore(self.path)
+        store.load({})
+
+        self.assertIsNone(store.identify("uid-cam", "1.3.0"))
+        self.assertIsNone(store.identify("uid-other", "1.2.3"))
+
+    def test_unchanged_state_not_written(self):
+        servers = self.saved_servers()
+        store = state_store.StateStore(self.path)
+        store.load(servers)
+        store.identify("uid-cam", "1.2.3")
+
+        self.assertFalse(store.save(servers))
+
+        servers[ALPACA_BASE_URL].skip_device_attribute["camera"]["0"].append("heatsinktemperature")
+        self.assertTrue(store.save(servers))
+        saved = json.loads(Path(self.path).read_text())
+        self.assertEqual(saved["devices"]["uid-cam"], {"driverversion": "1.2.3", "skip": ["coolerpower", "heatsinktemperature"]})
+
+    def test_saved_after_renumbering(self):
+        """The skip list is found by UniqueID under the device's new number"""
+        servers = self.saved_servers()
+        server = servers[ALPACA_BASE_URL]
+        server.unique_ids = {"camera/2": "uid-cam"}
+        server.skip_device_attribute["camera"] = {"2": ["coolerpower", "fanstatus"]}
+        store = state_store.StateStore(self.path)
+        store.identify("uid-cam", "1.2.3")
+
+        self.assertTrue(store.save(servers))
+        self.assertEqual(store.devices["uid-cam"]["skip"], ["coolerpower", "fanstatus"])
+
+    def test_missing_file(self):
+        server = exporter_core.ServerState(ALPACA_BASE_URL)
+
+        self.assertFalse(state_store.StateStore(self.path).load({ALPACA_BASE_URL: server}))
+        self.assertEqual(server.device_status, {})
+
+    def test_broken_files_ignored(self):
+        """Unreadable files and other versions start with empty state"""
+        server = exporter_core.ServerState(ALPACA_BASE_URL)
+        for content in ("{not json", json.dumps({"version": state_store.VERSION + 1, "servers": {ALPACA_BASE_URL: {"device_status": {"camera/0": True}}}})):
+            Path(self.path).write_text(content)
+
+            with patch("builtins.print") as mock_print:
+                self.assertFalse(state_store.StateStore(self.path).load({ALPACA_BASE_URL: server}))
+
+            self.assertIn("WARNING", mock_print.call_args.args[0])
+        self.assertEqual(server.device_status, {})
+
+
+class TestRestoreSkips(unittest.TestCase):
+    """Test process_device uses restored skip lists"""
+
+    def run_device(self, device_status, skip_device_attribute, restore_skips_fn):
+        get_value = Mock(side_effect=lambda _url, _dt, _dn, attribute, *_args, **_kwargs: "Cam" if attribute == "name" else 1.0)
+        with patch("exporter_core.metrics_utility.set"), patch("builtins.print") as mock_print:
+            exporter_core.process_device(
+                "camera", 0, CONFIGURATIONS, ALPACA_BASE_URL, False, {"camera": [0]}, device_status, skip_device_attribute, get_value, get_value, restore_skips_fn=restore_skips_fn
+            )
+        return mock_print
+
+    def test_restored_on_connect(self):
+        skip_device_attribute = {"camera": {"0": ["stale"]}}
+        restore = Mock(return_value=["coolerpower"])
+
+        mock_print = self.run_device({}, skip_device_attribute, restore)
+
+        restore.assert_called_once_with(ALPACA_BASE_URL, "camera", 0)
+        self.assertEqual(skip_device_attribute, {"camera": {"0": ["coolerpower"]}})
+        mock_print.assert_any_call("CONNECTED: camera/0")
+
+    def test_unknown_device_reset(self):
+        skip_device_attribute = {"camera": {"0": ["stale"]}}
+
+        self.run_device({}, skip_device_attribute, Mock(return_value=None))
+
+        self.assertEqual(skip_device_attribute, {"camera": {"0": []}})
+
+    def test_restored_connected_device(self):
+        """A device restored as connected gets its skip list once, without a CONNECTED message"""
+        skip_device_attribute = {}
+        restore = Mock(return_value=["coolerpower"])
+
+        mock_print = self.run_device({"camera/0": True}, skip_device_attribute, restore)
+        self.run_device({"camera/0": True}, skip_device_attribute, restore)
+
+        restore.assert_called_once()
+        self.assertEqual(skip_device_attribute, {"camera": {"0": ["coolerpower"]}})
+        mock_print.assert_not_called()
+
+
+class TestDiscoveryUniqueIds(unittest.TestCase):
+    """Test discovery records UniqueIDs"""
+
+    @patch("requests.Session.get")
+    def test_unique_ids_recorded(self, mock_get):
+        alpaca_exporter = import_module("alpaca-exporter")
+        mock_get.return_value = Mock(
+            status_code=200,
+            content=json.dumps(
+                {
+                    "Value": [
+                        {"DeviceType": "Camera", "DeviceNumber": 0, "DeviceName": "Cam", "UniqueID": "uid-cam"},
+                        {"DeviceType": "Focuser", "DeviceNumber": 1, "DeviceName": "Foc"},
+                    ]
+                }
+            ).encode(),
+        )
+        unique_ids = {}
+
+        discovered = alpaca_exporter.discoverDevices(ALPACA_BASE_URL, verbose=False, unique_ids=unique_ids)
+
+        self.assertEqual(discovered, {"camera": [0], "focuser": [1]})
+        self.assertEqual(unique_ids, {"camera/0": "uid-cam"})
+
+
+if __name__ == "__main__":
+    unittest.main()
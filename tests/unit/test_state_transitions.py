@@ -12,6 +12,8 @@ import unittest
 from pathlib import Path
 from unittest.mock import Mock, patch
 
+import pytest
+
 # Add src directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 
@@ -19,7 +21,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
 class TestDeviceStateTransitions(unittest.TestCase):
     """Test device state transitions (connected → disconnected → reconnected)"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     @patch("builtins.print")
     def test_device_stays_connected_no_transition_logs(self, mock_print, mock_get):
         """
@@ -39,7 +41,7 @@ class TestDeviceStateTransitions(unittest.TestCase):
         # Mock successful name query (device connected)
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response.content = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response
 
         device_status = {}
@@ -78,7 +80,7 @@ class TestDeviceStateTransitions(unittest.TestCase):
                 has_transition_log = any("CONNECTED" in str(call) or "DISCONNECTED" in str(call) for call in print_calls)
                 self.assertFalse(has_transition_log, f"Cycle {cycle}: No state transition logs when device stays connected")
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     @patch("builtins.print")
     def test_connected_device_disconnects(self, mock_print, mock_get):
         """
@@ -100,7 +102,7 @@ class TestDeviceStateTransitions(unittest.TestCase):
         # Cycle 1: Device connected
         mock_response_success = Mock()
         mock_response_success.status_code = 200
-        mock_response_success.text = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response_success.content = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response_success
 
         name = alpaca_exporter.getValue(
@@ -138,7 +140,7 @@ class TestDeviceStateTransitions(unittest.TestCase):
         self.assertFalse(current_status, "Device is now disconnected")
         # This state change should trigger "DISCONNECTED: telescope/0" log
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_disconnected_device_reconnects(self, mock_get):
         """
         Test device transitioning from disconnected back to connected.
@@ -162,7 +164,7 @@ class TestDeviceStateTransitions(unittest.TestCase):
         # Cycle 1: Device connected
         mock_response_success = Mock()
         mock_response_success.status_code = 200
-        mock_response_success.text = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response_success.content = json.dumps({"Value": "TestTelescope", "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response_success
 
         name = alpaca_exporter.getValue(
@@ -218,7 +220,7 @@ class TestDeviceStateTransitions(unittest.TestCase):
 class TestSkipListReset(unittest.TestCase):
     """Test that skip list is reset when device reconnects"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_skip_list_reset_on_reconnect(self, mock_get):
         """
         Test that skip list is cleared when device reconnects.
@@ -239,7 +241,7 @@ class TestSkipListReset(unittest.TestCase):
         # Step 1: Device connected, query attribute that's not implemented
         mock_response_1024 = Mock()
         mock_response_1024.status_code = 200
-        mock_response_1024.text = json.dumps({"Value": None, "ErrorNumber": 1024, "ErrorMessage": "Not implemented"})
+        mock_response_1024.content = json.dumps({"Value": None, "ErrorNumber": 1024, "ErrorMessage": "Not implemented"}).encode()
         mock_get.return_value = mock_response_1024
 
         value = alpaca_exporter.getValue(
@@ -268,7 +270,7 @@ class TestSkipListReset(unittest.TestCase):
         # Change mock to return success for the attribute
         mock_response_success = Mock()
         mock_response_success.status_code = 200
-        mock_response_success.text = json.dumps({"Value": 0.0, "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response_success.content = json.dumps({"Value": 0.0, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response_success
 
         # The attribute should NOT be in skip list after reconnect
@@ -290,7 +292,7 @@ class TestSkipListReset(unittest.TestCase):
 class TestMultipleDevicesIndependentStates(unittest.TestCase):
     """Test that multiple devices maintain independent states"""
 
-    @patch("requests.get")
+    @patch("requests.Session.get")
     def test_multiple_devices_independent_skip_lists(self, mock_get):
         """
         Test that skip lists are maintained separately per device.
@@ -306,7 +308,7 @@ class TestMultipleDevicesIndependentStates(unittest.TestCase):
         # Camera 0: cooleron returns error 1024 (not implemented)
         mock_response_1024 = Mock()
         mock_response_1024.status_code = 200
-        mock_response_1024.text = json.dumps({"Value": None, "ErrorNumber": 1024, "ErrorMessage": "Not implemented"})
+        mock_response_1024.content = json.dumps({"Value": None, "ErrorNumber": 1024, "ErrorMessage": "Not implemented"}).encode()
         mock_get.return_value = mock_response_1024
 
         value = alpaca_exporter.getValue(
@@ -327,7 +329,7 @@ class TestMultipleDevicesIndependentStates(unittest.TestCase):
         # Camera 1: cooleron returns success (implemented)
         mock_response_success = Mock()
         mock_response_success.status_code = 200
-        mock_response_success.text = json.dumps({"Value": True, "ErrorNumber": 0, "ErrorMessage": ""})
+        mock_response_success.content = json.dumps({"Value": True, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
         mock_get.return_value = mock_response_success
 
         value = alpaca_exporter.getValue(
@@ -346,5 +348,213 @@ class TestMultipleDevicesIndependentStates(unittest.TestCase):
             self.assertNotIn("cooleron", alpaca_exporter.skip_device_attribute["camera"]["1"], "Camera 1 should not skip cooleron")
 
 
+TELESCOPE_CONFIGURATIONS = {"telescope": {"metric_prefix": "alpaca_telescope_", "metrics": [{"alpaca_name": "altitude"}]}}
+
+
+class TestCacheInvalidationOnTransition(unittest.TestCase):
+    """Test that cached values are dropped whenever a device changes state"""
+
+    def run_cycle(self, name, device_status, invalidate):
+        import exporter_core
+
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            return name if attribute == "name" else 45.0
+
+        with patch("exporter_core.metrics_utility.set"), patch("builtins.print"):
+            exporter_core.process_device(
+                "telescope",
+                0,
+                TELESCOPE_CONFIGURATIONS,
+                "http://localhost:11111/api/v1",
+                False,
+                {"telescope": [0]},
+                device_status,
+                {},
+                mock_get_value,
+                mock_get_value,
+                invalidate_cache_fn=invalidate,
+            )
+
+    def test_invalidated_on_connect_and_disconnect_only(self):
+        """Connect and disconnect each invalidate once, steady state does not"""
+        invalidate = Mock()
+        device_status = {}
+
+        self.run_cycle("Scope", device_status, invalidate)  # CONNECTED
+        self.run_cycle("Scope", device_status, invalidate)  # still connected
+        self.run_cycle(None, device_status, invalidate)  # DISCONNECTED
+        self.run_cycle(None, device_status, invalidate)  # still disconnected
+        self.run_cycle("Scope 2", device_status, invalidate)  # CONNECTED (new driver)
+
+        self.assertEqual(invalidate.call_count, 3)
+        invalidate.assert_called_with("http://localhost:11111/api/v1", "telescope", 0)
+
+    @patch("requests.Session.get")
+    def test_reconnect_refetches_cached_label(self, mock_get):
+        """After invalidation a cached value is fetched from the new driver"""
+        from importlib import import_module
+
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.value_cache.clear()
+        alpaca_exporter.skip_device_attribute = {}
+
+        def respond(value):
+            response = Mock()
+            response.status_code = 200
+            response.content = json.dumps({"Value": value, "ErrorNumber": 0, "ErrorMessage": ""}).encode()
+            return response
+
+        url = "http://localhost:11111/api/v1"
+        mock_get.return_value = respond("Driver A")
+        self.assertEqual(alpaca_exporter.getValueCached(url, "telescope", 0, "driverversion", ttl=3600), "Driver A")
+
+        mock_get.return_value = respond("Driver B")
+        self.assertEqual(alpaca_exporter.getValueCached(url, "telescope", 0, "driverversion", ttl=3600), "Driver A")
+
+        alpaca_exporter.invalidateDevice(url, "telescope", 0)
+        self.assertEqual(alpaca_exporter.getValueCached(url, "telescope", 0, "driverversion", ttl=3600), "Driver B")
+
+
+CAMERA_CONFIGURATIONS = {
+    "camera": {
+        "metric_prefix": "alpaca_camera_",
+        "metrics": [{"alpaca_name": "ccdtemperature"}, {"alpaca_name": "coolerpower"}, {"alpaca_name": "gain"}, {"alpaca_name": "offset"}],
+    }
+}
+
+
+class TestMidCycleDisconnect(unittest.TestCase):
+    """Test that a device lost mid-cycle stops being polled for that cycle"""
+
+    @staticmethod
+    def get_value(requested):
+        import exporter_core
+
+        def mock_get_value(_url, device_type, device_number, attribute, _querystr="", _record_metrics=True, **_kwargs):
+            requested.append(attribute)
+            if attribute == "name":
+                return "Camera"
+            if attribute == "coolerpower":
+                msg = f"{device_type}/{device_number}: not connected"
+                raise exporter_core.DeviceNotConnectedError(msg)
+            return 1.0
+
+        return mock_get_value
+
+    def test_remaining_attributes_skipped(self):
+        """First NotConnected error ends the device's cycle, the device stays connected"""
+        import exporter_core
+
+        requested = []
+        mock_get_value = self.get_value(requested)
+        device_status = {}
+        with patch("exporter_core.metrics_utility.set"), patch("builtins.print"):
+            metrics = exporter_core.process_device(
+                "camera", 0, CAMERA_CONFIGURATIONS, "http://localhost:11111/api/v1", False, {"camera": [0]}, device_status, {}, mock_get_value, mock_get_value
+            )
+
+        self.assertEqual(requested, ["name", "ccdtemperature", "coolerpower"])
+        self.assertTrue(device_status["camera/0"])
+        self.assertEqual([m[0] for m in metrics], ["alpaca_device_connected", "alpaca_device_name"])
+
+    def test_not_connected_every_cycle(self):
+        """A device answering 'name' while not connected connects once and is not reset every cycle"""
+        import exporter_core
+
+        requested = []
+        mock_get_value = self.get_value(requested)
+        device_status = {}
+        skip_device_attribute = {}
+        plans = {}
+        compiled = []
+        invalidate = Mock()
+        restore_skips = Mock(return_value=None)
+        with patch("exporter_core.metrics_utility.set"), patch("builtins.print") as mock_print:
+            for _ in range(3):
+                exporter_core.process_device(
+                    "camera",
+                    0,
+                    CAMERA_CONFIGURATIONS,
+                    "http://localhost:11111/api/v1",
+                    False,
+                    {"camera": [0]},
+                    device_status,
+                    skip_device_attribute,
+                    mock_get_value,
+                    mock_get_value,
+                    invalidate_cache_fn=invalidate,
+                    plans=plans,
+                    restore_skips_fn=restore_skips,
+                )
+                compiled.append(plans["camera/0"])
+
+        self.assertEqual([str(c.args[0]) for c in mock_print.call_args_list], ["CONNECTED: camera/0"])
+        self.assertTrue(device_status["camera/0"])
+        # compiled on connect and kept
+        self.assertEqual(len({id(plan) for plan in compiled}), 1)
+        invalidate.assert_called_once()
+        restore_skips.assert_called_once()
+        self.assertEqual(requested, ["name", "ccdtemperature", "coolerpower"] * 3)
+
+    def test_name_not_connected_is_disconnected(self):
+        """A NotConnected error on the name check behaves like no response"""
+        import exporter_core
+
+        def mock_get_value(_url, _device_type, _device_number, _attribute, _querystr="", _record_metrics=True, **_kwargs):
+            msg = "not connected"
+            raise exporter_core.DeviceNotConnectedError(msg)
+
+        device_status = {"camera/0": True}
+        with patch("exporter_core.metrics_utility.set"), patch("builtins.print"):
+            exporter_core.process_device(
+                "camera",
+                0,
+                {"camera": {"metrics": [{"alpaca_name": "gain"}]}},
+                "http://localhost:11111/api/v1",
+                False,
+                {"camera": [0]},
+                device_status,
+                {},
+                mock_get_value,
+                mock_get_value,
+            )
+
+        self.assertFalse(device_status["camera/0"])
+
+    @patch("requests.Session.get")
+    def test_get_value_raises_on_ascom_not_connected(self, mock_get):
+        """ErrorNumber 0x407 (NotConnected) raises DeviceNotConnectedError"""
+        from importlib import import_module
+
+        import exporter_core
+
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.skip_device_attribute = {}
+
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps({"Value": None, "ErrorNumber": 0x407, "ErrorMessage": "Camera not connected"}).encode()
+        mock_get.return_value = mock_response
+
+        with pytest.raises(exporter_core.DeviceNotConnectedError):
+            alpaca_exporter.getValue("http://localhost:11111/api/v1", "camera", 0, "ccdtemperature", "", True)
+
+    @patch("requests.Session.get")
+    def test_get_value_raises_on_connection_error(self, mock_get):
+        """A connection-level failure raises DeviceNotConnectedError"""
+        from importlib import import_module
+
+        import requests
+
+        import exporter_core
+
+        alpaca_exporter = import_module("alpaca-exporter")
+        alpaca_exporter.skip_device_attribute = {}
+        mock_get.side_effect = requests.exceptions.ConnectTimeout("timed out")
+
+        with pytest.raises(exporter_core.DeviceNotConnectedError):
+            alpaca_exporter.getValue("http://localhost:11111/api/v1", "camera", 0, "ccdtemperature", "", True)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -38,7 +38,7 @@ class TestSwitchMultipleSwitches(unittest.TestCase):
         alpaca_exporter.skip_device_attribute = {}
 
         # Mock functions
-        def mock_get_value(_url, _device_type, _device_number, attribute, querystr, _record_metrics=True):
+        def mock_get_value(_url, _device_type, _device_number, attribute, querystr, _record_metrics=True, **_kwargs):
             if attribute == "name":
                 return "TestSwitch"
             if attribute == "getswitch":
@@ -53,7 +53,7 @@ class TestSwitchMultipleSwitches(unittest.TestCase):
                     return 0
             return None
 
-        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr=""):
+        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr="", **_kwargs):
             if attribute == "maxswitch":
                 return 4
             return None
@@ -101,14 +101,14 @@ class TestSwitchSingleSwitch(unittest.TestCase):
         }
         alpaca_exporter.skip_device_attribute = {}
 
-        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr, _record_metrics=True):
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr, _record_metrics=True, **_kwargs):
             if attribute == "name":
                 return "SingleSwitch"
             if attribute == "getswitch":
                 return 1
             return None
 
-        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr=""):
+        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr="", **_kwargs):
             if attribute == "maxswitch":
                 return 1
             return None
@@ -154,7 +154,7 @@ class TestSwitchLabelIndependence(unittest.TestCase):
 
         switch_names = {}
 
-        def mock_get_value(_url, _device_type, _device_number, attribute, querystr, _record_metrics=True):
+        def mock_get_value(_url, _device_type, _device_number, attribute, querystr, _record_metrics=True, **_kwargs):
             if attribute == "name":
                 return "TestSwitch"
             if attribute == "getswitch":
@@ -168,7 +168,7 @@ class TestSwitchLabelIndependence(unittest.TestCase):
                 return 1
             return None
 
-        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr=""):
+        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr="", **_kwargs):
             if attribute == "maxswitch":
                 return 2
             return None
@@ -221,12 +221,12 @@ class TestSwitchZeroSwitches(unittest.TestCase):
         }
         alpaca_exporter.skip_device_attribute = {}
 
-        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr, _record_metrics=True):
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr, _record_metrics=True, **_kwargs):
             if attribute == "name":
                 return "EmptySwitch"
             return None
 
-        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr=""):
+        def mock_get_value_cached(_url, _device_type, _device_number, attribute, _querystr="", **_kwargs):
             if attribute == "maxswitch":
                 return 0
             return None
@@ -274,14 +274,14 @@ class TestNonSwitchDevicesNoID(unittest.TestCase):
         }
         alpaca_exporter.skip_device_attribute = {}
 
-        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr, _record_metrics=True):
+        def mock_get_value(_url, _device_type, _device_number, attribute, _querystr, _record_metrics=True, **_kwargs):
             if attribute == "name":
                 return "TestTelescope"
             if attribute == "altitude":
                 return 45.5
             return None
 
-        def mock_get_value_cached(_url, _device_type, _device_number, _attribute, _querystr=""):
+        def mock_get_value_cached(_url, _device_type, _device_number, _attribute, _querystr="", **_kwargs):
             return None
 
         device_status = {}
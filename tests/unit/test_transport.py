@@ -0,0 +1,163 @@
+"""
+Unit tests for the pooled HTTP transport
+
+Tests verify one keep-alive session per Alpaca server, pool sizing and
+the new/reused connection counters.
+"""
+
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from prometheus_client import CollectorRegistry
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import constants
+import request_counters
+import transport
+
+
+class TestSessionPerServer(unittest.TestCase):
+    """Test session pooling per Alpaca server"""
+
+    def setUp(self):
+        transport.configure()
+
+    def tearDown(self):
+        transport.configure()
+
+    def test_server_of_strips_path_and_query(self):
+        """Server origin should be scheme://host:port only"""
+        self.assertEqual(transport.server_of("http://127.0.0.1:11111/api/v1/telescope/0/name?"), "http://127.0.0.1:11111")
+        self.assertEqual(transport.server_of("http://pier1.local:11111/management/v1/configureddevices"), "http://pier1.local:11111")
+
+    def test_same_server_reuses_session(self):
+        """Requests to the same server should share one session"""
+        session1 = transport.get_session("http://127.0.0.1:11111")
+        session2 = transport.get_session("http://127.0.0.1:11111")
+
+        self.assertIs(session1, session2)
+        self.assertEqual(len(transport.sessions), 1)
+
+    def test_different_servers_get_separate_sessions(self):
+        """Each server should get its own session"""
+        session1 = transport.get_session("http://pier1:11111")
+        session2 = transport.get_session("http://pier2:11111")
+
+        self.assertIsNot(session1, session2)
+        self.assertEqual(len(transport.sessions), 2)
+
+    def test_configure_sets_pool_maxsize(self):
+        """Configured pool size should be used by new sessions"""
+        transport.configure(maxsize=3)
+        session = transport.get_session("http://127.0.0.1:11111")
+
+        adapter = session.get_adapter("http://127.0.0.1:11111/api/v1/")
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+    def test_configure_defaults(self):
+        """Unset pool sizes should fall back to defaults"""
+        transport.configure(maxsize=None)
+
+        self.assertEqual(transport.pool_maxsize, constants.DEFAULT_POOL_MAXSIZE)
+        self.assertEqual(transport.pool_connections, constants.DEFAULT_POOL_CONNECTIONS)
+
+    def test_configure_drops_existing_sessions(self):
+        """Reconfiguring should close and forget existing sessions"""
+        transport.get_session("http://127.0.0.1:11111")
+        transport.configure(maxsize=2)
+
+        self.assertEqual(transport.sessions, {})
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answer every request with an Alpaca value, keeping the connection open"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"Value": 1, "ErrorNumber": 0, "ErrorMessage": ""}'
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+class CountingServer(ThreadingHTTPServer):
+    """Local HTTP server counting the connections it accepted"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), KeepAliveHandler)
+        self.accepted = 0
+
+    def get_request(self):
+        self.accepted += 1
+        return super().get_request()
+
+
+class TestConnectionCounters(unittest.TestCase):
+    """Test new vs reused connection accounting"""
+
+    def setUp(self):
+        transport.configure()
+        self.addCleanup(transport.configure)
+        self.server = CountingServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.origin = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.url = f"{self.origin}/api/v1/telescope/0/name?"
+
+    def test_requests_share_one_connection(self):
+        """Polls over several cycles go over a single keep-alive connection"""
+        with patch("request_counters.counters", request_counters.RequestCounters()):
+            for _ in range(3):
+                for _ in range(3):
+                    self.assertEqual(transport.get(self.url).status_code, 200)
+                transport.flush_connection_counts()
+
+        self.assertEqual(self.server.accepted, 1)
+
+    def test_new_then_reused_connection(self):
+        """Requests are tallied and counted once per flush, one per opened connection as new"""
+        counters = request_counters.RequestCounters()
+
+        with patch("request_counters.counters", counters):
+            for _ in range(3):
+                transport.get(self.url)
+            transport.flush_connection_counts()
+            transport.get(self.url)
+            transport.flush_connection_counts()
+            # nothing sent, nothing counted
+            transport.flush_connection_counts()
+        counters.flush()
+
+        self.assertEqual(counters.connections, {("alpaca_connection_new_total", self.origin): 1, ("alpaca_connection_reused_total", self.origin): 3})
+        registry = CollectorRegistry()
+        registry.register(counters)
+        self.assertEqual(registry.get_sample_value("alpaca_connection_reused_total", {"server": self.origin}), 3)
+
+    @patch("requests.Session.get")
+    def test_get_routes_through_server_session(self, mock_get):
+        """get() should use the pooled session of the URL's server"""
+        mock_get.return_value = Mock(status_code=200)
+
+        response = transport.get("http://127.0.0.1:11111/api/v1/telescope/0/name?")
+
+        self.assertEqual(response.status_code, 200)
+        mock_get.assert_called_once_with("http://127.0.0.1:11111/api/v1/telescope/0/name?", timeout=constants.DEFAULT_REQUEST_TIMEOUT)
+        self.assertIn("http://127.0.0.1:11111", transport.sessions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Unit tests for warm starting /metrics from the last snapshot
+
+Tests verify saved gauges are served right after startup and marked as
+restored, live values replace them in the same series, and restored series
+nobody reports are removed after the first cycle.
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+# Add src directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+import device_collector
+import label_set
+import warm_start
+
+CAMERA_LABELS = {"device_type": "camera", "device_number": 0}
+FOCUSER_LABELS = {"device_type": "focuser", "device_number": 0}
+
+
+class TestWarmStart(unittest.TestCase):
+    """Test saving, restoring and settling gauges"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / "snapshot.json")
+
+        # previous run
+        collector = device_collector.DeviceCollector(capacity=4)
+        collector.set("alpaca_device_connected", 1, CAMERA_LABELS)
+        collector.set("alpaca_camera_ccdtemperature", -10.5, CAMERA_LABELS)
+        collector.set("alpaca_device_connected", 1, FOCUSER_LABELS)
+        self.assertTrue(warm_start.WarmStart(self.path).save(collector, now=1000.0))
+
+        # this run
+        self.registry = CollectorRegistry()
+        self.collector = device_collector.enable(self.registry)
+        self.addCleanup(setattr, device_collector, "collector", None)
+        self.warm = warm_start.enable(self.path, self.registry)
+
+    def render(self):
+        return generate_latest(self.registry).decode()
+
+    def test_restored_and_marked(self):
+        """Restored values are served before the first cycle, with their timestamp"""
+        self.assertIn("alpaca_exporter_restored 0.0", self.render())
+
+        self.assertEqual(self.warm.restore(self.collector), 3)
+
+        output = self.render()
+        self.assertIn('alpaca_camera_ccdtemperature{device_number="0",device_type="camera"} -10.5', output)
+        self.assertIn("alpaca_exporter_restored 1.0", output)
+        self.assertIn("alpaca_exporter_snapshot_timestamp_seconds 1000.0", output)
+
+    def test_live_values_replace_restored(self):
+        """A live value uses the restored series' slot, no duplicate series"""
+        self.warm.restore(self.collector)
+
+        device_collector.set_gauge("alpaca_camera_ccdtemperature", -15.0, CAMERA_LABELS)
+        self.collector.publish()
+
+        output = self.render()
+        self.assertIn('alpaca_camera_ccdtemperature{device_number="0",device_type="camera"} -15.0', output)
+        self.assertEqual(output.count("alpaca_camera_ccdtemperature{"), 1)
+
+    def test_settle_removes_unreported(self):
+        """After the first cycle only series reported live are kept and the marker is cleared"""
+        self.warm.restore(self.collector)
+        live = {("alpaca_device_connected", label_set.intern_labels(CAMERA_LABELS))}
+
+        self.assertEqual(self.warm.settle(self.collector, live), 2)
+        self.collector.publish()
+
+        output = self.render()
+        self.assertIn('alpaca_device_connected{device_number="0",device_type="camera"} 1.0', output)
+        self.assertNotIn("focuser", output)
+        self.assertNotIn("ccdtemperature", output)
+        self.assertIn("alpaca_exporter_restored 0.0", output)
+        self.assertNotIn("alpaca_exporter_snapshot_timestamp_seconds", output)
+
+    def test_save_interval(self):
+        self.assertTrue(self.warm.save(self.collector, now=2000.0))
+        self.assertFalse(self.warm.save(self.collector, now=2000.0 + self.warm.save_interval - 1))
+        self.assertTrue(self.warm.save(self.collector, now=2000.0 + self.warm.save_interval))
+
+    def test_broken_files_ignored(self):
+        for content in ("{not json", json.dumps({"version": warm_start.VERSION + 1, "series": [["alpaca_device_connected", CAMERA_LABELS, 1]]})):
+            Path(self.path).write_text(content)
+
+            with patch("builtins.print") as mock_print:
+                self.assertEqual(self.warm.restore(self.collector), 0)
+
+            self.assertIn("WARNING", mock_print.call_args.args[0])
+        self.assertEqual(self.collector.series(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()